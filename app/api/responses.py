@@ -0,0 +1,80 @@
+"""Pre-encoded JSON and NDJSON responses with gzip/brotli negotiation."""
+import zlib
+from typing import AsyncIterator, Dict, Optional
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def pick_encoding(accept_encoding: str) -> Optional[str]:
+    """Best Content-Encoding we can produce for an Accept-Encoding header: br, gzip or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            quality = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Incremental gzip or brotli, so streamed bodies are compressed chunk by chunk."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=settings.response_brotli_quality)
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            # wbits=31: zlib deflate with a gzip header and trailer
+            compressor = zlib.compressobj(settings.response_gzip_level, zlib.DEFLATED, 31)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+
+def json_response(body: bytes, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send already-encoded JSON, compressed when it is large enough and the client accepts it."""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if len(body) >= settings.response_compress_min_bytes:
+        encoding = pick_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            compressor = Compressor(encoding)
+            body = compressor.compress(body) + compressor.finish()
+            headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def ndjson_response(
+    chunks: AsyncIterator[bytes],
+    request: Request,
+    headers: Optional[Dict[str, str]] = None
+) -> StreamingResponse:
+    """Stream NDJSON chunks as they are produced, compressed on the fly when accepted."""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    async def compressed() -> AsyncIterator[bytes]:
+        compressor = Compressor(encoding)
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    headers["Content-Encoding"] = encoding
+    return StreamingResponse(compressed(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
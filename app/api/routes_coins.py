@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.db import get_read_session
+from app.schemas.coin_search import CoinSearchResults
+from app.schemas.price_history import PriceHistory
+from app.services.history_service import HistoryService, parse_interval
+from app.services.search_service import SearchService
+
+router = APIRouter()
+
+@router.get("/search", response_model=CoinSearchResults)
+async def search_coins(
+    q: str = Query(..., min_length=1, max_length=100, description="Symbol, name or id; prefixes and typos are fine"),
+    limit: int = Query(10, ge=1, le=settings.search_max_results),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Autocomplete: exact and prefix matches first, then fuzzy ones, larger market caps first."""
+    return CoinSearchResults(query=q, results=await SearchService.search(session, q, limit))
+
+@router.get("/{symbol}/history", response_model=PriceHistory)
+async def price_history(
+    symbol: str,
+    start: datetime | None = Query(None, alias="from", description="Defaults to `to` minus settings.history_default_days"),
+    end: datetime | None = Query(None, alias="to", description="Defaults to the end of the current bucket"),
+    interval: str | None = Query(None, description="Bucket size, e.g. 5m, 1h, 1d; picked from the range when omitted"),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Server-side OHLC downsampling of the coin's price history."""
+    try:
+        seconds = parse_interval(interval) if interval else None
+        end = end or HistoryService.open_end(start, seconds)
+        start = start or end - timedelta(days=settings.history_default_days)
+        history = await HistoryService.get_history(session, symbol, start, end, seconds)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    if history is None:
+        raise HTTPException(404, f"Unknown symbol: {symbol}")
+    return history
@@ -1,34 +1,83 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from typing import Any, Dict, cast
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.db import get_session
 from app.services.etl_service import ETLService
-from app.ingestion.csv_ingestor import CSVIngestor
-from app.schemas.etl_run import ETLRunsCreate
-import tempfile
-import os
+from app.core.locks import LockTimeout
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.jobs import job_runner
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.ingestion.upload import CSVStreamIngestor, UploadError, UploadStream
 
 router = APIRouter()
 
 @router.post("/ingest/csv")
 async def ingest_csv(
-    file: UploadFile = File(...),
+    request: Request,
+    filename: str = Query("upload.csv", description="File name for a raw text/csv body"),
     session: AsyncSession = Depends(get_session)
 ):
-    if not file.filename.endswith('.csv'):
+    """
+    Stream a CSV upload straight into normalization and the batched upsert.
+
+    Accepts multipart/form-data with a `file` field, or the CSV as the raw
+    request body. Rows are parsed and committed batch by batch while the
+    body is still arriving, so memory stays bounded for any file size.
+    """
+    upload = UploadStream(request.stream(), request.headers.get("content-type", ""), filename=filename)
+    try:
+        await upload.open()
+    except UploadError as e:
+        raise HTTPException(422, str(e))
+    if not upload.filename or not upload.filename.endswith('.csv'):
         raise HTTPException(400, "Only CSV files allowed")
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-    
+
+    ingestor = CSVStreamIngestor(upload.chunks(), name=f"csv:{upload.filename}")
     try:
-        ingestor = CSVIngestor(tmp_path)
-        coins = await ingestor.ingest()
-        
-        run = ETLRunsCreate(source=ingestor.get_source_name(), total_records=len(coins))
-        etl_run = await ETLService.create_run(session, run)
-        
-        return {"run_id": etl_run.id, "coins_ingested": len(coins)}
-    finally:
-        os.unlink(tmp_path)
+        await ingestor.read_header()
+    except UploadError as e:
+        raise HTTPException(422, str(e))
+
+    source = ingestor.get_source_name()
+    registry = IngestorRegistry()
+    registry.register(source, lambda: ingestor, timeout=settings.upload_timeout_seconds)
+    # Serialized with scheduled runs in every worker, like any other pipeline run,
+    # but an upload does not hold its unread body open while another run finishes
+    lock = job_runner.lock()
+    lock.timeout = settings.upload_lock_wait_seconds
+    try:
+        async with lock:
+            run = await ETLService.start_run(session, source=source)
+            upserted = await IngestionPipeline.run_all_ingestors(
+                session,
+                limit=settings.upload_max_rows,
+                registry=registry,
+                # A request body cannot be replayed, so there is nothing to resume from
+                checkpoints=CheckpointManager(persist=False),
+                run=run,
+            )
+    except LockTimeout as e:
+        raise HTTPException(
+            503, f"Another ingestion run is still in progress: {e}",
+            headers={"Retry-After": str(settings.upload_retry_after_seconds)},
+        )
+
+    # JSON column: {source: SourceResult.as_dict()}
+    source_stats = cast(Dict[str, Dict[str, Any]], run.source_stats or {})
+    result = source_stats.get(source, {})
+    progress = {
+        "run_id": run.id,
+        "status": result.get("status"),
+        "filename": upload.filename,
+        "bytes_received": upload.bytes_received,
+        "rows_received": ingestor.rows,
+        "batches": result.get("batches", 0),
+        "records_upserted": upserted,
+        "duration_seconds": result.get("duration_seconds"),
+    }
+    if result.get("status") != "completed":
+        # Batches before the failure are committed; report how far we got
+        raise HTTPException(422, {**progress, "error": result.get("error")})
+    return progress
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db import get_session
+from app.ingestion.jobs import JOB_KINDS, job_runner
+from app.models import ETLRun
+from app.schemas.etl_run import ETLRuns
+
+router = APIRouter()
+
+@router.post("/runs", status_code=202)
+async def submit_run(
+    kind: str = Query("incremental", description=f"One of: {', '.join(JOB_KINDS)}"),
+    limit: int | None = Query(None, ge=1, description="Max records per ingestor"),
+):
+    """Queue an ETL run; an identical queued or running job is reused instead."""
+    params = {"limit": limit} if limit is not None else {}
+    try:
+        run_id, deduplicated = await job_runner.submit(kind, **params)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    return {"run_id": run_id, "kind": kind, "deduplicated": deduplicated, "status_url": f"/etl/runs/{run_id}"}
+
+@router.get("/runs", response_model=list[ETLRuns])
+async def list_runs(
+    limit: int = Query(20, ge=1, le=200),
+    session: AsyncSession = Depends(get_session)
+):
+    result = await session.execute(select(ETLRun).order_by(ETLRun.id.desc()).limit(limit))
+    return result.scalars().all()
+
+@router.get("/runs/{run_id}", response_model=ETLRuns)
+async def get_run(run_id: int, session: AsyncSession = Depends(get_session)):
+    """Poll a run: pending -> running -> completed / failed / cancelled."""
+    run = await session.get(ETLRun, run_id)
+    if run is None:
+        raise HTTPException(404, f"ETL run {run_id} not found")
+    return run
+
+@router.delete("/runs/{run_id}", status_code=202)
+async def cancel_run(run_id: int):
+    if not await job_runner.cancel(run_id):
+        raise HTTPException(409, f"ETL run {run_id} is not queued or running")
+    return {"run_id": run_id, "cancelled": True}
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.db import get_session
+from app.core.cache import cache_stats
+from app.core.db import db, get_read_session
 from app.services.stats_service import StatsService
 
 router = APIRouter()
 
 @router.get("/")
-async def health_check(session: AsyncSession = Depends(get_session)):
+async def health_check(session: AsyncSession = Depends(get_read_session)):
     stats = await StatsService.get_stats(session)
     return {
         "status": "healthy",
         "service": "kasparro-crypto-backend",
-        "stats": stats
+        "stats": stats,
+        "cache": cache_stats(),
+        "database": db.pool_status()
     }
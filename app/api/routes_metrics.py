@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import registry
+
+router = APIRouter()
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latencies, throughput, DB round-trips and cache hit ratios for Prometheus to scrape."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
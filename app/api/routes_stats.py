@@ -1,16 +1,56 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.db import get_session
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.responses import NDJSON_MEDIA_TYPE, json_response, ndjson_response
+from app.core.config import settings
+from app.core.db import get_read_session, get_read_session_factory
+from app.core.serialization import dumps_rows
 from app.services.stats_service import StatsService
-from app.services.coin_service import CoinService
+from app.services.coin_service import COIN_FIELDS, CoinService
 from app.schemas.coin_normalized import CoinNormalized
 
 router = APIRouter()
 
 @router.get("/stats")
-async def get_stats(session: AsyncSession = Depends(get_session)):
+async def get_stats(session: AsyncSession = Depends(get_read_session)):
     return await StatsService.get_stats(session)
 
 @router.get("/coins", response_model=list[CoinNormalized])
-async def list_coins(limit: int = 50, session: AsyncSession = Depends(get_session)):
-    return await CoinService.get_normalized_coins(session, limit)
+async def list_coins(
+    request: Request,
+    limit: int = Query(50, ge=1, le=settings.coin_stream_max_limit,
+                       description=f"Up to {settings.coin_page_max_limit} unless format=ndjson"),
+    cursor: str | None = Query(None, description="`X-Next-Cursor` from the previous page"),
+    source: str | None = None,
+    symbol: str | None = None,
+    include_total: bool = Query(False, description="Exact COUNT(*) instead of an estimate"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams one coin per line"),
+    session: AsyncSession = Depends(get_read_session),
+    session_factory: async_sessionmaker = Depends(get_read_session_factory)
+):
+    """
+    Newest coins first. Paging cursor and totals are returned in headers.
+
+    Rows are encoded straight from the selected columns. Bodies are gzip or
+    brotli compressed when the client accepts it. NDJSON (also chosen by
+    `Accept: application/x-ndjson`) streams large limits without building
+    the whole response; it carries no paging or total headers.
+    """
+    try:
+        if format == "ndjson" or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            chunks = await CoinService.stream_coins(session_factory, limit, source=source, symbol=symbol, cursor=cursor)
+            return ndjson_response(chunks, request)
+        if limit > settings.coin_page_max_limit:
+            raise HTTPException(422, f"limit above {settings.coin_page_max_limit} requires format=ndjson")
+        page = await CoinService.get_normalized_coins(
+            session, limit, source=source, symbol=symbol, cursor=cursor, include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    headers = {
+        "X-Total-Count": str(page.total),
+        "X-Total-Exact": "true" if page.total_is_exact else "false",
+    }
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    return json_response(dumps_rows(COIN_FIELDS, page.items), request, headers)
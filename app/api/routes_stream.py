@@ -0,0 +1,94 @@
+import asyncio
+from typing import Iterable, Optional, Set, Union
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.core.broadcast import TooManySubscribers, normalize_symbols, price_broadcaster
+from app.core.config import settings
+from app.core.serialization import dumps, loads
+
+router = APIRouter()
+
+SYMBOLS_DESCRIPTION = "Comma-separated symbols to receive (e.g. BTC,ETH); all coins when omitted"
+
+
+def parse_symbols(symbols: Union[str, Iterable[str], None]) -> Optional[Set[str]]:
+    """
+    Raises:
+        ValueError: more than settings.stream_max_symbols symbols
+    """
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    parsed = normalize_symbols(symbols)
+    if parsed and len(parsed) > settings.stream_max_symbols:
+        raise ValueError(f"At most {settings.stream_max_symbols} symbols per subscription")
+    return parsed
+
+
+@router.websocket("/ws/prices")
+async def ws_prices(websocket: WebSocket, symbols: Optional[str] = Query(None, description=SYMBOLS_DESCRIPTION)):
+    """
+    Live price diffs: one JSON message per committed ETL batch with the
+    coins it changed. Send {"symbols": [...]} to change the filter.
+    """
+    try:
+        subscription = price_broadcaster.subscribe(parse_symbols(symbols))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    except TooManySubscribers:
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+
+    async def receive() -> None:
+        try:
+            while True:
+                try:
+                    request = loads(await websocket.receive_text())
+                    subscription.symbols = parse_symbols(request["symbols"])
+                except (ValueError, KeyError, TypeError) as e:
+                    await websocket.send_text(dumps({"type": "error", "detail": f"Bad subscription update: {e}"}).decode())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            # Wakes the send loop below, which may be idle on a quiet filter
+            subscription.close()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        async for message in subscription.messages():
+            if message is None:  # only heartbeats are None, and none were asked for
+                continue
+            await websocket.send_text(message.decode())
+    finally:
+        price_broadcaster.unsubscribe(subscription)
+        receiver.cancel()
+    if subscription.dropped:
+        await websocket.close(code=1008, reason="slow consumer")
+
+
+@router.get("/sse/prices")
+async def sse_prices(symbols: Optional[str] = Query(None, description=SYMBOLS_DESCRIPTION)):
+    """Live price diffs as Server-Sent Events; the same messages as /ws/prices."""
+    try:
+        subscription = price_broadcaster.subscribe(parse_symbols(symbols))
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    except TooManySubscribers as e:
+        raise HTTPException(503, str(e))
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            async for message in subscription.messages(heartbeat=settings.stream_heartbeat_seconds):
+                # Comment lines keep proxies from timing out an idle stream
+                yield b"data: " + message + b"\n\n" if message is not None else b": keep-alive\n\n"
+        finally:
+            price_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
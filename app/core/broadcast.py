@@ -0,0 +1,163 @@
+"""In-process pub/sub: committed price changes fanned out to live subscribers."""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set
+from app.core.config import settings
+from app.core.metrics import STREAM_DROPPED, STREAM_MESSAGES
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Fields of each coin in a message, when present among the published row's fields
+MESSAGE_FIELDS = ("coin_id", "symbol", "name", "price_usd", "market_cap_usd", "volume_24h_usd", "source")
+
+# Last message a dropped subscriber receives
+DROPPED = dumps({"type": "dropped", "reason": "slow consumer"})
+# Ends a closed subscription's stream without being yielded
+_CLOSED = object()
+
+
+class TooManySubscribers(Exception):
+    """settings.stream_max_subscribers are already connected."""
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue of encoded messages.
+
+    `symbols` (upper case) filters the coins it receives; None means all.
+    """
+
+    def __init__(self, symbols: Optional[Set[str]], maxsize: int):
+        self.symbols = symbols
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.dropped = False
+        self.closed = False
+
+    def offer(self, message: bytes) -> bool:
+        """Queue without waiting; on overflow, replace the backlog with DROPPED."""
+        if self.dropped or self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self._end(DROPPED)
+            self.dropped = True
+            return False
+
+    def close(self) -> None:
+        """End `messages` now, e.g. because the client disconnected."""
+        if not self.closed:
+            self._end(_CLOSED)
+            self.closed = True
+
+    def _end(self, last) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(last)
+
+    async def messages(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[bytes]]:
+        """
+        Messages as they are published, ending after DROPPED or on `close`.
+
+        With `heartbeat`, yields None after that many idle seconds so the
+        caller can keep the connection alive or notice it has gone.
+        """
+        while True:
+            try:
+                message = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if message is _CLOSED:
+                return
+            yield message
+            if message is DROPPED:
+                return
+
+
+class PriceBroadcaster:
+    """
+    Fan-out of the ETL delta stream to WebSocket/SSE subscribers.
+
+    The pipeline `publish`es each batch right after committing it. Publishing
+    never waits on a subscriber: each has a queue of settings.stream_queue_size
+    messages, and one that falls that far behind is dropped (it gets DROPPED
+    and its stream ends) instead of holding back the writer or buffering
+    without bound. Each coin is encoded once per publish, however many
+    subscribers receive it.
+
+    Only subscribers connected to this process are reached.
+    """
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        Raises:
+            TooManySubscribers: when settings.stream_max_subscribers are connected
+        """
+        if len(self._subscriptions) >= settings.stream_max_subscribers:
+            raise TooManySubscribers(f"{len(self._subscriptions)} live subscribers already connected")
+        subscription = Subscription(normalize_symbols(symbols), settings.stream_queue_size)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, fields: Sequence[str], rows: Sequence[Sequence]) -> int:
+        """
+        Send changed coins (row tuples in `fields` order) to every subscriber
+        whose filter they pass.
+
+        Returns:
+            Number of subscribers a message was queued to
+        """
+        if not self._subscriptions or not rows:
+            return 0
+        positions = [(name, fields.index(name)) for name in MESSAGE_FIELDS if name in fields]
+        symbol_at = fields.index("symbol")
+        encoded = [dumps({name: row[i] for name, i in positions}) for row in rows]
+        by_symbol: Dict[str, List[bytes]] = defaultdict(list)
+        for row, coin in zip(rows, encoded):
+            by_symbol[(row[symbol_at] or "").upper()].append(coin)
+        prefix = b'{"type":"prices","ts":' + dumps(round(time.time(), 3)) + b',"coins":['
+        everything = prefix + b",".join(encoded) + b"]}"
+
+        delivered = 0
+        for subscription in list(self._subscriptions):
+            if subscription.symbols is None:
+                message = everything
+            else:
+                coins = [coin for symbol in subscription.symbols for coin in by_symbol.get(symbol, ())]
+                if not coins:
+                    continue
+                message = prefix + b",".join(coins) + b"]}"
+            if subscription.offer(message):
+                delivered += 1
+            elif subscription.dropped and subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                STREAM_DROPPED.inc()
+                logger.warning("🐢 Dropped a live price subscriber that fell behind")
+        STREAM_MESSAGES.inc(delivered)
+        return delivered
+
+
+def normalize_symbols(symbols: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """Upper-cased symbol filter; None or empty means every symbol."""
+    if symbols is None:
+        return None
+    cleaned = {symbol.strip().upper() for symbol in symbols if symbol and symbol.strip()}
+    return cleaned or None
+
+
+price_broadcaster = PriceBroadcaster()
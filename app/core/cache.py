@@ -0,0 +1,142 @@
+"""In-process TTL + LRU read cache, invalidated by a global data version."""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+
+_MISSING = object()
+
+# Bumped whenever the underlying data changes (end of an ETL run); entries
+# written under an older version are treated as misses.
+_data_version = 0
+
+caches: Dict[str, "TTLCache"] = {}
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def bump_version() -> int:
+    """Invalidate every cache at once; stale entries are dropped lazily."""
+    global _data_version
+    _data_version += 1
+    return _data_version
+
+
+class TTLCache:
+    """Bounded LRU map whose entries expire after `ttl` seconds or on a version bump."""
+
+    def __init__(self, name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        self.name = name
+        self.maxsize = max(1, maxsize or settings.cache_max_entries)
+        self.ttl = settings.cache_ttl_seconds if ttl is None else ttl
+        self._data: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            version, expires_at, value = entry
+            if version == _data_version and expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.expirations += 1
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (_data_version, time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value or await `loader` once per key: concurrent
+        misses share the same in-flight load instead of stampeding the DB.
+
+        If the request running the load is cancelled (e.g. its client went
+        away), the requests waiting on it run the load themselves instead.
+        """
+        while True:
+            value = self.get(key)
+            if value is not _MISSING:
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this waiter was cancelled, not the load
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        version = _data_version
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        # Do not cache a result computed across an invalidation
+        if version == _data_version and settings.cache_enabled:
+            self.set(key, value)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def cached(cache: TTLCache) -> Callable:
+    """
+    Cache an async `fn(session, *args, **kwargs)` keyed on everything but the session.
+    """
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(session, *args, **kwargs):
+            if not settings.cache_enabled:
+                return await fn(session, *args, **kwargs)
+            key = (fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_load(key, lambda: fn(session, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {"version": _data_version, **{name: cache.stats() for name, cache in caches.items()}}
@@ -8,14 +8,139 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite+aiosqlite:///./app.db"
     echo_db_queries: bool = False
+    # API reads go to a separate pool: on this URL (e.g. a replica) when
+    # set, otherwise on database_url, so ETL writes never starve them
+    database_read_url: Optional[str] = None
+    # Connection pools (per worker process); the write side serves the ETL and job control
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_read_pool_size: int = 10
+    db_read_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statements cached per connection; 0 behind pgbouncer in transaction mode
+    db_statement_cache_size: int = 500
+    # SQLite: how long a writer waits for the file lock, memory-mapped I/O and page cache sizes
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
     
     # APIs
     coingecko_api_url: str = "https://api.coingecko.com/api/v3"
     coinpaprika_api_url: str = "https://api.coinpaprika.com/v1"
+
+    coingecko_page_size: int = 250
+    coinpaprika_page_size: int = 100000
+    api_max_in_flight_pages: int = 4
+
+    # Upstream HTTP client
+    http_timeout_seconds: float = 10.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_max_retries: int = 3
+    http_backoff_base_seconds: float = 0.5
+    http_default_rate_per_second: float = 5.0
+    # Requests per second per upstream host (public-tier limits)
+    http_rate_limits: dict[str, float] = {
+        "api.coingecko.com": 0.5,
+        "api.coinpaprika.com": 10.0,
+    }
     
     # Limits
     max_csv_rows: int = 10000
     max_ingestion_batch: int = 1000
+    db_write_batch_size: int = 1000
+
+    # API
+    count_cache_ttl_seconds: float = 60.0
+    # Coin listings: JSON pages up to coin_page_max_limit rows, larger
+    # limits only as an NDJSON stream read coin_stream_chunk_rows at a time
+    coin_page_max_limit: int = 1000
+    coin_stream_max_limit: int = 1_000_000
+    coin_stream_chunk_rows: int = 1000
+    # Compress bodies of at least this size when the client accepts gzip or br
+    response_compress_min_bytes: int = 1024
+    response_gzip_level: int = 5
+    response_brotli_quality: int = 4
+    # Read cache in front of the services; ETL runs invalidate it on completion
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 300.0
+    cache_max_entries: int = 1024
+    # Coin search: in-memory prefix + trigram index, refreshed after each ETL
+    # run; disabled, searches fall back to SQL (pg_trgm similarity when enabled)
+    search_index_enabled: bool = True
+    search_max_results: int = 50
+    # Prefix matches examined before ranking, and fuzzy candidates edit-distance checked
+    search_prefix_scan: int = 2000
+    search_fuzzy_candidates: int = 100
+    search_db_trigram: bool = False
+    # Live prices (/ws/prices, /sse/prices): messages buffered per subscriber
+    # before it is dropped as a slow consumer, subscriber cap, SSE keep-alive
+    stream_queue_size: int = 64
+    stream_max_subscribers: int = 1000
+    stream_max_symbols: int = 200
+    stream_heartbeat_seconds: float = 15.0
+    # Price history: most OHLC buckets one query may return, default range
+    history_max_points: int = 1000
+    history_default_days: int = 30
+    # Leaderboard size in the stats snapshot, plus spare candidates kept so
+    # most updates never need a recompute
+    stats_top_n: int = 10
+    stats_top_buffer: int = 10
+
+    # Ingestion
+    csv_source_path: str = "data/coins_source.csv"
+    ingestor_timeout_seconds: float = 30.0
+    ingestor_max_concurrency: int = 4
+    checkpoint_file: str = "data/checkpoints.json"
+    # Batches buffered between the fetchers and the single DB writer
+    pipeline_queue_batches: int = 8
+    # CPU-heavy stages (CSV parsing, normalization) run off the event loop:
+    # "process" (a pool of cpu_workers processes, 0 = one per core), "thread"
+    # or "inline". Only batches under cpu_offload_min_rows (a short last page
+    # or chunk) are normalized inline; a full coingecko page or CSV chunk is
+    # offloaded
+    cpu_executor: str = "process"
+    cpu_workers: int = 0
+    cpu_offload_min_rows: int = 100
+    # Batches under this many rows are normalized in plain Python; pandas
+    # only pays for its setup on larger ones
+    normalize_vectorize_min_rows: int = 50_000
+    # Background ETL jobs; an interval of 0 disables that schedule
+    etl_run_on_startup: bool = True
+    etl_startup_limit: int = 50
+    etl_incremental_interval_seconds: float = 900.0
+    etl_full_reload_interval_seconds: float = 86400.0
+    etl_max_concurrent_jobs: int = 1
+    # Cross-worker coordination: how long a run waits for another worker's
+    # run, how often followers retry leadership and re-check the snapshot
+    etl_lock_timeout_seconds: float = 3600.0
+    etl_leader_retry_seconds: float = 30.0
+    cache_sync_interval_seconds: float = 5.0
+    # flock() files, used when the database has no advisory locks (SQLite)
+    lock_dir: str = "data/locks"
+    # Streaming CSV uploads
+    upload_max_rows: int = 50_000_000
+    upload_timeout_seconds: float = 3600.0
+    # How long an upload waits for another run to finish before a 503 with
+    # this Retry-After
+    upload_lock_wait_seconds: float = 2.0
+    upload_retry_after_seconds: int = 30
+    # Longest single CSV record accepted before the upload is rejected
+    upload_max_record_bytes: int = 1 << 20
+    # Logging: sinks write from a background thread; set log_json for JSON
+    # lines on stdout too (the file sink is always JSON)
+    log_level: str = "INFO"
+    log_file_level: str = "DEBUG"
+    log_dir: str = "logs"
+    log_json: bool = False
+    # Hot-path records (extra={"hot": True}, or from these loggers) are kept
+    # 1 in N per call site at these levels; WARNING and above are never sampled
+    log_hot_loggers: list[str] = ["uvicorn.access"]
+    log_sample_every: dict[str, int] = {"DEBUG": 100, "INFO": 10}
+    # Dedup tie-break between sources (earlier wins); unknown sources rank last
+    source_priority: list[str] = ["coingecko", "coinpaprika", "csv"]
 
     class Config:
         env_file = ".env"
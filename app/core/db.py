@@ -1,24 +1,173 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
-    __abstract__ = True
-    metadata = None
+    pass
+
+
+def normalize_database_url(url: str) -> str:
+    """
+    Use the async driver for each backend: asyncpg for Postgres (including the
+    `postgres://` URLs hosting providers hand out), aiosqlite for SQLite.
+    """
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://", "postgresql+psycopg://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def engine_options(url: str, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> Dict[str, Any]:
+    """create_async_engine keyword arguments for this backend (write pool sizes by default)."""
+    options: Dict[str, Any] = {"echo": settings.echo_db_queries}
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        # One shared connection, or every checkout would see a different empty database
+        options.update(poolclass=StaticPool, connect_args={"check_same_thread": False})
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size if pool_size is None else pool_size,
+        max_overflow=settings.db_max_overflow if max_overflow is None else max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if url.startswith("sqlite"):
+        # SQLAlchemy defaults aiosqlite file databases to NullPool, which rejects the sizing arguments
+        options["poolclass"] = AsyncAdaptedQueuePool
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {
+            # SQLAlchemy's per-connection cache, and asyncpg's own
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    WAL lets readers run alongside the single writer instead of queueing on the
+    file lock; synchronous=NORMAL is durable across application crashes in WAL
+    mode and skips an fsync per commit.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _sqlite_query_only(dbapi_connection, connection_record) -> None:
+    """Read-pool connections refuse writes, so nothing slips past the write side."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _create_engine(url: str, read_only: bool = False, **pool: Any):
+    engine = create_async_engine(url, **engine_options(url, **pool))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        if read_only:
+            event.listen(engine.sync_engine, "connect", _sqlite_query_only)
+    instrument_engine(engine)
+    return engine
+
+
+def _pool_status(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
 
 class Database:
-    def __init__(self):
-        self.engine = create_async_engine(
-            settings.database_url,
-            echo=settings.echo_db_queries,
-            future=True
-        )
+    """
+    Two engines: `engine` for the ETL and job control (writes), `read_engine`
+    for API reads. The read side has its own pool, on database_read_url when
+    set (e.g. a replica) and on the same database otherwise.
+    """
+
+    def __init__(self, url: Optional[str] = None, read_url: Optional[str] = None):
+        self.url = normalize_database_url(url or settings.database_url)
+        self.read_url = normalize_database_url(read_url or settings.database_read_url or self.url)
+        self.engine = _create_engine(self.url)
+        if self.read_url == self.url and self.url.startswith("sqlite") and _is_memory_sqlite(self.url):
+            # A second pool would open a second, empty in-memory database
+            self.read_engine = self.engine
+        else:
+            self.read_engine = _create_engine(
+                self.read_url,
+                read_only=True,
+                pool_size=settings.db_read_pool_size,
+                max_overflow=settings.db_read_max_overflow,
+            )
         self.session_factory = async_sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
+        self.read_session_factory = async_sessionmaker(
+            self.read_engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    async def init_db(self) -> None:
+        """Create missing tables (first connection also applies the SQLite pragmas)."""
+        import app.models  # noqa: F401  (registers tables on Base.metadata)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info(f"🗄️ {self.engine.dialect.name} ready, pool: {self.pool_status()}")
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+        await self.engine.dispose()
+
+    def pool_status(self) -> Dict[str, Dict[str, Any]]:
+        """Occupancy of the write and read pools, for /health and /metrics."""
+        return {"write": _pool_status(self.engine), "read": _pool_status(self.read_engine)}
 
 db = Database()
 
-async def get_session() -> AsyncSession:
+async def get_write_session() -> AsyncIterator[AsyncSession]:
     async with db.session_factory() as session:
         yield session
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """API reads: a separate pool, so ETL writes and reloads never hold up listings."""
+    async with db.read_session_factory() as session:
+        yield session
+
+# Routes that write (uploads, job control) keep using get_session
+get_session = get_write_session
+
+def get_read_session_factory() -> async_sessionmaker:
+    """For responses that read after the request's session is gone (streaming bodies)."""
+    return db.read_session_factory
@@ -0,0 +1,91 @@
+"""Executors that keep CPU-heavy ingestion work off the event loop thread."""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EXECUTOR_KINDS = ("process", "thread", "inline")
+
+_cpu_pool: Optional[Executor] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _workers() -> int:
+    return settings.cpu_workers or os.cpu_count() or 1
+
+
+def cpu_pool() -> Optional[Executor]:
+    """The settings.cpu_executor pool, created on first use; None when inline."""
+    global _cpu_pool
+    kind = settings.cpu_executor
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"cpu_executor must be one of {', '.join(EXECUTOR_KINDS)}, not {kind!r}")
+    if kind == "inline":
+        return None
+    if _cpu_pool is None:
+        if kind == "process":
+            # Forking a process that already runs threads (DB driver, log sink) is unsafe
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _cpu_pool = ProcessPoolExecutor(max_workers=_workers(), mp_context=multiprocessing.get_context(method))
+        else:
+            _cpu_pool = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="cpu")
+        logger.info(f"⚙️  CPU executor: {kind} pool of {_workers()} workers")
+    return _cpu_pool
+
+
+def thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="blocking")
+    return _thread_pool
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, rows: Optional[int] = None) -> T:
+    """
+    Run a pure function in the CPU pool and await its result.
+
+    With a process pool, `fn` must be a module-level function and `args`
+    and the result picklable; plain lists and tuples pickle fastest.
+
+    Args:
+        fn: Function to call
+        args: Its arguments
+        rows: Size of the job; under settings.cpu_offload_min_rows it runs inline
+    """
+    if rows is not None and rows < settings.cpu_offload_min_rows:
+        return fn(*args)
+    pool = cpu_pool()
+    if pool is None:
+        return fn(*args)
+    global _cpu_pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+        _cpu_pool = None
+        raise
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking or stateful call (e.g. advancing a CSV reader) on a worker thread."""
+    if settings.cpu_executor == "inline":
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(thread_pool(), partial(fn, *args))
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    global _cpu_pool, _thread_pool
+    for pool in (_cpu_pool, _thread_pool):
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+    _cpu_pool = None
+    _thread_pool = None
@@ -0,0 +1,203 @@
+"""Shared, pooled HTTP client for upstream API ingestors."""
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Longest upstream Retry-After honoured, in multiples of the request timeout
+RETRY_AFTER_MAX_TIMEOUTS = 3
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class HttpResult:
+    """Response body plus whether the upstream reported it unchanged (304)."""
+    status_code: int
+    content: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+
+
+@dataclass
+class _Validators:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class HttpClient:
+    """
+    One keep-alive (HTTP/2 when `h2` is installed) connection pool shared by all ingestors.
+
+    Adds a per-host token-bucket rate limiter, jittered exponential backoff on
+    transport errors and 429/5xx, and ETag/If-Modified-Since revalidation so an
+    unchanged upstream payload comes back as `not_modified` without a body.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rate: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        timeout: Optional[float] = None,
+        cache_size: int = 1024
+    ):
+        self._transport = transport
+        self._rate_limits = dict(settings.http_rate_limits if rate_limits is None else rate_limits)
+        self._default_rate = settings.http_default_rate_per_second if default_rate is None else default_rate
+        self.max_retries = settings.http_max_retries if max_retries is None else max_retries
+        self.backoff_base = settings.http_backoff_base_seconds if backoff_base is None else backoff_base
+        self._timeout = settings.http_timeout_seconds if timeout is None else timeout
+        self._cache_size = cache_size
+        self._client: Optional[httpx.AsyncClient] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._validators: "OrderedDict[Tuple[str, Tuple], _Validators]" = OrderedDict()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Created lazily so the pool binds to the running event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                transport=self._transport,
+                timeout=self._timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                ),
+                headers={"User-Agent": f"kasparro-backend/{settings.version}"},
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        rate = self._rate_limits.get(host, self._default_rate)
+        if not rate or rate <= 0:
+            return None
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(rate)
+        return self._buckets[host]
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """
+        Full-jitter exponential backoff, stretched to the upstream's Retry-After
+        when it sends one. Retry-After is capped so a bogus header cannot stall
+        an ingestor past its timeout.
+        """
+        backoff = random.uniform(0, self.backoff_base * (2 ** attempt))
+        if response is None or "retry-after" not in response.headers:
+            return backoff
+        value = response.headers["retry-after"]
+        try:
+            retry_after = float(value)
+        except ValueError:
+            try:
+                retry_after = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return backoff
+        return max(backoff, min(max(0.0, retry_after), self._timeout * RETRY_AFTER_MAX_TIMEOUTS))
+
+    def _remember(self, key: Tuple[str, Tuple], response: httpx.Response) -> None:
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not etag and not last_modified:
+            self._validators.pop(key, None)
+            return
+        self._validators[key] = _Validators(etag, last_modified)
+        self._validators.move_to_end(key)
+        while len(self._validators) > self._cache_size:
+            self._validators.popitem(last=False)
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        conditional: bool = True
+    ) -> HttpResult:
+        """
+        GET with rate limiting, retries and conditional revalidation.
+
+        Raises:
+            httpx.HTTPStatusError: non-2xx/304 response after retries are exhausted
+            httpx.TransportError: connection failures after retries are exhausted
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        headers: Dict[str, str] = {}
+        validators = self._validators.get(key) if conditional else None
+        if validators:
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+
+        bucket = self._bucket(urlsplit(url).hostname or "")
+        attempt = 0
+        while True:
+            if bucket:
+                await bucket.acquire()
+            response: Optional[httpx.Response] = None
+            try:
+                response = await self.client.get(url, params=params, headers=headers)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                error: Exception = httpx.HTTPStatusError(
+                    f"{response.status_code} from {url}", request=response.request, response=response
+                )
+            except httpx.TransportError as e:
+                error = e
+            if attempt >= self.max_retries:
+                if response is not None:
+                    response.raise_for_status()
+                raise error
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            logger.warning(f"🔁 Retrying {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries}): {error}")
+            await asyncio.sleep(delay)
+
+        if response.status_code == 304:
+            return HttpResult(304, headers=dict(response.headers), not_modified=True)
+        response.raise_for_status()
+        if conditional:
+            self._remember(key, response)
+        return HttpResult(response.status_code, response.content, dict(response.headers))
+
+
+http_client = HttpClient()
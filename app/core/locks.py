@@ -0,0 +1,153 @@
+"""Named cross-process locks: Postgres advisory locks, or flock files for SQLite."""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeout(TimeoutError):
+    """The lock stayed held by another process for longer than the timeout."""
+
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock (hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class NamedLock:
+    """
+    Base for cross-process locks.
+
+    `try_acquire` never blocks. `acquire` polls it until `timeout`, and
+    `async with` does the same but raises LockTimeout on failure. A lock
+    object is held at most once; create one per holder.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = None, poll_interval: float = 0.5):
+        self.name = name
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.held = False
+
+    async def try_acquire(self) -> bool:
+        raise NotImplementedError
+
+    async def release(self) -> None:
+        raise NotImplementedError
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while not await self.try_acquire():
+            if deadline is not None and loop.time() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
+        return True
+
+    async def __aenter__(self) -> "NamedLock":
+        if not await self.acquire(self.timeout):
+            raise LockTimeout(f"lock {self.name!r} still held elsewhere after {self.timeout}s")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.release()
+
+
+class PostgresAdvisoryLock(NamedLock):
+    """
+    Session-level pg_try_advisory_lock held on a dedicated connection.
+
+    Postgres drops the lock if the holder's connection dies, so a crashed
+    worker never leaves it stuck.
+    """
+
+    def __init__(self, name: str, engine: AsyncEngine, **kwargs):
+        super().__init__(name, **kwargs)
+        self.engine = engine
+        self.key = lock_key(name)
+        self._conn: Optional[AsyncConnection] = None
+
+    async def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        conn = await self.engine.connect()
+        try:
+            acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})).scalar()
+            # Don't leave an open transaction idling for the life of the lock
+            await conn.commit()
+        except BaseException:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._conn = conn
+        self.held = True
+        return True
+
+    async def release(self) -> None:
+        conn, self._conn, self.held = self._conn, None, False
+        if conn is None:
+            return
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            await conn.commit()
+        except Exception as e:
+            # Never hand a connection that may still hold the lock back to the pool
+            logger.warning(f"⚠️ Could not unlock {self.name!r} ({e}); discarding its connection")
+            await conn.invalidate()
+        finally:
+            await conn.close()
+
+
+class FileLock(NamedLock):
+    """flock() on `<directory>/<name>.lock`; released by the OS if the process dies."""
+
+    def __init__(self, name: str, directory: Optional[str] = None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = Path(directory or settings.lock_dir) / f"{name}.lock"
+        self._fd: Optional[int] = None
+
+    async def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # Holder's pid, for whoever is debugging a stuck pipeline
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self.held = True
+        return True
+
+    async def release(self) -> None:
+        fd, self._fd, self.held = self._fd, None, False
+        if fd is None:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+def named_lock(name: str, engine: Optional[AsyncEngine] = None, **kwargs) -> NamedLock:
+    """Advisory lock on Postgres; a host-local file lock for SQLite and anything else."""
+    if engine is None:
+        from app.core.db import db
+        engine = db.engine
+    if engine.dialect.name == "postgresql":
+        return PostgresAdvisoryLock(name, engine, **kwargs)
+    return FileLock(name, **kwargs)
@@ -1,40 +1,133 @@
+"""
+Loguru setup: every sink is fed through a queue by a background thread, so
+a slow terminal or disk never blocks the event loop. Standard-library
+loggers (the app's own and uvicorn's) are routed into loguru.
+"""
+import inspect
 import logging
 import sys
-from loguru import logger
+import threading
+from collections import Counter
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Union
+from loguru import logger
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from loguru import Record
+
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+_configured = False
+_lock = threading.Lock()
+
+
+class SamplingFilter:
+    """
+    Keep 1 in N hot-path records per call site and level.
+
+    The first record from a call site always passes, so a new kind of
+    message is never hidden. Records that are not hot pass untouched.
+    """
+
+    def __init__(self, every: Optional[Dict[str, int]] = None):
+        self.every = {level.upper(): max(1, n) for level, n in (every or {}).items()}
+        self._seen: Counter = Counter()
+
+    def __call__(self, record: "Record") -> bool:
+        if not record["extra"].get("hot"):
+            return True
+        every = self.every.get(record["level"].name, 1)
+        if every == 1:
+            return True
+        site = (record["name"], record["function"], record["line"], record["level"].name)
+        # Counter updates race harmlessly across threads; sampling is approximate anyway
+        seen = self._seen[site]
+        self._seen[site] = seen + 1
+        return seen % every == 0
+
+
+class InterceptHandler(logging.Handler):
+    """Forward standard-library records to loguru, keeping the caller's module, function and line."""
+
+    def __init__(self, hot_loggers=()):
+        super().__init__()
+        self.hot_loggers = frozenset(hot_loggers)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        level: Union[str, int]
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # Walk out of the logging module to the frame that made the call
+        frame, depth = inspect.currentframe(), 0
+        while frame is not None and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+
+        hot = getattr(record, "hot", False) or record.name in self.hot_loggers
+        logger.bind(logger_name=record.name, hot=hot).opt(depth=depth, exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+
+def setup_logging(force: bool = False) -> None:
+    """
+    Install the console and file sinks. Safe to call more than once: only
+    the first call (or one with force=True) configures anything.
+    """
+    global _configured
+    with _lock:
+        if _configured and not force:
+            return
+        logger.remove()
+
+        logger.add(
+            sys.stdout,
+            format=CONSOLE_FORMAT,
+            level=settings.log_level,
+            serialize=settings.log_json,
+            # One filter per sink: loguru calls it once per sink, and a shared
+            # counter would advance once for each
+            filter=SamplingFilter(settings.log_sample_every),
+            enqueue=True,
+            # diagnose renders local variables into tracebacks: slow, and leaks values into logs
+            backtrace=False,
+            diagnose=False,
+        )
+
+        log_path = Path(settings.log_dir)
+        log_path.mkdir(parents=True, exist_ok=True)
+        logger.add(
+            log_path / "app.log",
+            rotation="10 MB",
+            retention="7 days",
+            level=settings.log_file_level,
+            serialize=True,
+            filter=SamplingFilter(settings.log_sample_every),
+            enqueue=True,
+            backtrace=False,
+            diagnose=False,
+        )
+
+        # Third-party libraries stay at INFO: aiosqlite, asyncio and httpx debug
+        # records would each pay for the intercept on the hot path. Only the
+        # app's own loggers go down to the lowest level any sink wants.
+        logging.basicConfig(handlers=[InterceptHandler(settings.log_hot_loggers)], level=logging.INFO, force=True)
+        app_level = min(logger.level(settings.log_level).no, logger.level(settings.log_file_level).no)
+        logging.getLogger("app").setLevel(app_level)
+        for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers = []
+            uvicorn_logger.propagate = True
+        _configured = True
+
 
-def setup_logging():
-    # Remove default loguru sink
-    logger.remove()
-    
-    # Console sink
-    logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO",
-        backtrace=True,
-        diagnose=True
-    )
-    
-    # File sink
-    log_path = Path("logs")
-    log_path.mkdir(exist_ok=True)
-    
-    logger.add(
-        log_path / "app.log",
-        rotation="10 MB",
-        retention="7 days",
-        level="DEBUG",
-        backtrace=True,
-        diagnose=True
-    )
-    
-    # Replace logging with loguru
-    class LoguruHandler(logging.Handler):
-        def emit(self, record):
-            logger.log(record.levelno, record.getMessage())
-    
-    handler = LoguruHandler()
-    logging.basicConfig(handlers=[handler], level=logging.INFO)
-    
-setup_logging()
+async def shutdown_logging() -> None:
+    """Wait for queued records to be written."""
+    await logger.complete()
@@ -0,0 +1,281 @@
+"""Minimal Prometheus-format metrics plus per-run stage timings for the ETL pipeline."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {count}"
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    """Metrics plus collectors: callables producing exposition lines at scrape time."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[str]]) -> Callable[[], Iterable[str]]:
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "etl_stage_seconds", "Time spent per pipeline stage and source", ("stage", "source")
+)
+STAGE_ROWS = registry.counter("etl_stage_rows_total", "Rows handled per pipeline stage and source", ("stage", "source"))
+SOURCE_ROWS_PER_SECOND = registry.gauge(
+    "etl_source_rows_per_second", "Raw rows per second of the last run, per source", ("source",)
+)
+RUNS = registry.counter("etl_runs_total", "Finished ETL runs by status", ("status",))
+RUN_SECONDS = registry.histogram(
+    "etl_run_seconds", "Wall-clock duration of ETL runs", (),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+DB_ROUNDTRIPS = registry.counter("db_roundtrips_total", "Statements sent to the database")
+DB_STATEMENT_SECONDS = registry.histogram("db_statement_seconds", "Database statement latency")
+STREAM_MESSAGES = registry.counter("stream_messages_total", "Price messages queued to live subscribers")
+STREAM_DROPPED = registry.counter("stream_dropped_subscribers_total", "Live subscribers dropped as slow consumers")
+
+
+@registry.collector
+def _cache_metrics() -> Iterable[str]:
+    from app.core.cache import caches
+    yield "# HELP cache_requests_total Read cache lookups by result"
+    yield "# TYPE cache_requests_total counter"
+    for name, cache in sorted(caches.items()):
+        yield f'cache_requests_total{{cache="{name}",result="hit"}} {cache.hits}'
+        yield f'cache_requests_total{{cache="{name}",result="miss"}} {cache.misses}'
+    yield "# HELP cache_hit_ratio Share of read cache lookups served from memory"
+    yield "# TYPE cache_hit_ratio gauge"
+    for name, cache in sorted(caches.items()):
+        yield f'cache_hit_ratio{{cache="{name}"}} {cache.stats()["hit_ratio"]}'
+    yield "# HELP cache_evictions_total Entries evicted by the LRU size bound"
+    yield "# TYPE cache_evictions_total counter"
+    for name, cache in sorted(caches.items()):
+        yield f'cache_evictions_total{{cache="{name}"}} {cache.evictions}'
+    yield "# HELP cache_entries Entries currently cached"
+    yield "# TYPE cache_entries gauge"
+    for name, cache in sorted(caches.items()):
+        yield f'cache_entries{{cache="{name}"}} {len(cache)}'
+
+
+@registry.collector
+def _pool_metrics() -> Iterable[str]:
+    from app.core.db import db
+    pools = {name: status for name, status in db.pool_status().items() if "size" in status}
+    yield "# HELP db_pool_connections Pooled database connections by pool and state"
+    yield "# TYPE db_pool_connections gauge"
+    for name, status in pools.items():
+        yield f'db_pool_connections{{pool="{name}",state="checked_out"}} {status["checked_out"]}'
+        yield f'db_pool_connections{{pool="{name}",state="checked_in"}} {status["checked_in"]}'
+    yield "# HELP db_pool_size Configured pool size"
+    yield "# TYPE db_pool_size gauge"
+    for name, status in pools.items():
+        yield f'db_pool_size{{pool="{name}"}} {status["size"]}'
+
+
+@registry.collector
+def _stream_metrics() -> Iterable[str]:
+    from app.core.broadcast import price_broadcaster
+    yield "# HELP stream_subscribers Connected live price subscribers"
+    yield "# TYPE stream_subscribers gauge"
+    yield f"stream_subscribers {len(price_broadcaster)}"
+
+
+class RunTimings:
+    """Per-run stage breakdown persisted on ETLRun.stage_timings."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.db_roundtrips = 0
+
+    def add(self, stage: str, seconds: float, rows: int = 0) -> None:
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0, "rows": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        entry["rows"] += rows
+
+    def as_dict(self) -> Dict[str, Any]:
+        stages = {
+            stage: {**entry, "seconds": round(entry["seconds"], 4)}
+            for stage, entry in self.stages.items()
+        }
+        # The stage with the most time is the first thing to look at
+        bottleneck = max(stages, key=lambda stage: stages[stage]["seconds"]) if stages else None
+        return {"stages": stages, "db_roundtrips": self.db_roundtrips, "bottleneck": bottleneck}
+
+
+current_run: ContextVar[Optional[RunTimings]] = ContextVar("current_run", default=None)
+current_source: ContextVar[str] = ContextVar("current_source", default="")
+
+
+@contextmanager
+def stage(name: str, source: Optional[str] = None, rows: int = 0) -> Iterator[Dict[str, int]]:
+    """
+    Time a pipeline stage into the histogram and the current run's breakdown.
+
+    Yields a dict whose "rows" may be set inside the block when the row
+    count is only known afterwards.
+    """
+    source = source if source is not None else current_source.get()
+    counted = {"rows": rows}
+    started = time.perf_counter()
+    try:
+        yield counted
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name, source=source)
+        if counted["rows"]:
+            STAGE_ROWS.inc(counted["rows"], stage=name, source=source)
+        timings = current_run.get()
+        if timings is not None:
+            timings.add(name, elapsed, counted["rows"])
+
+
+def instrument_engine(engine) -> None:
+    """Count statements (round-trips) and their latency for an Engine or AsyncEngine."""
+    from sqlalchemy import event
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("_statement_started")
+        if started:
+            DB_STATEMENT_SECONDS.observe(time.perf_counter() - started.pop())
+        DB_ROUNDTRIPS.inc()
+        timings = current_run.get()
+        if timings is not None:
+            timings.db_roundtrips += 1
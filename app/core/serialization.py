@@ -0,0 +1,37 @@
+"""JSON encode/decode, using orjson when it is installed."""
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode()
+
+
+def dumps_rows(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """JSON array of objects straight from row tuples; extra trailing columns are dropped."""
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+
+def dumps_ndjson(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """One JSON object per line, newline-terminated."""
+    return b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
@@ -1,14 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from app.schemas.coin_raw import CoinRaw
+from typing import AsyncIterator, Dict, Any, Optional
+from app.core.metrics import stage
+from app.ingestion.records import RawBatch, RawCoins
 
 class BaseIngestor(ABC):
+    # May skip data the upstream reports unchanged since the last run; a full
+    # reload turns this off, since it must see every record to sweep the rest
+    conditional: bool = True
+
     @abstractmethod
-    async def ingest(self, limit: int = 100) -> List[CoinRaw]:
-        """Ingest raw coin data from source."""
+    async def ingest(self, limit: int = 100) -> RawCoins:
+        """Ingest raw coin data from source: a RawBatch, or a list of CoinRaw/RawRecord."""
         pass
     
     @abstractmethod
     def get_source_name(self) -> str:
         """Return source name for tracking."""
         pass
+
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        """Resume from a saved checkpoint (see CheckpointManager). Default: ignore it."""
+        pass
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """High-water mark covering every batch yielded so far."""
+        return {}
+
+    async def stream(self, limit: int = 100, batch_size: Optional[int] = None) -> AsyncIterator[RawBatch]:
+        """
+        Yield raw coins in RawBatches as they become available.
+
+        Sources that cannot stream fall back to a single batch from `ingest`;
+        override this to keep memory bounded on large sources.
+        """
+        with stage("fetch") as timed:
+            coins = await self.ingest(limit)
+            timed["rows"] = len(coins)
+        if coins:
+            yield RawBatch.of(coins)
@@ -0,0 +1,83 @@
+"""Change-data-capture: hand the writer only the coins whose content changed."""
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def content_hash(row: Sequence[Any]) -> str:
+    """
+    Compact hash of a writer-ordered row (COIN_COLUMNS), coin_id excluded.
+
+    Stored alongside the row, so later runs compare against exactly what
+    was written instead of re-deriving it from database types.
+    """
+    return hashlib.blake2b(repr(tuple(row[1:])).encode(), digest_size=8).hexdigest()
+
+
+class ChangeTracker:
+    """
+    coin_id -> content hash of the stored row, for one pipeline run.
+
+    Seeded from coin_normalized.content_hash; `diff` then drops rows
+    identical to what is stored, so a steady-state run writes in
+    proportion to the churn rather than the universe. Counts what it
+    emits: inserted, updated and deleted rows make up the run's delta.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, Optional[str]] = {}
+        self._seen: set = set()
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def delta_count(self) -> int:
+        return self.inserted + self.updated + self.deleted
+
+    def seed(self, existing: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Load (coin_id, content_hash) pairs already in the table; a NULL hash always differs."""
+        self._hashes.update(existing)
+
+    def diff(self, rows: Iterable[Tuple]) -> List[Tuple]:
+        """The rows to write: new coins and coins whose content changed."""
+        changed = []
+        for row in rows:
+            coin_id = row[0]
+            self._seen.add(coin_id)
+            digest = content_hash(row)
+            if coin_id not in self._hashes:
+                self.inserted += 1
+            elif self._hashes[coin_id] != digest:
+                self.updated += 1
+            else:
+                self.unchanged += 1
+                continue
+            self._hashes[coin_id] = digest
+            changed.append(row)
+        return changed
+
+    def forget(self, coin_ids: Iterable[str]) -> List[str]:
+        """Record deletions; returns the ids that were stored."""
+        deleted = []
+        for coin_id in coin_ids:
+            if coin_id in self._hashes:
+                del self._hashes[coin_id]
+                deleted.append(coin_id)
+        self.deleted += len(deleted)
+        return deleted
+
+    def unseen(self) -> List[str]:
+        """Stored coin_ids no batch of this run mentioned."""
+        return [coin_id for coin_id in self._hashes if coin_id not in self._seen]
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "unchanged": self.unchanged,
+        }
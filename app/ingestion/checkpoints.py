@@ -1,21 +1,82 @@
 """Checkpoint management for ingestion pipeline."""
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
 
 class CheckpointManager:
-    def __init__(self, checkpoint_file: str = "checkpoints.json"):
-        self.file = Path(checkpoint_file)
-        self.data = self._load()
-    
-    def _load(self):
+    """
+    Per-source high-water marks (page, cursor, file offset, content hash...).
+
+    The pipeline saves a source's position after each committed batch and
+    marks it `completed` once the source finishes cleanly, so a crashed run
+    resumes from its last committed batch. Every save rewrites the file via a
+    temp file + fsync + os.replace, so readers never see a torn write.
+
+    With `persist=False` positions are only kept in memory, for sources that
+    cannot be resumed anyway (e.g. an upload's request body).
+    """
+
+    def __init__(self, checkpoint_file: Optional[str] = None, persist: bool = True):
+        self.file = Path(checkpoint_file or settings.checkpoint_file)
+        self.persist = persist
+        self._lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Any]] = self._load() if persist else {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
         if self.file.exists():
-            with open(self.file) as f:
-                return json.load(f)
+            try:
+                with open(self.file) as f:
+                    data = json.load(f)
+                return data if isinstance(data, dict) else {}
+            except (OSError, ValueError):
+                # A corrupt checkpoint only costs a full re-read, never a failed run
+                return {}
         return {}
-    
-    def save_checkpoint(self, source: str, count: int):
-        self.data[source] = {"count": count, "last_updated": datetime.utcnow().isoformat()}
-        self.file.parent.mkdir(exist_ok=True)
-        with open(self.file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+
+    def get(self, source: str) -> Dict[str, Any]:
+        return dict(self.data.get(source, {}))
+
+    def save(self, source: str, state: Dict[str, Any], completed: bool = False) -> None:
+        """Record the position reached by the last committed batch."""
+        self.data[source] = {
+            **state,
+            "completed": completed,
+            "last_updated": datetime.utcnow().isoformat(),
+        }
+        self._write()
+
+    def complete(self, source: str, state: Dict[str, Any]) -> None:
+        self.save(source, state, completed=True)
+
+    def reset(self, source: Optional[str] = None) -> None:
+        """Forget one source (or all of them), e.g. before a full reload."""
+        if source is None:
+            self.data = {}
+        else:
+            self.data.pop(source, None)
+        self._write()
+
+    def _write(self) -> None:
+        if not self.persist:
+            return
+        with self._lock:
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.file.parent, prefix=f".{self.file.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.data, f, indent=2, sort_keys=True)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
@@ -1,13 +1,33 @@
-from app.ingestion.base import BaseIngestor
-from app.schemas.coin_raw import CoinRaw
-import httpx
-
-class CoinGeckoIngestor(BaseIngestor):  # or CoinGeckoIngestor
-    async def ingest(self, limit: int = 100) -> list[CoinRaw]:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get("https://api.coinpaprika.com/v1/coins", params={"limit": limit})
-            # Parse and return CoinRaw list (stub)
-            return []
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.ingestion.paginated import PaginatedIngestor, to_float
+from app.ingestion.records import RawRecord
+
+class CoinGeckoIngestor(PaginatedIngestor):
+    """`/coins/markets`, paged by market cap (max 250 per page)."""
+
+    page_size = settings.coingecko_page_size
+
+    def page_request(self, page: int) -> Tuple[str, Dict[str, Any]]:
+        return f"{settings.coingecko_api_url}/coins/markets", {
+            "vs_currency": "usd",
+            "order": "market_cap_desc",
+            "per_page": self.page_size,
+            "page": page,
+        }
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[RawRecord]:
+        if not item.get("id") or not item.get("symbol"):
+            return None
+        return RawRecord(
+            id=item["id"],
+            symbol=str(item["symbol"]).upper(),
+            name=item.get("name") or item["id"],
+            platform_id=None,
+            price_usd=to_float(item.get("current_price")),
+            market_cap_usd=to_float(item.get("market_cap")),
+            volume_24h_usd=to_float(item.get("total_volume")),
+        )
     
     def get_source_name(self) -> str:
-        return "coingecko"  # or "coingecko"
+        return "coingecko"
@@ -1,13 +1,33 @@
-from app.ingestion.base import BaseIngestor
-from app.schemas.coin_raw import CoinRaw
-import httpx
-
-class CoinPaprikaIngestor(BaseIngestor):  # or CoinGeckoIngestor
-    async def ingest(self, limit: int = 100) -> list[CoinRaw]:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get("https://api.coinpaprika.com/v1/coins", params={"limit": limit})
-            # Parse and return CoinRaw list (stub)
-            return []
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.ingestion.paginated import PaginatedIngestor, to_float
+from app.ingestion.records import RawRecord
+
+class CoinPaprikaIngestor(PaginatedIngestor):
+    """
+    `/tickers` returns the whole universe in one response (the API has no
+    paging), so this is a single-page source truncated to `limit`.
+    """
+
+    page_size = settings.coinpaprika_page_size
+    max_pages = 1
+
+    def page_request(self, page: int) -> Tuple[str, Dict[str, Any]]:
+        return f"{settings.coinpaprika_api_url}/tickers", {"quotes": "USD"}
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[RawRecord]:
+        if not item.get("id") or not item.get("symbol"):
+            return None
+        usd = (item.get("quotes") or {}).get("USD") or {}
+        return RawRecord(
+            id=item["id"],
+            symbol=str(item["symbol"]).upper(),
+            name=item.get("name") or item["id"],
+            platform_id=None,
+            price_usd=to_float(usd.get("price")),
+            market_cap_usd=to_float(usd.get("market_cap")),
+            volume_24h_usd=to_float(usd.get("volume_24h")),
+        )
     
     def get_source_name(self) -> str:
-        return "coinpaprika"  # or "coingecko"
+        return "coinpaprika"
@@ -1,34 +1,141 @@
+import asyncio
+import hashlib
 import pandas as pd
 from pathlib import Path
-from typing import List
-from app.schemas.coin_raw import CoinRaw
+from typing import Any, AsyncIterator, Dict, Optional
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import stage
 from app.ingestion.base import BaseIngestor
-from datetime import datetime
+from app.ingestion.records import RawBatch
+
+TEXT_COLUMNS = ("id", "symbol", "name", "platform_id")
+NUMERIC_COLUMNS = ("price_usd", "market_cap_usd", "volume_24h_usd")
+KNOWN_COLUMNS = frozenset(TEXT_COLUMNS + NUMERIC_COLUMNS)
+FINGERPRINT_BYTES = 1 << 20
+
+
+def content_hash(path: Path) -> str:
+    """
+    Cheap content fingerprint: size, mtime and the first/last MiB.
+
+    Hashing multi-GB dumps in full on every run would cost as much as reading
+    them; this catches rewrites, appends and truncations.
+    """
+    stat = path.stat()
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+def _numeric(chunk: pd.DataFrame, column: str) -> list:
+    """Coerce a column to floats in one pass; missing/unparseable values become None."""
+    if column not in chunk:
+        return [None] * len(chunk)
+    values = pd.to_numeric(chunk[column], errors="coerce")
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _text(chunk: pd.DataFrame, column: str) -> list:
+    if column not in chunk:
+        return [None] * len(chunk)
+    values = chunk[column]
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def frame_to_batch(chunk: pd.DataFrame) -> RawBatch:
+    """Convert a CSV chunk to a RawBatch column by column; no per-row objects are built."""
+    n = len(chunk)
+    raw_symbols = chunk["symbol"].fillna("unknown").astype(str) if "symbol" in chunk \
+        else pd.Series(["unknown"] * n, index=chunk.index)
+    symbols = raw_symbols.str.upper()
+    ids = chunk["id"].fillna(raw_symbols).astype(str) if "id" in chunk else raw_symbols
+    names = chunk["name"].fillna("Unknown").astype(str) if "name" in chunk \
+        else pd.Series(["Unknown"] * n, index=chunk.index)
+
+    # Values are already coerced; normalize_frame is the only other check they get
+    return RawBatch((
+        ids.tolist(),
+        symbols.tolist(),
+        names.tolist(),
+        _text(chunk, "platform_id"),
+        _numeric(chunk, "price_usd"),
+        _numeric(chunk, "market_cap_usd"),
+        _numeric(chunk, "volume_24h_usd"),
+    ))
+
 
 class CSVIngestor(BaseIngestor):
     def __init__(self, filepath: str):
         self.filepath = Path(filepath)
+        self._resume: Dict[str, Any] = {}
+        self._position: Dict[str, Any] = {}
+
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        self._resume = dict(checkpoint)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """`file_offset` data rows of the file with `content_hash` have been yielded."""
+        return dict(self._position)
     
-    async def ingest(self, limit: int = 1000) -> List[CoinRaw]:
+    async def ingest(self, limit: int = 1000) -> RawBatch:
+        coins = RawBatch()
+        async for batch in self.stream(limit):
+            coins.extend(batch)
+        return coins
+
+    async def stream(self, limit: int = 1000, batch_size: Optional[int] = None) -> AsyncIterator[RawBatch]:
+        """
+        Read the file in bounded chunks so memory stays flat regardless of file size.
+
+        At most `min(limit, settings.max_csv_rows)` rows are read, in chunks of
+        `settings.max_ingestion_batch` rows unless `batch_size` is given. If the
+        restored checkpoint is for the same file content, rows before its
+        `file_offset` were already processed and are skipped.
+        """
         if not self.filepath.exists():
             raise FileNotFoundError(f"CSV file not found: {self.filepath}")
-        
-        df = pd.read_csv(self.filepath)
-        df = df.head(limit)
-        
-        coins = []
-        for _, row in df.iterrows():
-            coin = CoinRaw(
-                id=str(row.get('id', row.get('symbol', 'unknown'))),
-                symbol=str(row.get('symbol', 'unknown')).upper(),
-                name=str(row.get('name', 'Unknown')),
-                price_usd=float(row.get('price_usd', 0)) if pd.notna(row.get('price_usd')) else None,
-                market_cap_usd=float(row.get('market_cap_usd', 0)) if pd.notna(row.get('market_cap_usd')) else None,
-                volume_24h_usd=float(row.get('volume_24h_usd', 0)) if pd.notna(row.get('volume_24h_usd')) else None
-            )
-            coins.append(coin)
-        
-        return coins
+
+        fingerprint = content_hash(self.filepath)
+        offset = 0
+        if self._resume.get("content_hash") == fingerprint:
+            offset = int(self._resume.get("file_offset", 0))
+        self._position = {"content_hash": fingerprint, "file_offset": offset}
+
+        max_rows = min(limit, settings.max_csv_rows) - offset
+        if max_rows <= 0:
+            return
+        chunk_size = max(1, min(batch_size or settings.max_ingestion_batch, max_rows))
+
+        reader = pd.read_csv(
+            self.filepath,
+            usecols=lambda column: column in KNOWN_COLUMNS,
+            dtype={column: str for column in TEXT_COLUMNS},
+            chunksize=chunk_size,
+            nrows=max_rows,
+            # Line 0 is the header; skip data rows already committed
+            skiprows=(lambda line: 0 < line <= offset) if offset else None,
+        )
+        with reader:
+            while True:
+                # Reading and tokenizing the next chunk happen together in pandas;
+                # both run on a worker thread so API requests are served meanwhile
+                with stage("fetch"):
+                    chunk = await run_blocking(next, reader, None)
+                if chunk is None:
+                    break
+                offset += len(chunk)
+                self._position = {"content_hash": fingerprint, "file_offset": offset}
+                with stage("parse", rows=len(chunk)):
+                    coins = await run_blocking(frame_to_batch, chunk)
+                yield coins
+                # Let other sources and API requests run between chunks (cpu_executor="inline")
+                await asyncio.sleep(0)
     
     def get_source_name(self) -> str:
         return f"csv:{self.filepath.name}"
@@ -0,0 +1,305 @@
+"""Background ETL job runner: queued, de-duplicated, cancellable, optionally periodic."""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.cache import bump_version
+from app.core.config import settings
+from app.core.db import db
+from app.core.locks import NamedLock, named_lock
+from app.ingestion.pipeline import IngestionPipeline
+from app.models import ETLRun, ETLStatus, StatsSnapshot
+from app.schemas.etl_run import ETLRunsCreate
+from app.services.etl_service import ETLService
+
+logger = logging.getLogger(__name__)
+
+# kind -> coroutine(session, run=..., **params) that records into `run`
+JOB_KINDS: Dict[str, Callable[..., Awaitable[int]]] = {
+    "ingest": IngestionPipeline.run_all_ingestors,
+    "incremental": IngestionPipeline.run_incremental,
+    "full_reload": IngestionPipeline.run_full_reload,
+}
+
+# Held around every pipeline run, across all workers sharing the database
+PIPELINE_LOCK = "kasparro-etl-pipeline"
+# Held for life by the one worker that runs startup ingestion and schedules
+LEADER_LOCK = "kasparro-etl-leader"
+
+
+@dataclass
+class Job:
+    """One queued or running ETL run."""
+    run_id: int
+    kind: str
+    key: Tuple
+    params: Dict[str, Any] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+    cancelled: bool = False
+
+
+class JobRunner:
+    """
+    Owns ETL runs off the request path.
+
+    `submit` records a PENDING ETLRun and queues the job; a submission
+    identical to one already queued or running (same kind and params) returns
+    that job's run instead of starting another. `settings.etl_max_concurrent_jobs`
+    workers drain the queue. `cancel` drops a queued job or cancels a running
+    one; either way its ETLRun ends CANCELLED. `schedule` re-submits a kind
+    on a fixed interval, and de-duplication keeps slow runs from piling up.
+
+    With several uvicorn workers, every run holds PIPELINE_LOCK, so runs
+    from different workers queue behind each other instead of racing. Only
+    the worker that wins LEADER_LOCK (`lead`) runs startup ingestion and
+    schedules. Every worker `follow`s the stats snapshot to drop its read
+    cache when another worker finishes a run.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        max_concurrent: Optional[int] = None,
+        lock_factory: Optional[Callable[[str], NamedLock]] = None
+    ):
+        self._session_factory = session_factory
+        self._lock_factory = lock_factory
+        self.max_concurrent = max(1, max_concurrent or settings.etl_max_concurrent_jobs)
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._jobs: Dict[int, Job] = {}
+        self._active: Dict[Tuple, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._leader_lock: Optional[NamedLock] = None
+
+    @property
+    def session_factory(self) -> async_sessionmaker:
+        return self._session_factory or db.session_factory
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_lock is not None
+
+    def lock(self, name: str = PIPELINE_LOCK) -> NamedLock:
+        """A fresh cross-worker lock; `async with` waits up to settings.etl_lock_timeout_seconds."""
+        if self._lock_factory is not None:
+            lock = self._lock_factory(name)
+        else:
+            lock = named_lock(name, self.session_factory.kw.get("bind"))
+        lock.timeout = settings.etl_lock_timeout_seconds
+        return lock
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"etl-worker-{i}")
+            for i in range(self.max_concurrent)
+        ]
+        logger.info(f"✅ ETL job runner started ({self.max_concurrent} worker(s))")
+
+    async def stop(self) -> None:
+        """Cancel schedules and workers, then every queued or running run."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        jobs = list(self._jobs.values())
+        running = [job.task for job in jobs if job.task is not None and not job.task.done()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        for job in jobs:
+            job.cancelled = True
+            await self._finish_cancelled(job)
+        self._active.clear()
+        if self._leader_lock is not None:
+            await self._leader_lock.release()
+            self._leader_lock = None
+        logger.info("🛑 ETL job runner stopped")
+
+    def lead(self, on_elected: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        """
+        Compete for leadership in the background and call `on_elected` once won.
+
+        Followers keep retrying every settings.etl_leader_retry_seconds, so
+        a new leader takes over when the old worker exits (its lock dies with it).
+        """
+        async def campaign() -> None:
+            lock = self.lock(LEADER_LOCK)
+            while True:
+                try:
+                    if await lock.try_acquire():
+                        break
+                except Exception as e:
+                    logger.warning(f"⚠️ Leader election failed, retrying: {e}")
+                await asyncio.sleep(settings.etl_leader_retry_seconds)
+            self._leader_lock = lock
+            logger.info(f"👑 This worker (pid {os.getpid()}) leads ETL scheduling")
+            await on_elected()
+
+        task = asyncio.create_task(campaign(), name="etl-leader-election")
+        self._tasks.append(task)
+        return task
+
+    def follow(self, interval: float) -> Optional[asyncio.Task]:
+        """
+        Poll the stats snapshot row (a primary-key read) and invalidate this
+        worker's read cache whenever any worker finishes a run.
+        """
+        if interval <= 0:
+            return None
+
+        async def watch() -> None:
+            seen: Optional[Tuple[Optional[int]]] = None
+            while True:
+                try:
+                    async with self.session_factory() as session:
+                        version = (await session.execute(
+                            select(StatsSnapshot.version).where(StatsSnapshot.id == 1)
+                        )).scalar()
+                    if seen is not None and seen != (version,):
+                        bump_version()
+                    seen = (version,)
+                except Exception as e:
+                    logger.warning(f"⚠️ Snapshot poll failed: {e}")
+                await asyncio.sleep(interval)
+
+        task = asyncio.create_task(watch(), name="etl-follow")
+        self._tasks.append(task)
+        return task
+
+    def schedule(self, kind: str, interval: float, **params: Any) -> Optional[asyncio.Task]:
+        """Submit `kind` every `interval` seconds; a non-positive interval disables it."""
+        if interval <= 0:
+            return None
+
+        async def loop() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.submit(kind, **params)
+                except Exception as e:
+                    logger.error(f"❌ Could not schedule {kind} run: {e}")
+
+        task = asyncio.create_task(loop(), name=f"etl-schedule-{kind}")
+        self._tasks.append(task)
+        logger.info(f"⏰ Scheduled {kind} ETL every {interval:.0f}s")
+        return task
+
+    async def submit(self, kind: str, **params: Any) -> Tuple[int, bool]:
+        """
+        Queue a run of `kind`.
+
+        Returns:
+            (run_id, deduplicated): deduplicated is True when an identical
+            job was already queued or running and its run id is returned
+
+        Raises:
+            ValueError: unknown job kind
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown ETL job kind: {kind!r} (expected one of {sorted(JOB_KINDS)})")
+        key = (kind, tuple(sorted(params.items())))
+        existing = self._active.get(key)
+        if existing is not None:
+            return existing.run_id, True
+
+        async with self.session_factory() as session:
+            run = await ETLService.create_run(session, ETLRunsCreate(source=kind, total_records=0))
+        job = Job(run.id, kind, key, params)
+        self._jobs[job.run_id] = job
+        self._active[key] = job
+        await self._queue.put(job)
+        logger.info(f"📥 Queued {kind} ETL run {job.run_id}")
+        return job.run_id, False
+
+    def get(self, run_id: int) -> Optional[Job]:
+        return self._jobs.get(run_id)
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def cancel(self, run_id: int) -> bool:
+        """False if the run is not queued or running in this process."""
+        job = self._jobs.get(run_id)
+        if job is None or job.cancelled:
+            return False
+        job.cancelled = True
+        self._active.pop(job.key, None)
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            await self._finish_cancelled(job)
+        return True
+
+    async def _finish_cancelled(self, job: Job) -> None:
+        async with self.session_factory() as session:
+            run = await session.get(ETLRun, job.run_id)
+            if run is not None and run.status in (ETLStatus.PENDING, ETLStatus.RUNNING):
+                run.status = ETLStatus.CANCELLED
+                run.error_message = "cancelled"
+                run.completed_at = datetime.utcnow()
+                await session.commit()
+        self._jobs.pop(job.run_id, None)
+        # Batches committed before the cancellation are visible
+        bump_version()
+        logger.warning(f"🚫 ETL run {job.run_id} ({job.kind}) cancelled")
+
+    async def _execute(self, job: Job) -> None:
+        async with self.session_factory() as session:
+            run = await session.get(ETLRun, job.run_id)
+            if run is None:
+                return
+            started = False
+            try:
+                # Stays PENDING while another worker's run holds the lock
+                async with self.lock():
+                    started = True
+                    await JOB_KINDS[job.kind](session, run=run, **job.params)
+            except Exception as e:
+                if started:
+                    # The pipeline records its own failures
+                    raise
+                # Lock timeout or lock backend error: the run never got going,
+                # so finish it here or pollers would see PENDING forever
+                run.status = ETLStatus.FAILED
+                run.error_message = str(e)
+                run.completed_at = datetime.utcnow()
+                await session.commit()
+                raise
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancelled:
+                    continue
+                job.task = asyncio.create_task(self._execute(job), name=f"etl-run-{job.run_id}")
+                # wait() instead of awaiting the task: cancelling the job must not cancel the worker
+                await asyncio.wait({job.task})
+                if job.task.cancelled():
+                    await self._finish_cancelled(job)
+                elif job.task.exception() is not None:
+                    # The pipeline has already marked the run FAILED
+                    logger.error(f"❌ ETL run {job.run_id} ({job.kind}) failed: {job.task.exception()}")
+            finally:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self._jobs.pop(job.run_id, None)
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished (mainly for tests)."""
+        await self._queue.join()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,285 @@
+"""Columnar normalization and deduplication of raw coin batches."""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.executor import run_cpu
+from app.core.metrics import stage
+from app.ingestion.records import RAW_COLUMNS, RawBatch, RawCoins
+
+NUMERIC_COLUMNS = ("price_usd", "market_cap_usd", "volume_24h_usd")
+
+# Output column order matches app.ingestion.writer.COIN_COLUMNS
+OUTPUT_COLUMNS = ("coin_id", "symbol", "name", "price_usd", "market_cap_usd", "volume_24h_usd", "platform_id", "source")
+
+
+def source_family(source: str) -> str:
+    """`csv:coins.csv` -> `csv`; registry names pass through unchanged."""
+    return source.split(":", 1)[0]
+
+
+def source_rank(source: str, source_priority: Sequence[str]) -> int:
+    """Position of the source family in the priority list; unknown sources rank last."""
+    family = source_family(source)
+    return source_priority.index(family) if family in source_priority else len(source_priority)
+
+
+def _no_price_penalty(source_priority: Sequence[str]) -> int:
+    """Rank offset that puts every priced row ahead of every unpriced one."""
+    return len(source_priority) + 1
+
+
+def _canonicalize(values: pd.Series, upper: bool) -> np.ndarray:
+    """Strip + case-fold, transforming each distinct value once (factorize + take)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    uniques = uniques.tolist()
+    if upper:
+        canonical = [str(value).strip().upper() for value in uniques]
+    else:
+        canonical = [str(value).strip().lower() for value in uniques]
+    return np.array(canonical, dtype=object)[codes]
+
+
+def normalize_frame(
+    raw: pd.DataFrame,
+    source_priority: Optional[Sequence[str]] = None,
+    seq_start: int = 0
+) -> pd.DataFrame:
+    """
+    Canonicalize, coerce and deduplicate a raw frame in one vectorized pass.
+
+    - symbols are stripped and upper-cased, coin ids lower-cased
+    - numeric columns are coerced to float; zero/unparseable become NaN
+    - one row per symbol survives, ranked by: has a price, then source
+      priority (lower index wins), then arrival order
+    """
+    priority = list(source_priority if source_priority is not None else settings.source_priority)
+    sources = raw["source"].astype(str)
+    ranks = {source: source_rank(source, priority) for source in sources.unique()}
+    frame = pd.DataFrame({
+        "coin_id": _canonicalize(raw["id"], upper=False),
+        "symbol": _canonicalize(raw["symbol"], upper=True),
+        "name": raw["name"],
+        "platform_id": raw["platform_id"],
+        "source": sources,
+    })
+    for column in NUMERIC_COLUMNS:
+        values = pd.to_numeric(raw[column], errors="coerce")
+        frame[column] = values.where(values != 0)
+
+    frame["seq"] = np.arange(seq_start, seq_start + len(frame), dtype=np.int64)
+    frame["_rank"] = (
+        frame["price_usd"].isna().to_numpy(dtype=np.int64) * _no_price_penalty(priority)
+        + sources.map(ranks).to_numpy(dtype=np.int64)
+    )
+    frame = frame[(frame["symbol"] != "") & (frame["coin_id"] != "")]
+    return deduplicate(frame)
+
+
+def deduplicate(frame: pd.DataFrame) -> pd.DataFrame:
+    """Keep the best row per symbol (see normalize_frame for the ranking).
+
+    Sorting only on the integer (_rank, seq) keys and letting drop_duplicates
+    hash the symbols avoids an expensive string sort.
+    """
+    ordered = frame.sort_values(["_rank", "seq"], kind="stable")
+    return ordered.drop_duplicates("symbol", keep="first")
+
+
+def frame_to_rows(frame: pd.DataFrame) -> List[Tuple]:
+    """Rows in writer column order with NaN replaced by None."""
+    if frame.empty:
+        return []
+    columns = []
+    for column in OUTPUT_COLUMNS:
+        values = frame[column]
+        columns.append(values.astype(object).where(values.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+@dataclass
+class NormalizedBatch:
+    """One batch normalized and deduplicated on its own, in arrival order, for SymbolClaims.resolve."""
+    symbols: List[str] = field(default_factory=list)
+    ranks: List[int] = field(default_factory=list)
+    rows: List[Tuple] = field(default_factory=list)
+    raw_rows: int = 0
+
+
+def raw_columns(coins: RawCoins) -> Tuple[List[Any], ...]:
+    """RAW_COLUMNS of a batch as plain lists, which pickle far faster than record objects."""
+    return RawBatch.of(coins).columns
+
+
+def _number(value: Any) -> Optional[float]:
+    """pd.to_numeric(errors="coerce") for one value, with zero and NaN as None."""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number and number != 0 else None
+
+
+def _text(value: Any) -> str:
+    """str() as _canonicalize applies it: factorize has already turned None into NaN."""
+    return "nan" if value is None else str(value)
+
+
+def _value(value: Any) -> Any:
+    """NaN as None, like frame_to_rows."""
+    return None if isinstance(value, float) and value != value else value
+
+
+def normalize_rows(
+    columns: Sequence[Sequence[Any]],
+    source: str,
+    source_priority: Sequence[str]
+) -> NormalizedBatch:
+    """
+    normalize_columns for small batches, in plain Python: same rows, same
+    winners, without the fixed cost of building and sorting DataFrames.
+    Only each symbol's winning row is built.
+    """
+    ids, symbols, names, platforms, prices, market_caps, volumes = columns
+    priced = source_rank(source, source_priority)
+    unpriced = priced + _no_price_penalty(source_priority)
+    # symbol -> (rank, seq, coin_id, price); the first of equal ranks wins. A
+    # winner is re-inserted when it displaces one, so the dict stays in seq order
+    best: Dict[str, Tuple[int, int, str, Optional[float]]] = {}
+    for seq, (coin_id, symbol, price) in enumerate(zip(ids, symbols, prices)):
+        symbol = (symbol if type(symbol) is str else _text(symbol)).strip().upper()
+        if not symbol:
+            continue
+        if type(price) is not float or price != price or price == 0:
+            price = _number(price)
+        rank = unpriced if price is None else priced
+        current = best.get(symbol)
+        if current is not None and current[0] <= rank:
+            continue
+        coin_id = (coin_id if type(coin_id) is str else _text(coin_id)).strip().lower()
+        if not coin_id:
+            continue
+        if current is not None:
+            del best[symbol]
+        best[symbol] = (rank, seq, coin_id, price)
+
+    rows: List[Tuple] = []
+    for symbol, (rank, seq, coin_id, price) in best.items():
+        name, market_cap, volume, platform = names[seq], market_caps[seq], volumes[seq], platforms[seq]
+        rows.append((
+            coin_id,
+            symbol,
+            name if type(name) is str else _value(name),
+            price,
+            market_cap if type(market_cap) is float and market_cap and market_cap == market_cap else _number(market_cap),
+            volume if type(volume) is float and volume and volume == volume else _number(volume),
+            platform if platform is None or type(platform) is str else _value(platform),
+            source,
+        ))
+    return NormalizedBatch(list(best), [claim[0] for claim in best.values()], rows, len(ids))
+
+
+def normalize_columns(
+    columns: Sequence[Sequence[Any]],
+    source: str,
+    source_priority: Sequence[str]
+) -> NormalizedBatch:
+    """
+    normalize_frame over raw_columns output; module-level and pure, so a worker process can run it.
+
+    Batches under settings.normalize_vectorize_min_rows take normalize_rows
+    instead: at page and chunk sizes, pandas setup costs more than the work.
+    """
+    if len(columns[0]) < settings.normalize_vectorize_min_rows:
+        return normalize_rows(columns, source, source_priority)
+    raw = pd.DataFrame(dict(zip(RAW_COLUMNS, columns)), columns=list(RAW_COLUMNS))
+    raw["source"] = source
+    frame = normalize_frame(raw, source_priority).sort_values("seq", kind="stable")
+    return NormalizedBatch(frame["symbol"].tolist(), frame["_rank"].tolist(), frame_to_rows(frame), len(raw))
+
+
+async def normalize_batch(
+    source: str,
+    coins: RawCoins,
+    source_priority: Optional[Sequence[str]] = None
+) -> NormalizedBatch:
+    """
+    Normalize a batch in the CPU executor (app.core.executor.run_cpu).
+
+    Only the column lists travel to the worker and only writer-ready row
+    tuples come back; resolving them against the claims stays with the caller.
+    """
+    if not coins:
+        return NormalizedBatch()
+    priority = list(source_priority if source_priority is not None else settings.source_priority)
+    with stage("normalize", rows=len(coins)):
+        return await run_cpu(normalize_columns, raw_columns(coins), source, priority, rows=len(coins))
+
+
+@dataclass
+class Delta:
+    """What one batch changes: rows to upsert and coin_ids they displace."""
+    upserts: List[Tuple] = field(default_factory=list)
+    superseded: List[str] = field(default_factory=list)
+
+
+class SymbolClaims:
+    """
+    Cross-batch deduplication for streaming writes.
+
+    Remembers, per symbol, the rank and coin_id of the row that currently owns
+    it (seeded from the table, then updated as batches are written), so each
+    batch can be upserted as soon as it lands while still converging on the
+    same winner normalize_frame would pick over the whole run:
+
+    - an unclaimed symbol is taken by the new row
+    - a strictly better rank takes the symbol over; the old coin_id is superseded
+    - the owning coin_id refreshes itself from an equal-or-better row, but
+      within one run the first arrival wins ties
+    """
+
+    def __init__(self, source_priority: Optional[Sequence[str]] = None):
+        self.source_priority = list(source_priority if source_priority is not None else settings.source_priority)
+        self.raw_count = 0
+        # symbol -> (rank, coin_id, claimed during this run)
+        self._claims: Dict[str, Tuple[int, str, bool]] = {}
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+    def rank(self, source: Optional[str], has_price: bool) -> int:
+        base = source_rank(source or "", self.source_priority)
+        return base if has_price else base + _no_price_penalty(self.source_priority)
+
+    def seed(self, existing: Iterable[Tuple[str, str, Optional[str], Any]]) -> None:
+        """Load (symbol, coin_id, source, price_usd) rows already in the table."""
+        for symbol, coin_id, source, price in existing:
+            self._claims[symbol] = (self.rank(source, bool(price)), coin_id, False)
+
+    def resolve(self, batch: NormalizedBatch) -> Delta:
+        """Resolve a batch from normalize_batch against the claims."""
+        self.raw_count += batch.raw_rows
+        with stage("dedup", rows=len(batch.rows)):
+            return self._resolve(batch.symbols, batch.ranks, batch.rows)
+
+    def _resolve(self, symbols: Sequence[str], ranks: Sequence[int], rows: Sequence[Tuple]) -> Delta:
+        delta = Delta()
+        claims = self._claims
+        for symbol, rank, row in zip(symbols, ranks, rows):
+            coin_id = row[0]
+            claim = claims.get(symbol)
+            if claim is not None:
+                claimed_rank, claimed_id, this_run = claim
+                if coin_id == claimed_id:
+                    if rank > claimed_rank or (rank == claimed_rank and this_run):
+                        continue
+                elif rank >= claimed_rank:
+                    continue
+                else:
+                    delta.superseded.append(claimed_id)
+            claims[symbol] = (rank, coin_id, True)
+            delta.upserts.append(row)
+        return delta
@@ -0,0 +1,155 @@
+"""Base class for API sources that fetch pages concurrently and stream them."""
+import asyncio
+import hashlib
+import logging
+import math
+from abc import abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.http import HttpClient, http_client
+from app.core.metrics import stage
+from app.core.serialization import loads
+from app.ingestion.base import BaseIngestor
+from app.ingestion.records import RawBatch, RawRecord
+
+logger = logging.getLogger(__name__)
+
+
+def to_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PaginatedIngestor(BaseIngestor):
+    """
+    Fetch `ceil(limit / page_size)` pages with at most `max_in_flight` requests
+    outstanding, yielding each page's coins as soon as it lands (pages may
+    arrive out of order). A short page marks the end of the upstream universe.
+    """
+
+    page_size: int = 100
+    max_pages: Optional[int] = None
+
+    def __init__(
+        self,
+        client: Optional[HttpClient] = None,
+        page_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        self.client = client or http_client
+        if page_size is not None:
+            self.page_size = page_size
+        self.max_in_flight = max(1, max_in_flight or settings.api_max_in_flight_pages)
+        self._resume: Dict[str, Any] = {}
+        self._page_hashes: Dict[str, List] = {}
+        self._done_pages: Set[int] = set()
+        self._high_water = 0
+
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        """
+        After a clean run, start from page 1 but skip pages whose content hash
+        is unchanged. After a crash, also skip every page up to the high-water mark.
+        """
+        self._resume = dict(checkpoint)
+        self._page_hashes = {page: list(entry) for page, entry in checkpoint.get("page_hashes", {}).items()}
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {"high_water_page": self._high_water, "page_hashes": dict(self._page_hashes)}
+
+    def _mark_done(self, page: int) -> None:
+        """Advance the high-water mark over the contiguous run of finished pages."""
+        self._done_pages.add(page)
+        while self._high_water + 1 in self._done_pages:
+            self._high_water += 1
+            self._done_pages.discard(self._high_water)
+
+    @abstractmethod
+    def page_request(self, page: int) -> Tuple[str, Dict[str, Any]]:
+        """URL and query params for a 1-based page number."""
+
+    @abstractmethod
+    def parse_item(self, item: Dict[str, Any]) -> Optional[RawRecord]:
+        """Convert one upstream record; return None to drop it."""
+
+    def extract_items(self, payload: Any) -> List[Dict[str, Any]]:
+        """Pull the list of records out of a decoded page payload."""
+        return payload
+
+    async def fetch_page(self, page: int) -> Tuple[int, Optional[RawBatch], int, Optional[str]]:
+        """
+        Returns (page, coins or None when unchanged, raw item count, content hash).
+
+        Pages come back unchanged (None) only when `conditional` is set.
+        """
+        url, params = self.page_request(page)
+        with stage("fetch"):
+            result = await self.client.get(url, params=params, conditional=self.conditional)
+        previous = self._page_hashes.get(str(page))
+        if result.not_modified:
+            logger.debug(f"{self.get_source_name()} page {page} not modified, skipping", extra={"hot": True})
+            return page, None, previous[1] if previous else self.page_size, None
+        digest = hashlib.blake2b(result.content, digest_size=8).hexdigest()
+        if self.conditional and previous and previous[0] == digest:
+            logger.debug(f"{self.get_source_name()} page {page} content unchanged, skipping", extra={"hot": True})
+            return page, None, previous[1], digest
+        with stage("parse") as timed:
+            items = self.extract_items(loads(result.content))
+            coins = RawBatch.from_records(coin for coin in map(self.parse_item, items) if coin is not None)
+            timed["rows"] = len(coins)
+        return page, coins, len(items), digest
+
+    async def stream(self, limit: int = 100, batch_size: Optional[int] = None) -> AsyncIterator[RawBatch]:
+        if limit <= 0:
+            return
+        last_page = math.ceil(limit / self.page_size)
+        if self.max_pages is not None:
+            last_page = min(last_page, self.max_pages)
+
+        remaining = limit
+        next_page = 1
+        if self._resume and not self._resume.get("completed", True):
+            # Crashed run: pages up to the high-water mark were committed
+            self._high_water = int(self._resume.get("high_water_page", 0))
+            next_page = self._high_water + 1
+            remaining -= self._high_water * self.page_size
+            if remaining <= 0:
+                return
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            while in_flight or next_page <= last_page:
+                while next_page <= last_page and len(in_flight) < self.max_in_flight:
+                    in_flight.add(asyncio.create_task(self.fetch_page(next_page)))
+                    next_page += 1
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page, coins, item_count, digest = task.result()
+                    if item_count < self.page_size:
+                        # Upstream ran out: stop scheduling pages past this one
+                        last_page = min(last_page, page)
+                    if digest is not None:
+                        self._page_hashes[str(page)] = [digest, item_count]
+                    self._mark_done(page)
+                    if coins is None:
+                        remaining -= item_count
+                    elif coins and remaining > 0:
+                        batch = coins[:remaining]
+                        remaining -= len(batch)
+                        yield batch
+                if remaining <= 0:
+                    break
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def ingest(self, limit: int = 100) -> RawBatch:
+        coins = RawBatch()
+        async for batch in self.stream(limit):
+            coins.extend(batch)
+        return coins
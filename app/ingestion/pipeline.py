@@ -1,37 +1,261 @@
-from typing import List
-from datetime import datetime, timedelta
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
-from app.ingestion.csv_ingestor import CSVIngestor
-from app.ingestion.coinpaprika_ingestor import CoinPaprikaIngestor
-from app.ingestion.coingecko_ingestor import CoinGeckoIngestor
-from app.schemas.coin_raw import CoinRaw
-from app.models import CoinNormalized, ETLRun
+from app.core.broadcast import price_broadcaster
+from app.core.cache import bump_version
+from app.core.config import settings
+from app.core.metrics import RUN_SECONDS, RUNS, SOURCE_ROWS_PER_SECOND, RunTimings, current_run, current_source, stage
+from app.ingestion.changes import ChangeTracker
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.normalizer import NormalizedBatch, SymbolClaims, normalize_batch
+from app.ingestion.records import RawBatch
+from app.ingestion.registry import IngestorRegistry, IngestorSpec, default_registry
+from app.ingestion.writer import COIN_COLUMNS, append_history, bulk_upsert_coins
+from app.models import CoinNormalized, ETLRun, ETLStatus
 from app.services.etl_service import ETLService
+from app.services.stats_service import StatsAccumulator, StatsService
 import logging
-from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Receives (source name, batch, checkpoint after the batch) for every batch an ingestor yields
+BatchHandler = Callable[[str, RawBatch, Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class SourceResult:
+    """Outcome of a single ingestor within one pipeline run."""
+    source: str
+    status: str
+    duration_seconds: float
+    records: int = 0
+    batches: int = 0
+    error: Optional[str] = None
+    checkpoint: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.records / self.duration_seconds if self.duration_seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "records": self.records,
+            "batches": self.batches,
+            "duration_seconds": round(self.duration_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "error": self.error,
+        }
+
+
 class IngestionPipeline:
     """
     Main ETL Pipeline for Kasparro Backend
     
     Flow:
     1. Create ETL Run record (tracking)
-    2. Run all ingestors (CSV + API sources)
-    3. Collect raw coin data
-    4. Normalize data to unified schema
-    5. Insert into coins_normalized table
-    6. Update ETL Run with status (success/failed)
-    7. Clean up old records (optional)
+    2. Run all registered ingestors concurrently (per-source timeout, concurrency cap),
+       each resuming from its checkpoint
+    3. Normalize each batch as it arrives (vectorized, in the CPU executor) and
+       resolve it against the per-symbol claims (source priority dedup across
+       batches and runs)
+    4. Drop rows whose content hash matches the stored row (change-data-capture)
+    5. Bulk upsert the changed rows into coin_normalized, append their prices to
+       coin_price_history, and commit
+    6. Save the source checkpoint for the committed batch
+    7. Update ETL Run with status (success/failed) and the delta count
+    8. Full reload only: delete records no source returned
     """
 
+    @staticmethod
+    async def fetch_source(
+        spec: IngestorSpec,
+        limit: int,
+        semaphore: asyncio.Semaphore,
+        on_batch: BatchHandler,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        conditional: bool = True
+    ) -> SourceResult:
+        """
+        Stream one ingestor under the concurrency cap, isolating its failures.
+
+        Each batch is awaited into `on_batch` as soon as it lands; batches
+        received before a timeout or error are kept and counted. Without
+        `conditional` the ingestor returns every record, even unchanged ones.
+        """
+        timeout = spec.timeout if spec.timeout is not None else settings.ingestor_timeout_seconds
+        result = SourceResult(spec.name, "completed", 0.0)
+
+        async def consume() -> None:
+            # Stage timings recorded by the ingestor are labelled with this source
+            current_source.set(spec.name)
+            ingestor = spec.factory()
+            ingestor.conditional = conditional
+            if checkpoint:
+                ingestor.restore(checkpoint)
+            async for batch in ingestor.stream(limit):
+                result.records += len(batch)
+                result.batches += 1
+                await on_batch(spec.name, batch, ingestor.checkpoint())
+            result.checkpoint = ingestor.checkpoint()
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(consume(), timeout=timeout)
+            except asyncio.TimeoutError:
+                result.status = "timeout"
+                result.error = f"timed out after {timeout}s"
+                logger.error(f"⏰ {spec.name} timed out after {timeout}s")
+            except Exception as e:
+                result.status = "failed"
+                result.error = str(e)
+                logger.error(f"❌ {spec.name} ingestor failed: {e}")
+            result.duration_seconds = time.perf_counter() - started
+        SOURCE_ROWS_PER_SECOND.set(result.rows_per_second, source=spec.name)
+
+        if result.status == "completed":
+            logger.info(f"✅ {spec.name}: {result.records} coins ingested in {result.duration_seconds:.2f}s")
+        return result
+
+    @staticmethod
+    async def fetch_all(
+        registry: IngestorRegistry,
+        limit: int,
+        on_batch: BatchHandler,
+        checkpoints: Optional[CheckpointManager] = None,
+        conditional: bool = True
+    ) -> List[SourceResult]:
+        """
+        Fan out every registered ingestor at once.
+
+        Wall-clock time is bounded by the slowest source (or its timeout),
+        not the sum of all sources. One source failing never affects the others.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.ingestor_max_concurrency))
+        return await asyncio.gather(*(
+            IngestionPipeline.fetch_source(
+                spec, limit, semaphore, on_batch,
+                checkpoints.get(spec.name) if checkpoints else None,
+                conditional,
+            )
+            for spec in registry.specs()
+        ))
+
+    @staticmethod
+    async def load_claims(
+        session: AsyncSession,
+        claims: SymbolClaims,
+        stats: Optional[StatsAccumulator] = None,
+        changes: Optional[ChangeTracker] = None
+    ) -> None:
+        """Seed dedup claims (and the stats aggregates and content hashes) with the coins already stored, in one scan."""
+        result = await session.execute(select(
+            CoinNormalized.symbol,
+            CoinNormalized.coin_id,
+            CoinNormalized.source,
+            CoinNormalized.price_usd,
+            CoinNormalized.name,
+            CoinNormalized.market_cap_usd,
+            CoinNormalized.volume_24h_usd,
+            CoinNormalized.content_hash,
+        ))
+        rows = result.all()
+        claims.seed((symbol, coin_id, source, price) for symbol, coin_id, source, price, *_ in rows)
+        if stats is not None:
+            stats.seed(
+                (coin_id, symbol, name, source, market_cap, volume)
+                for symbol, coin_id, source, _price, name, market_cap, volume, _hash in rows
+            )
+        if changes is not None:
+            changes.seed((coin_id, digest) for _symbol, coin_id, *_, digest in rows)
+
+    @staticmethod
+    async def write_batches(
+        session: AsyncSession,
+        queue: "asyncio.Queue",
+        claims: SymbolClaims,
+        checkpoints: CheckpointManager,
+        stats: Optional[StatsAccumulator] = None,
+        changes: Optional[ChangeTracker] = None
+    ) -> int:
+        """
+        Single DB writer: resolve, upsert and commit each queued (normalized) batch in order,
+        then record the source's checkpoint so a crash resumes after it and
+        fold the committed delta into the running stats.
+
+        With `changes`, rows identical to the stored ones are neither
+        rewritten, appended to the price history nor published to live
+        price subscribers.
+        """
+        written = 0
+        while True:
+            item = await queue.get()
+            if item is None:
+                return written
+            source, batch, position = item
+            current_source.set(source)
+            delta = claims.resolve(batch)
+            upserts = delta.upserts
+            if changes is not None:
+                with stage("diff", rows=len(upserts)):
+                    upserts = changes.diff(upserts)
+                    changes.forget(delta.superseded)
+            if delta.superseded:
+                # Lower-priority rows that lost their symbol; committed with the upsert below
+                with stage("write", rows=len(delta.superseded)):
+                    await session.execute(delete(CoinNormalized).where(CoinNormalized.coin_id.in_(delta.superseded)))
+            # Committed together with the first upsert batch below
+            await append_history(session, upserts, int(time.time()))
+            written += await bulk_upsert_coins(session, upserts)
+            if delta.superseded and not upserts:
+                with stage("commit"):
+                    await session.commit()
+            # Live subscribers see the batch as soon as it is committed
+            price_broadcaster.publish(COIN_COLUMNS, upserts)
+            checkpoints.save(source, position)
+            if stats is not None:
+                stats.apply(upserts, delta.superseded)
+
+    @staticmethod
+    async def sweep(session: AsyncSession, changes: ChangeTracker, results: List[SourceResult]) -> List[str]:
+        """
+        Delete the stored rows no source returned during this run (uncommitted).
+
+        Sources must have been fetched unconditionally: a page skipped as
+        unchanged would look like coins that disappeared.
+
+        Skipped unless every source completed: rows a failed source would
+        have returned are kept rather than lost.
+
+        Returns:
+            coin_ids deleted
+        """
+        incomplete = [result.source for result in results if result.status != "completed"]
+        if incomplete:
+            logger.warning(f"⚠️  Full reload incomplete ({', '.join(incomplete)}); keeping rows not returned")
+            return []
+        gone = changes.forget(changes.unseen())
+        batch_size = max(1, settings.db_write_batch_size)
+        for start in range(0, len(gone), batch_size):
+            chunk = gone[start:start + batch_size]
+            with stage("write", rows=len(chunk)):
+                await session.execute(delete(CoinNormalized).where(CoinNormalized.coin_id.in_(chunk)))
+        logger.info(f"🧹 Swept {len(gone)} records no source returned")
+        return gone
+
     @staticmethod
     async def run_all_ingestors(
         session: AsyncSession,
         limit: int = 100,
-        clear_old_records: bool = False
+        clear_old_records: bool = False,
+        registry: Optional[IngestorRegistry] = None,
+        checkpoints: Optional[CheckpointManager] = None,
+        run: Optional[ETLRun] = None
     ) -> int:
         """
         Run complete ETL pipeline.
@@ -39,133 +263,117 @@ class IngestionPipeline:
         Args:
             session: AsyncSession for database operations
             limit: Max records per ingestor
-            clear_old_records: Clear normalized data before ingesting (default: False for incremental)
+            clear_old_records: Replace all normalized data (full reload): every source is
+                re-read from the start and rows no source returns are deleted at the end,
+                while listings keep serving the old ones
+            registry: Sources to run (defaults to CSV + CoinPaprika + CoinGecko)
+            checkpoints: Checkpoint store (defaults to settings.checkpoint_file)
+            run: Already created ETL run to record into (a new one otherwise)
         
         Returns:
-            Number of normalized records inserted
+            Number of normalized records upserted (new or changed)
         """
-        start_time = datetime.utcnow()
+        started = time.perf_counter()
         logger.info("=" * 80)
         logger.info("🚀 STARTING ETL PIPELINE")
         logger.info("=" * 80)
 
         # Step 1: Create ETL Run record
-        run = await ETLService.create_run(session, source="multi-source")
+        if run is None:
+            run = await ETLService.start_run(session, source="multi-source")
+        elif run.status != ETLStatus.RUNNING:
+            # Queued runs are created PENDING by the job runner
+            run.status = ETLStatus.RUNNING
+            await session.commit()
         logger.info(f"📋 ETL Run ID: {run.id}")
+        checkpoints = checkpoints or CheckpointManager()
+        stats = StatsAccumulator()
+        # Fetch/writer tasks created below inherit the run's timings through the context
+        timings = RunTimings()
+        timings_token = current_run.set(timings)
+        changes = ChangeTracker()
         
         try:
-            # Step 2: Clear old data if requested (for full reload)
+            # Step 2: Re-read every source from the start for a full reload
             if clear_old_records:
-                logger.info("🧹 Clearing old normalized records...")
-                await session.execute(delete(CoinNormalized))
-                await session.commit()
-                logger.info("✅ Old records cleared")
-
-            # Step 3: Collect all raw coins from all sources
-            all_coins: List[CoinRaw] = []
-            total_raw = 0
-
-            # 3a: CSV Ingestor
-            logger.info("\n📄 CSV INGESTION")
-            logger.info("-" * 40)
-            try:
-                csv_ingestor = CSVIngestor("data/coins_source.csv")
-                csv_coins = await csv_ingestor.ingest(limit)
-                all_coins.extend(csv_coins)
-                total_raw += len(csv_coins)
-                logger.info(f"✅ CSV: {len(csv_coins)} coins ingested")
-            except Exception as e:
-                logger.error(f"❌ CSV Ingestor failed: {e}")
-                # Don't fail entire pipeline if one source fails
-                pass
+                logger.info("🧹 Full reload: records no source returns will be swept")
+                checkpoints.reset()
 
-            # 3b: CoinPaprika Ingestor
-            logger.info("\n💰 COINPAPRIKA INGESTION")
-            logger.info("-" * 40)
-            try:
-                paprika_ingestor = CoinPaprikaIngestor()
-                paprika_coins = await paprika_ingestor.ingest(limit)
-                all_coins.extend(paprika_coins)
-                total_raw += len(paprika_coins)
-                logger.info(f"✅ CoinPaprika: {len(paprika_coins)} coins ingested")
-            except Exception as e:
-                logger.error(f"❌ CoinPaprika Ingestor failed: {e}")
-                pass
+            # Step 3: Fan out all registered sources concurrently into a bounded
+            # queue; a single writer normalizes, diffs, upserts and checkpoints each batch
+            claims = SymbolClaims()
+            # A full reload starts from empty claims, as if the table were empty;
+            # the stored hashes still spare rewriting rows that did not change
+            await IngestionPipeline.load_claims(
+                session, SymbolClaims() if clear_old_records else claims, stats, changes
+            )
+            queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.pipeline_queue_batches))
 
-            # 3c: CoinGecko Ingestor
-            logger.info("\n🦎 COINGECKO INGESTION")
-            logger.info("-" * 40)
+            async def enqueue(source: str, coins: RawBatch, position: Dict[str, Any]) -> None:
+                # Normalized by the fetching task, so sources use separate cores;
+                # the writer only resolves claims, which must happen in order
+                batch: NormalizedBatch = await normalize_batch(source, coins, claims.source_priority)
+                await queue.put((source, batch, position))
+
+            writer = asyncio.create_task(
+                IngestionPipeline.write_batches(session, queue, claims, checkpoints, stats, changes)
+            )
+            fetcher = asyncio.create_task(
+                IngestionPipeline.fetch_all(
+                    registry or default_registry(), limit, enqueue, checkpoints,
+                    # A full reload sweeps whatever was not returned, so nothing may be skipped
+                    conditional=not clear_old_records,
+                )
+            )
             try:
-                gecko_ingestor = CoinGeckoIngestor()
-                gecko_coins = await gecko_ingestor.ingest(limit)
-                all_coins.extend(gecko_coins)
-                total_raw += len(gecko_coins)
-                logger.info(f"✅ CoinGecko: {len(gecko_coins)} coins ingested")
-            except Exception as e:
-                logger.error(f"❌ CoinGecko Ingestor failed: {e}")
-                pass
+                done, _ = await asyncio.wait({writer, fetcher}, return_when=asyncio.FIRST_COMPLETED)
+                if writer in done:
+                    # The writer only returns early by raising
+                    writer.result()
+                results = await fetcher
+                await queue.put(None)
+                normalized_count = await writer
+            finally:
+                for task in (fetcher, writer):
+                    task.cancel()
+                await asyncio.gather(fetcher, writer, return_exceptions=True)
+
+            for result in results:
+                if result.status == "completed":
+                    checkpoints.complete(result.source, result.checkpoint)
+            total_raw = sum(result.records for result in results)
+            run.source_stats = {result.source: result.as_dict() for result in results}
+
+            if clear_old_records:
+                stats.apply([], await IngestionPipeline.sweep(session, changes, results))
 
             logger.info("\n" + "=" * 40)
             logger.info(f"📊 Total raw records: {total_raw}")
             logger.info("=" * 40)
-
-            # Step 4: Normalize and insert data
-            logger.info("\n🔄 NORMALIZATION PHASE")
-            logger.info("-" * 40)
-            
-            normalized_count = 0
-            deduplicate_by_symbol = {}  # Track coins by symbol to avoid duplicates
-
-            for coin in all_coins:
-                try:
-                    symbol_upper = coin.symbol.upper()
-                    
-                    # Deduplication: Keep the one with price (prioritize non-null prices)
-                    if symbol_upper in deduplicate_by_symbol:
-                        existing = deduplicate_by_symbol[symbol_upper]
-                        if coin.price_usd and not existing.price_usd:
-                            deduplicate_by_symbol[symbol_upper] = coin
-                        continue
-                    else:
-                        deduplicate_by_symbol[symbol_upper] = coin
-
-                    # Create normalized record
-                    normalized_model = CoinNormalized(
-                        coin_id=coin.id.lower(),
-                        symbol=symbol_upper,
-                        name=coin.name,
-                        price_usd=Decimal(str(coin.price_usd)) if coin.price_usd else None,
-                        market_cap_usd=Decimal(str(coin.market_cap_usd)) if coin.market_cap_usd else None,
-                        volume_24h_usd=Decimal(str(coin.volume_24h_usd)) if coin.volume_24h_usd else None,
-                        platform_id=coin.platform_id,
-                        source=coin.id.split('_')[0] if '_' in coin.id else "unknown",
-                    )
-                    session.add(normalized_model)
-                    normalized_count += 1
-
-                except Exception as e:
-                    logger.warning(f"⚠️  Failed to normalize coin {coin.symbol}: {e}")
-                    continue
-
-            # Batch commit
             if normalized_count > 0:
-                await session.commit()
-                logger.info(f"✅ Normalized and inserted: {normalized_count} records")
+                logger.info(f"✅ Normalized and upserted: {normalized_count} records")
+            elif changes.unchanged:
+                logger.info(f"💤 No changes: all {changes.unchanged} normalized records match the stored ones")
             else:
                 logger.warning("⚠️  No records normalized")
+            logger.info(f"🔁 Delta: {changes.as_dict()}")
 
-            # Step 5: Update ETL Run with success
-            run.status = "completed"
+            # Step 6: Update ETL Run with success
+            run.status = ETLStatus.COMPLETED
             run.total_records = total_raw
-            run.processed_records = normalized_count
+            run.processed_records = normalized_count + changes.unchanged
+            run.delta_count = changes.delta_count
             run.completed_at = datetime.utcnow()
-            
-            if run.started_at:
-                duration = (run.completed_at - run.started_at).total_seconds()
-                run.duration_seconds = int(duration)
-                logger.info(f"⏱️  Duration: {run.duration_seconds}s")
+            duration = time.perf_counter() - started
+            run.duration_seconds = round(duration, 4)
+            run.stage_timings = timings.as_dict()
+            logger.info(f"⏱️  Duration: {duration:.2f}s (slowest stage: {run.stage_timings['bottleneck']})")
 
+            await StatsService.save_snapshot(session, stats, run, duration)
             await session.commit()
+            bump_version()
+            RUNS.inc(status=ETLStatus.COMPLETED.value)
+            RUN_SECONDS.observe(duration)
 
             logger.info("\n" + "=" * 80)
             logger.info(f"✅ ETL PIPELINE COMPLETED SUCCESSFULLY")
@@ -175,18 +383,29 @@ class IngestionPipeline:
             return normalized_count
 
         except Exception as e:
-            # Step 5: Handle failure
+            # Step 6: Handle failure
             logger.error(f"\n❌ ETL PIPELINE FAILED: {e}", exc_info=True)
             
-            run.status = "failed"
+            await session.rollback()
+            # Rollback expired the run row; reload it before reading it back
+            await session.refresh(run)
+            run.status = ETLStatus.FAILED
             run.error_message = str(e)
             run.completed_at = datetime.utcnow()
-            
-            if run.started_at:
-                duration = (run.completed_at - run.started_at).total_seconds()
-                run.duration_seconds = int(duration)
-
+            run.delta_count = changes.delta_count
+            duration = time.perf_counter() - started
+            run.duration_seconds = round(duration, 4)
+            run.stage_timings = timings.as_dict()
+            if clear_old_records:
+                # The rolled back sweep may already be folded into the stats
+                stats = StatsAccumulator()
+                await IngestionPipeline.load_claims(session, SymbolClaims(), stats)
+            # Batches committed before the failure are already visible
+            await StatsService.save_snapshot(session, stats, run, duration)
             await session.commit()
+            bump_version()
+            RUNS.inc(status=ETLStatus.FAILED.value)
+            RUN_SECONDS.observe(duration)
             
             logger.info("\n" + "=" * 80)
             logger.info(f"❌ ETL PIPELINE FAILED")
@@ -195,51 +414,52 @@ class IngestionPipeline:
             
             raise
 
+        finally:
+            current_run.reset(timings_token)
+
     @staticmethod
     async def run_incremental(
         session: AsyncSession,
         limit: int = 50,
-        last_n_hours: int = 24
+        run: Optional[ETLRun] = None
     ) -> int:
         """
-        Run incremental ETL (only process new/updated records).
+        Run incremental ETL (only write new/changed records).
+        
+        Sources resume from their checkpoints and unchanged coins are
+        skipped by content hash. Nothing is deleted by age: a coin whose
+        price did not move keeps its old updated_at.
         
         Args:
             session: AsyncSession for database operations
             limit: Max records per ingestor
-            last_n_hours: Only keep records updated in last N hours
+            run: Already created ETL run to record into
         
         Returns:
-            Number of new normalized records inserted
+            Number of new or changed normalized records written
         """
         logger.info("🔄 Starting INCREMENTAL ETL pipeline")
         
-        # Delete records older than last_n_hours
-        cutoff_time = datetime.utcnow() - timedelta(hours=last_n_hours)
-        deleted_result = await session.execute(
-            delete(CoinNormalized).where(CoinNormalized.updated_at < cutoff_time)
-        )
-        await session.commit()
-        logger.info(f"🧹 Removed {deleted_result.rowcount} old records (older than {last_n_hours}h)")
-        
-        # Run normal ingestion on fresh data
         return await IngestionPipeline.run_all_ingestors(
             session,
             limit=limit,
-            clear_old_records=False
+            clear_old_records=False,
+            run=run
         )
 
     @staticmethod
     async def run_full_reload(
         session: AsyncSession,
-        limit: int = 250
+        limit: int = 250,
+        run: Optional[ETLRun] = None
     ) -> int:
         """
-        Run full reload ETL (clear everything and re-ingest).
+        Run full reload ETL (re-ingest everything, then drop what no source returned).
         
         Args:
             session: AsyncSession for database operations
             limit: Max records per ingestor (higher for full reload)
+            run: Already created ETL run to record into
         
         Returns:
             Number of normalized records inserted
@@ -249,5 +469,6 @@ class IngestionPipeline:
         return await IngestionPipeline.run_all_ingestors(
             session,
             limit=limit,
-            clear_old_records=True
+            clear_old_records=True,
+            run=run
         )
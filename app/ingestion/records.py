@@ -0,0 +1,114 @@
+"""Lightweight raw-coin records for the ingestion hot path (pydantic stays at the API boundary)."""
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+from app.schemas.coin_raw import CoinRaw
+
+RAW_COLUMNS = ("id", "symbol", "name", "platform_id", "price_usd", "market_cap_usd", "volume_24h_usd")
+_raw_values = attrgetter(*RAW_COLUMNS)
+
+
+class RawRecord:
+    """One raw coin as a source reported it; a slotted stand-in for CoinRaw without validation."""
+
+    __slots__ = RAW_COLUMNS
+
+    def __init__(
+        self,
+        id: str,
+        symbol: str,
+        name: str,
+        platform_id: Optional[str] = None,
+        price_usd: Optional[float] = None,
+        market_cap_usd: Optional[float] = None,
+        volume_24h_usd: Optional[float] = None,
+    ):
+        self.id = id
+        self.symbol = symbol
+        self.name = name
+        self.platform_id = platform_id
+        self.price_usd = price_usd
+        self.market_cap_usd = market_cap_usd
+        self.volume_24h_usd = volume_24h_usd
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, RawRecord):
+            return NotImplemented
+        return _raw_values(self) == _raw_values(other)
+
+    __hash__ = None  # type: ignore[assignment]  # compared by value, so unhashable
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(RAW_COLUMNS, _raw_values(self)))
+        return f"RawRecord({fields})"
+
+
+class RawBatch:
+    """
+    Struct-of-arrays batch of raw coins: one list per RAW_COLUMNS field.
+
+    What ingestors yield and the normalizer consumes. There is no object
+    per row, only the column lists and their values, and the lists pickle
+    as they are to a CPU worker (see normalizer.normalize_batch).
+    Iterating or indexing builds RawRecord views for code that wants rows.
+    """
+
+    __slots__ = ("columns", "fetched_at")
+
+    def __init__(self, columns: Optional[Iterable[List[Any]]] = None, fetched_at: Optional[datetime] = None):
+        self.columns = tuple(columns) if columns is not None else tuple([] for _ in RAW_COLUMNS)
+        if len(self.columns) != len(RAW_COLUMNS):
+            raise ValueError(f"RawBatch needs {len(RAW_COLUMNS)} columns ({', '.join(RAW_COLUMNS)})")
+        self.fetched_at = fetched_at or datetime.utcnow()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any], fetched_at: Optional[datetime] = None) -> "RawBatch":
+        """Transpose records with the RAW_COLUMNS attributes (RawRecord, CoinRaw)."""
+        rows = list(map(_raw_values, records))
+        if not rows:
+            return cls(fetched_at=fetched_at)
+        return cls(map(list, zip(*rows)), fetched_at)
+
+    @classmethod
+    def of(cls, coins: Union["RawBatch", Iterable[Any]]) -> "RawBatch":
+        """`coins` itself if it is a batch already, else its records transposed."""
+        return coins if isinstance(coins, RawBatch) else cls.from_records(coins)
+
+    def append(self, record: RawRecord) -> None:
+        for column, value in zip(self.columns, _raw_values(record)):
+            column.append(value)
+
+    def extend(self, other: "RawBatch") -> None:
+        for column, values in zip(self.columns, other.columns):
+            column.extend(values)
+
+    def column(self, name: str) -> List[Any]:
+        return self.columns[RAW_COLUMNS.index(name)]
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __iter__(self) -> Iterator[RawRecord]:
+        for values in zip(*self.columns):
+            yield RawRecord(*values)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RawRecord, "RawBatch"]:
+        if isinstance(index, slice):
+            return RawBatch([column[index] for column in self.columns], self.fetched_at)
+        return RawRecord(*(column[index] for column in self.columns))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RawBatch):
+            return self.columns == other.columns
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]  # compared by value, so unhashable
+
+    def __repr__(self) -> str:
+        return f"RawBatch({len(self)} rows, fetched_at={self.fetched_at.isoformat()})"
+
+
+# What ingestors may return: a RawBatch, or records with the RAW_COLUMNS attributes
+RawCoins = Union[RawBatch, Sequence[RawRecord], Sequence[CoinRaw]]
@@ -0,0 +1,55 @@
+"""Pluggable registry of ingestion sources fanned out by the pipeline."""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from app.core.config import settings
+from app.ingestion.base import BaseIngestor
+from app.ingestion.csv_ingestor import CSVIngestor
+from app.ingestion.coinpaprika_ingestor import CoinPaprikaIngestor
+from app.ingestion.coingecko_ingestor import CoinGeckoIngestor
+
+
+@dataclass
+class IngestorSpec:
+    """How to build one source and how long it may run."""
+    name: str
+    factory: Callable[[], BaseIngestor]
+    timeout: Optional[float] = None
+
+
+class IngestorRegistry:
+    """Ordered collection of ingestor specs keyed by name."""
+
+    def __init__(self):
+        self._specs: Dict[str, IngestorSpec] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], BaseIngestor],
+        timeout: Optional[float] = None
+    ) -> IngestorSpec:
+        """Register (or replace) a source. `timeout` overrides the global default."""
+        spec = IngestorSpec(name=name, factory=factory, timeout=timeout)
+        self._specs[name] = spec
+        return spec
+
+    def unregister(self, name: str) -> None:
+        self._specs.pop(name, None)
+
+    def specs(self) -> List[IngestorSpec]:
+        return list(self._specs.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+
+def default_registry() -> IngestorRegistry:
+    """Registry with the built-in CSV, CoinPaprika and CoinGecko sources."""
+    registry = IngestorRegistry()
+    registry.register("csv", lambda: CSVIngestor(settings.csv_source_path))
+    registry.register("coinpaprika", CoinPaprikaIngestor)
+    registry.register("coingecko", CoinGeckoIngestor)
+    return registry
@@ -0,0 +1,291 @@
+"""Streaming CSV uploads: parse the request body as it arrives, never buffering the whole file."""
+import asyncio
+import csv
+import io
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+import pandas as pd
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import stage
+from app.ingestion.base import BaseIngestor
+from app.ingestion.csv_ingestor import KNOWN_COLUMNS, TEXT_COLUMNS, frame_to_batch
+from app.ingestion.records import RawBatch
+
+# python-multipart as pinned in requirements.txt (renamed python_multipart from 0.0.13)
+from multipart.exceptions import FormParserError
+from multipart.multipart import MultipartParser, parse_options_header
+
+REQUIRED_COLUMNS = frozenset({"symbol"})
+
+
+class UploadError(ValueError):
+    """The upload is not a usable CSV (bad framing, missing file field or header)."""
+
+
+class UploadStream:
+    """
+    File bytes of a CSV upload, pulled from the raw request body on demand.
+
+    Accepts a raw `text/csv` (or octet-stream) body, or `multipart/form-data`
+    with the file in `field`. Multipart bodies go through python-multipart's
+    incremental parser, so nothing is spooled to disk or held beyond the
+    chunk currently being handled.
+    """
+
+    def __init__(self, body: AsyncIterator[bytes], content_type: str, field: str = "file", filename: Optional[str] = None):
+        self.filename = filename
+        self.bytes_received = 0
+        self._body = body.__aiter__()
+        self._pending: Deque[bytes] = deque()
+        self._parser: Optional[MultipartParser] = None
+        self._eof = False
+
+        media_type, options = parse_options_header(content_type or "")
+        if media_type == b"multipart/form-data":
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise UploadError("multipart body without a boundary")
+            self._field = field
+            self._headers: Dict[bytes, bytes] = {}
+            self._header_field = b""
+            self._header_value = b""
+            self._in_file = False
+            self._file_seen = False
+            self._parser = MultipartParser(boundary, {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            })
+
+    # python-multipart callbacks
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        name = options.get(b"name", b"").decode("latin-1")
+        self._in_file = name == self._field and not self._file_seen
+        if self._in_file:
+            self._file_seen = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
+
+    async def _pull(self) -> bool:
+        """Read one body chunk into `_pending`; False once the body is exhausted."""
+        if self._eof:
+            return False
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            if self._parser is not None:
+                self._parser.finalize()
+            return False
+        self.bytes_received += len(chunk)
+        if self._parser is None:
+            self._pending.append(chunk)
+            return True
+        try:
+            self._parser.write(chunk)
+        except FormParserError as e:
+            raise UploadError(f"malformed multipart body: {e}") from e
+        return True
+
+    async def open(self) -> None:
+        """
+        Read just far enough to know the file's name (multipart part headers).
+
+        Raises:
+            UploadError: the multipart body has no `field` part
+        """
+        if self._parser is None:
+            return
+        while not self._file_seen and await self._pull():
+            pass
+        if not self._file_seen:
+            raise UploadError(f"multipart body has no '{self._field}' file field")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            while self._pending:
+                yield self._pending.popleft()
+            if not await self._pull():
+                while self._pending:
+                    yield self._pending.popleft()
+                return
+
+
+class CSVStreamIngestor(BaseIngestor):
+    """
+    CSV rows parsed from an async byte stream in bounded batches.
+
+    Bytes are cut at record boundaries (newlines outside quoted fields) and
+    each batch of complete records is parsed with pandas using the header
+    read up front, so memory holds one batch plus one body chunk.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], name: str = "csv:upload"):
+        self.name = name
+        self.rows = 0
+        self.columns: List[str] = []
+        self._chunks = chunks.__aiter__()
+        self._buffer = bytearray()
+        # Scan state for the unterminated record at the end of _buffer
+        self._scanned = 0
+        self._cut = 0
+        self._in_quotes = False
+        self._records = 0
+        self._exhausted = False
+
+    def get_source_name(self) -> str:
+        return self.name
+
+    def checkpoint(self) -> Dict[str, Any]:
+        # A request body cannot be replayed, so this is progress, not a resume point
+        return {"rows": self.rows}
+
+    async def ingest(self, limit: int = 1000) -> RawBatch:
+        coins = RawBatch()
+        async for batch in self.stream(limit):
+            coins.extend(batch)
+        return coins
+
+    def _complete_records(self) -> None:
+        """Advance `_cut` to just past the last record boundary in the buffer."""
+        buffer = self._buffer
+        if not self._in_quotes and buffer.find(b'"', self._scanned) < 0:
+            # Fast path: no quoting in the new bytes, every newline ends a record
+            cut = buffer.rfind(b"\n")
+            if cut >= self._scanned:
+                self._records += buffer.count(b"\n", self._scanned, cut + 1)
+                self._cut = cut + 1
+            self._scanned = len(buffer)
+            return
+
+        # Quoted fields may contain newlines: track quote parity line by line.
+        # The trailing partial line is rescanned once its newline arrives.
+        line_start = self._scanned
+        while True:
+            newline = buffer.find(b"\n", line_start)
+            if newline < 0:
+                break
+            if buffer.count(b'"', line_start, newline) % 2:
+                self._in_quotes = not self._in_quotes
+            if not self._in_quotes:
+                self._cut = newline + 1
+                self._records += 1
+            line_start = newline + 1
+        self._scanned = line_start
+
+    async def _fill(self) -> bool:
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._exhausted = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def _take(self, cut: int) -> bytes:
+        block = bytes(self._buffer[:cut])
+        del self._buffer[:cut]
+        self._scanned = max(0, self._scanned - cut)
+        self._cut = max(0, self._cut - cut)
+        return block
+
+    def _check_record_size(self) -> None:
+        if len(self._buffer) - self._cut > settings.upload_max_record_bytes:
+            raise UploadError(
+                f"record longer than {settings.upload_max_record_bytes} bytes (unterminated quote or not a CSV?)"
+            )
+
+    async def read_header(self) -> List[str]:
+        """
+        Read and validate the header line.
+
+        Raises:
+            UploadError: empty body, or no `symbol` column
+        """
+        if self.columns:
+            return self.columns
+        while (newline := self._buffer.find(b"\n")) < 0:
+            self._check_record_size()
+            if not await self._fill():
+                break
+        header = self._take(newline + 1 if newline >= 0 else len(self._buffer)).decode("utf-8-sig").strip()
+        if not header:
+            raise UploadError("empty CSV upload")
+        self.columns = [column.strip() for column in next(csv.reader([header]))]
+        missing = REQUIRED_COLUMNS - set(self.columns)
+        if missing:
+            raise UploadError(f"CSV header is missing required columns: {sorted(missing)}")
+        return self.columns
+
+    def _parse(self, block: bytes) -> pd.DataFrame:
+        return pd.read_csv(
+            io.BytesIO(block),
+            header=None,
+            names=self.columns,
+            usecols=lambda column: column in KNOWN_COLUMNS,
+            dtype={column: str for column in TEXT_COLUMNS if column in self.columns},
+        )
+
+    def _parse_coins(self, block: bytes, max_rows: int) -> RawBatch:
+        return frame_to_batch(self._parse(block).iloc[:max_rows])
+
+    async def stream(self, limit: int = 1000, batch_size: Optional[int] = None) -> AsyncIterator[RawBatch]:
+        """Yield batches of up to `batch_size` rows until the body ends or `limit` rows are read."""
+        await self.read_header()
+        batch_rows = max(1, batch_size or settings.max_ingestion_batch)
+        while self.rows < limit:
+            with stage("fetch"):
+                while self._records < batch_rows and not self._exhausted:
+                    if await self._fill():
+                        self._complete_records()
+                        self._check_record_size()
+
+            cut = self._cut
+            if self._exhausted and len(self._buffer) > cut:
+                if self._in_quotes ^ bool(self._buffer.count(b'"', self._scanned) % 2):
+                    raise UploadError("CSV ends inside a quoted field")
+                # Last record without a trailing newline
+                cut = len(self._buffer)
+            if not cut:
+                return
+
+            self._records = 0
+            block = self._take(cut)
+            if not block.strip():
+                continue
+            with stage("parse") as timed:
+                # Off the event loop: the request body keeps streaming in meanwhile
+                coins = await run_blocking(self._parse_coins, block, limit - self.rows)
+                timed["rows"] = len(coins)
+            if not coins:
+                continue
+            self.rows += len(coins)
+            yield coins
+            # Let the writer commit and other requests run between batches
+            await asyncio.sleep(0)
@@ -0,0 +1,147 @@
+"""Batched writers for the coin_normalized and coin_price_history tables."""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.metrics import stage
+from app.ingestion.changes import content_hash
+from app.models import CoinNormalized, CoinPriceHistory
+
+logger = logging.getLogger(__name__)
+
+# Column order for tuple rows
+COIN_COLUMNS = (
+    "coin_id",
+    "symbol",
+    "name",
+    "price_usd",
+    "market_cap_usd",
+    "volume_24h_usd",
+    "platform_id",
+    "source",
+)
+
+Row = Union[Mapping[str, Any], Sequence[Any]]
+
+
+def _insert_for(dialect_name: str):
+    """Dialect-specific INSERT supporting ON CONFLICT."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Unsupported dialect: {dialect_name}")
+    return insert
+
+
+def _as_dict(row: Row) -> Dict[str, Any]:
+    if isinstance(row, Mapping):
+        return {column: row.get(column) for column in COIN_COLUMNS}
+    return dict(zip(COIN_COLUMNS, row))
+
+
+def _batches(rows: Iterable[Row], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Chunk rows, keeping only the last row per coin_id within a chunk.
+
+    Postgres rejects an ON CONFLICT statement that touches the same row twice.
+    """
+    batch: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        values = _as_dict(row)
+        batch[values["coin_id"]] = values
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def build_upsert(dialect_name: str):
+    """INSERT ... ON CONFLICT (coin_id) DO UPDATE for coin_normalized."""
+    insert = _insert_for(dialect_name)
+    table = CoinNormalized.__table__
+    stmt = insert(table)
+    update_columns = {
+        column: stmt.excluded[column]
+        for column in COIN_COLUMNS + ("updated_at", "content_hash") if column != "coin_id"
+    }
+    return stmt.on_conflict_do_update(index_elements=[table.c.coin_id], set_=update_columns)
+
+
+async def bulk_upsert_coins(
+    session: AsyncSession,
+    rows: Iterable[Row],
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Upsert normalized coins in batches, committing once per batch.
+
+    Each row is stored with its content_hash, which the next run's
+    ChangeTracker compares against to skip unchanged coins.
+
+    Args:
+        session: AsyncSession for database operations
+        rows: Dicts keyed by column name, or tuples in COIN_COLUMNS order
+        batch_size: Rows per statement/commit (defaults to settings.db_write_batch_size)
+
+    Returns:
+        Number of rows written
+    """
+    batch_size = max(1, batch_size or settings.db_write_batch_size)
+    stmt = build_upsert(session.bind.dialect.name)
+
+    written = 0
+    for batch in _batches(rows, batch_size):
+        # One app-side timestamp per batch (rather than the DB's now()) keeps
+        # updated_at in a single format/precision, which keyset cursors compare against
+        updated_at = datetime.now(timezone.utc)
+        for values in batch:
+            values["updated_at"] = updated_at
+            values["content_hash"] = content_hash([values[column] for column in COIN_COLUMNS])
+        with stage("write", rows=len(batch)):
+            await session.execute(stmt, batch)
+        with stage("commit"):
+            await session.commit()
+        written += len(batch)
+        logger.debug(f"Upserted batch of {len(batch)} coins ({written} total)", extra={"hot": True})
+    return written
+
+
+async def append_history(
+    session: AsyncSession,
+    rows: Iterable[Row],
+    ts: int,
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Append one price point per priced row at epoch second `ts`.
+
+    Does not commit: the points land in the same transaction as the upsert
+    of the rows they came from. A repeated (coin_id, ts) is ignored.
+
+    Returns:
+        Number of points offered (duplicates included)
+    """
+    batch_size = max(1, batch_size or settings.db_write_batch_size)
+    stmt = _insert_for(session.bind.dialect.name)(CoinPriceHistory.__table__).on_conflict_do_nothing(
+        index_elements=["coin_id", "ts"]
+    )
+    points: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        values = _as_dict(row)
+        if values["price_usd"] is None:
+            continue
+        points[values["coin_id"]] = {
+            "coin_id": values["coin_id"],
+            "ts": ts,
+            "price_usd": values["price_usd"],
+            "market_cap_usd": values["market_cap_usd"],
+            "volume_24h_usd": values["volume_24h_usd"],
+        }
+    batch = list(points.values())
+    for start in range(0, len(batch), batch_size):
+        with stage("write", rows=len(batch[start:start + batch_size])):
+            await session.execute(stmt, batch[start:start + batch_size])
+    return len(batch)
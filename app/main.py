@@ -3,10 +3,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.db import db
+from app.core.executor import shutdown_executors
+from app.core.http import http_client
 from app.core.config import settings
-from app.core.logging_config import setup_logging
-from app.api import routes_health, routes_data, routes_stats
-from app.ingestion.pipeline import IngestionPipeline
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.api import routes_health, routes_data, routes_stats, routes_etl, routes_coins, routes_metrics, routes_stream
+from app.ingestion.jobs import job_runner
 
 # Setup logging
 setup_logging()
@@ -23,24 +25,36 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Database init warning: {e}")
     
-    # Optional: Run ETL on startup
-    try:
-        logger.info("🔄 Running initial ETL pipeline...")
-        async with db.session_factory() as session:
-            records = await IngestionPipeline.run_all_ingestors(session, limit=50)
-            logger.info(f"✅ ETL pipeline completed: {records} normalized records inserted")
-    except Exception as e:
-        logger.warning(f"⚠️ Initial ETL failed (non-critical): {e}")
+    # ETL runs in the background; startup does not wait for it. With several
+    # workers only the elected leader ingests and schedules, the rest follow.
+    job_runner.start()
+
+    async def on_elected():
+        try:
+            if settings.etl_run_on_startup:
+                run_id, _ = await job_runner.submit("ingest", limit=settings.etl_startup_limit)
+                logger.info(f"🔄 Initial ETL queued as run {run_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Initial ETL could not be queued (non-critical): {e}")
+        job_runner.schedule("incremental", settings.etl_incremental_interval_seconds)
+        job_runner.schedule("full_reload", settings.etl_full_reload_interval_seconds)
+
+    job_runner.lead(on_elected)
+    job_runner.follow(settings.cache_sync_interval_seconds)
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Kasparro Backend...")
+    await job_runner.stop()
+    await http_client.close()
+    shutdown_executors()
     try:
         await db.close()
         logger.info("✅ Database closed")
     except Exception as e:
         logger.warning(f"Database close warning: {e}")
+    await shutdown_logging()
 
 # Create FastAPI app
 app = FastAPI(
@@ -63,6 +77,10 @@ app.add_middleware(
 app.include_router(routes_health.router, prefix="/health", tags=["health"])
 app.include_router(routes_data.router, prefix="/data", tags=["data"])
 app.include_router(routes_stats.router, prefix="/stats", tags=["stats"])
+app.include_router(routes_etl.router, prefix="/etl", tags=["etl"])
+app.include_router(routes_coins.router, prefix="/coins", tags=["coins"])
+app.include_router(routes_metrics.router, tags=["metrics"])
+app.include_router(routes_stream.router, tags=["stream"])
 
 # Root endpoint
 @app.get("/")
@@ -76,6 +94,11 @@ async def root():
             "health": "/health/",
             "data": "/data/coins",
             "stats": "/stats/",
+            "etl_runs": "/etl/runs",
+            "price_history": "/coins/{symbol}/history",
+            "search": "/coins/search?q=",
+            "metrics": "/metrics",
+            "live_prices": ["/ws/prices", "/sse/prices"],
             "docs": "/docs",
             "redoc": "/redoc",
         }
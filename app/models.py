@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, JSON, Index
 from sqlalchemy.sql import func
 from app.core.db import Base
 from enum import Enum as PyEnum
@@ -8,6 +8,7 @@ class ETLStatus(str, PyEnum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class CoinRaw(Base):
     __tablename__ = "coin_raw"
@@ -32,7 +33,28 @@ class CoinNormalized(Base):
     market_cap_usd = Column(Float, nullable=True)
     volume_24h_usd = Column(Float, nullable=True)
     platform_id = Column(String, nullable=True)
+    source = Column(String, index=True, nullable=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Hash of the written values (app.ingestion.changes.content_hash); unchanged coins are not rewritten
+    content_hash = Column(String(16), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination: ORDER BY updated_at DESC, id DESC
+        Index("ix_coin_normalized_updated_at_id", "updated_at", "id"),
+        # Case-insensitive name prefix lookups (the search fallback without the in-memory index)
+        Index("ix_coin_normalized_name_lower", func.lower(name)),
+    )
+
+class CoinPriceHistory(Base):
+    """Append-only price points, one per coin per ETL batch."""
+    __tablename__ = "coin_price_history"
+    # The composite key is the (coin_id, ts) index range queries walk; no surrogate id
+    coin_id = Column(String, primary_key=True)
+    # Unix epoch seconds: compact, and bucketable with integer arithmetic in SQL
+    ts = Column(Integer, primary_key=True)
+    price_usd = Column(Float, nullable=False)
+    market_cap_usd = Column(Float, nullable=True)
+    volume_24h_usd = Column(Float, nullable=True)
 
 class ETLRun(Base):
     __tablename__ = "etl_runs"
@@ -44,3 +66,25 @@ class ETLRun(Base):
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
+    # Per-source breakdown: {source: {status, records, duration_seconds, error}}
+    source_stats = Column(JSON, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    # Time per pipeline stage: {stages: {stage: {seconds, calls, rows}}, db_roundtrips, bottleneck}
+    stage_timings = Column(JSON, nullable=True)
+    # Rows inserted, updated or deleted in coin_normalized (unchanged coins are skipped)
+    delta_count = Column(Integer, nullable=True)
+
+class StatsSnapshot(Base):
+    """Single-row (id=1) aggregate view of coin_normalized, rewritten at the end of each run."""
+    __tablename__ = "stats_snapshot"
+    id = Column(Integer, primary_key=True)
+    total_coins = Column(Integer, default=0)
+    coins_by_source = Column(JSON, nullable=True)
+    total_market_cap_usd = Column(Float, default=0.0)
+    total_volume_24h_usd = Column(Float, default=0.0)
+    top_by_market_cap = Column(JSON, nullable=True)
+    top_by_volume = Column(JSON, nullable=True)
+    last_run = Column(JSON, nullable=True)
+    # Incremented on every save; workers poll it to invalidate their caches
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
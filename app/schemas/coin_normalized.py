@@ -15,3 +15,4 @@ class CoinNormalized(BaseModel):
     
     class Config:
         from_attributes = True
+
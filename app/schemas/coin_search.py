@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+class CoinSearchHit(BaseModel):
+    coin_id: str
+    symbol: str
+    name: str
+    market_cap_usd: Optional[float] = None
+    # exact symbol/id, prefix of a symbol/name word/id, or fuzzy (trigram / edit distance)
+    match: Literal["exact", "prefix", "fuzzy"]
+    score: float
+
+class CoinSearchResults(BaseModel):
+    query: str
+    results: List[CoinSearchHit]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -8,6 +8,7 @@ class ETLStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class ETLRunsCreate(BaseModel):
     source: str
@@ -23,6 +24,10 @@ class ETLRuns(BaseModel):
     started_at: datetime
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    source_stats: Optional[Dict[str, Any]] = None
+    duration_seconds: Optional[float] = None
+    stage_timings: Optional[Dict[str, Any]] = None
+    delta_count: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class OHLCBucket(BaseModel):
+    ts: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume_24h_usd: Optional[float] = None
+    market_cap_usd: Optional[float] = None
+    samples: int
+
+class PriceHistory(BaseModel):
+    coin_id: str
+    symbol: str
+    interval_seconds: int
+    start: datetime
+    end: datetime
+    buckets: List[OHLCBucket]
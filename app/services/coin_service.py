@@ -1,47 +1,175 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import literal, select, func, text, tuple_
+from app.core.cache import TTLCache, cached
+from app.core.config import settings
+from app.core.serialization import dumps, dumps_ndjson, loads
 from app.models import CoinNormalized
 from app.schemas.coin_normalized import CoinNormalized as CoinNormalizedSchema
-from typing import List, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+import base64
+import binascii
 import logging
 
 logger = logging.getLogger(__name__)
 
+coin_cache = TTLCache("coins")
+# Backs approximate totals; short TTL because inserts between runs are allowed
+count_cache = TTLCache("counts", maxsize=256, ttl=settings.count_cache_ttl_seconds)
+
+# Fields of a listed coin, in row order; listings select just these (plus the id for cursors)
+COIN_FIELDS = (
+    "coin_id",
+    "symbol",
+    "name",
+    "price_usd",
+    "market_cap_usd",
+    "volume_24h_usd",
+    "platform_id",
+    "updated_at",
+)
+
+
+@dataclass
+class CoinPage:
+    """A page of coin rows: tuples in COIN_FIELDS order followed by the primary key."""
+    items: List[Sequence[Any]]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_exact: bool = False
+
+
+def encode_cursor(updated_at: datetime, coin_pk: int) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(dumps([updated_at.isoformat(), coin_pk])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError on anything that is not a cursor we issued."""
+    try:
+        updated_at, coin_pk = loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(updated_at), int(coin_pk)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
 class CoinService:
     @staticmethod
+    def _filtered(query, source: str | None, symbol: str | None):
+        if source:
+            query = query.where(CoinNormalized.source == source)
+        if symbol:
+            query = query.where(CoinNormalized.symbol == symbol.upper())
+        return query
+
+    @staticmethod
+    def _listing(source: str | None, symbol: str | None, cursor: str | None):
+        """Listing columns, newest first, after `cursor`. Raises ValueError on a bad cursor."""
+        columns = [getattr(CoinNormalized, field) for field in COIN_FIELDS] + [CoinNormalized.id]
+        query = CoinService._filtered(select(*columns), source, symbol)
+        if cursor:
+            updated_at, coin_pk = decode_cursor(cursor)
+            after = tuple_(
+                literal(updated_at, CoinNormalized.updated_at.type), literal(coin_pk, CoinNormalized.id.type)
+            )
+            query = query.where(tuple_(CoinNormalized.updated_at, CoinNormalized.id) < after)
+        return query.order_by(CoinNormalized.updated_at.desc(), CoinNormalized.id.desc())
+
+    @staticmethod
+    async def count_coins(session: AsyncSession, source: str | None = None, symbol: str | None = None) -> int:
+        query = CoinService._filtered(select(func.count()).select_from(CoinNormalized), source, symbol)
+        return (await session.execute(query)).scalar() or 0
+
+    @staticmethod
+    async def approximate_count(session: AsyncSession, source: str | None = None, symbol: str | None = None) -> int:
+        """
+        Cheap total: planner statistics on Postgres for the unfiltered table,
+        otherwise an exact count cached for settings.count_cache_ttl_seconds.
+        """
+        if not source and not symbol and session.bind.dialect.name == "postgresql":
+            estimate = (await session.execute(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = 'coin_normalized'::regclass"
+            ))).scalar()
+            # -1 means the table has never been analyzed
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+
+        key = (source, symbol.upper() if symbol else None)
+        return await count_cache.get_or_load(key, lambda: CoinService.count_coins(session, source, symbol))
+
+    @staticmethod
+    @cached(coin_cache)
     async def get_normalized_coins(
         session: AsyncSession,
         limit: int = 50,
         offset: int = 0,
         source: str | None = None,
-        symbol: str | None = None
-    ) -> Tuple[List[CoinNormalizedSchema], int]:
-        """Get paginated normalized coins with optional filters"""
-        query = select(CoinNormalized)
+        symbol: str | None = None,
+        cursor: str | None = None,
+        include_total: bool = False
+    ) -> CoinPage:
+        """
+        Get a page of normalized coins, newest first, with optional filters.
 
-        if source:
-            query = query.where(CoinNormalized.source == source)
-        if symbol:
-            query = query.where(CoinNormalized.symbol == symbol.upper())
+        Pages are keyed on (updated_at, id): pass the previous page's
+        `next_cursor` to continue, which costs the same at any depth. `offset`
+        is still honored when no cursor is given. Totals are approximate unless
+        `include_total` asks for an exact COUNT(*).
 
-        # Get total count
-        count_query = select(func.count()).select_from(CoinNormalized)
-        if source:
-            count_query = count_query.where(CoinNormalized.source == source)
-        if symbol:
-            count_query = count_query.where(CoinNormalized.symbol == symbol.upper())
-        
-        total = await session.execute(count_query)
-        total_count = total.scalar() or 0
+        Items are plain rows (COIN_FIELDS, then id) rather than ORM objects or
+        models, ready to be encoded with dumps_rows.
+
+        Raises:
+            ValueError: `cursor` is malformed
+        """
+        query = CoinService._listing(source, symbol, cursor)
+        if offset and not cursor:
+            query = query.offset(offset)
+
+        # One extra row tells us whether another page exists
+        coins = (await session.execute(query.limit(limit + 1))).all()
+        next_cursor = None
+        if len(coins) > limit:
+            coins = coins[:limit]
+            next_cursor = encode_cursor(coins[-1].updated_at, coins[-1].id)
+
+        if include_total:
+            total = await CoinService.count_coins(session, source, symbol)
+        else:
+            total = await CoinService.approximate_count(session, source, symbol)
+
+        return CoinPage(items=coins, next_cursor=next_cursor, total=total, total_is_exact=include_total)
+
+    @staticmethod
+    async def stream_coins(
+        session_factory,
+        limit: int,
+        source: str | None = None,
+        symbol: str | None = None,
+        cursor: str | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        NDJSON for up to `limit` coins in listing order, read through a
+        server-side cursor settings.coin_stream_chunk_rows at a time.
+
+        Opens its own session: the response body outlives the request's.
+
+        Raises:
+            ValueError: `cursor` is malformed (before anything is read)
+        """
+        query = CoinService._listing(source, symbol, cursor).limit(limit)
 
-        # Get paginated results
-        query = query.order_by(CoinNormalized.updated_at.desc()).offset(offset).limit(limit)
-        result = await session.execute(query)
-        coins = result.scalars().all()
+        async def chunks() -> AsyncIterator[bytes]:
+            async with session_factory() as session:
+                result = await session.stream(query)
+                async for rows in result.partitions(settings.coin_stream_chunk_rows):
+                    yield dumps_ndjson(COIN_FIELDS, rows)
 
-        return [CoinNormalizedSchema.model_validate(c) for c in coins], total_count
+        return chunks()
 
     @staticmethod
+    @cached(coin_cache)
     async def get_coin_by_symbol(session: AsyncSession, symbol: str) -> CoinNormalizedSchema | None:
         """Get a single coin by symbol"""
         result = await session.execute(
@@ -51,7 +179,8 @@ class CoinService:
         return CoinNormalizedSchema.model_validate(coin) if coin else None
 
     @staticmethod
+    @cached(coin_cache)
     async def get_distinct_sources(session: AsyncSession) -> List[str]:
         """Get all distinct data sources"""
         result = await session.execute(select(CoinNormalized.source).distinct())
-        return result.scalars().all()
+        return list(result.scalars().all())
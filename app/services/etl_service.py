@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import db
 from app.schemas.etl_run import ETLRunsCreate, ETLRuns
-from app.models import ETLRun  # Will create later
+from app.models import ETLRun, ETLStatus
 from datetime import datetime
 
 class ETLService:
@@ -13,6 +13,15 @@ class ETLService:
         await session.refresh(db_run)
         return ETLRuns.from_orm(db_run)
     
+    @classmethod
+    async def start_run(cls, session: AsyncSession, source: str) -> ETLRun:
+        """Create a RUNNING run and return the ORM row so the pipeline can update it in place."""
+        db_run = ETLRun(source=source, total_records=0, status=ETLStatus.RUNNING)
+        session.add(db_run)
+        await session.commit()
+        await session.refresh(db_run)
+        return db_run
+
     @classmethod
     async def update_run_status(cls, session: AsyncSession, run_id: int, status: str, processed: int = 0, error: str = None):
         run = await session.get(ETLRun, run_id)
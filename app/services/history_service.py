@@ -0,0 +1,140 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from app.core.cache import TTLCache, cached
+from app.core.config import settings
+from app.models import CoinNormalized, CoinPriceHistory
+from app.schemas.price_history import OHLCBucket, PriceHistory
+from datetime import datetime, timezone
+from typing import Optional
+import math
+import time
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+# Candidates when the client does not ask for an interval
+STANDARD_INTERVALS = (60, 300, 900, 3600, 4 * 3600, 86400, 7 * 86400)
+# Separate and small: default ranges end "now", so most keys are never hit
+# again and would otherwise evict coin listings from their cache
+history_cache = TTLCache("history", maxsize=128)
+
+
+def parse_interval(value: str) -> int:
+    """`300`, `5m`, `1h`, `1d`, `1w` -> seconds. Raises ValueError otherwise."""
+    value = value.strip().lower()
+    try:
+        seconds = int(value[:-1]) * INTERVAL_UNITS[value[-1]] if value[-1:] in INTERVAL_UNITS else int(value)
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid interval: {value!r} (use e.g. 300, 5m, 1h, 1d)")
+    if seconds <= 0:
+        raise ValueError(f"Interval must be positive: {value!r}")
+    return seconds
+
+
+def to_epoch(moment: datetime) -> int:
+    """Naive datetimes are taken as UTC, like every timestamp the pipeline writes."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+class HistoryService:
+    @staticmethod
+    def pick_interval(span_seconds: int, max_points: Optional[int] = None) -> int:
+        """Smallest standard interval that keeps the range within max_points buckets."""
+        max_points = max_points or settings.history_max_points
+        for interval in STANDARD_INTERVALS:
+            if span_seconds / interval <= max_points:
+                return interval
+        return STANDARD_INTERVALS[-1] * math.ceil(span_seconds / STANDARD_INTERVALS[-1] / max_points)
+
+    @staticmethod
+    def open_end(start: Optional[datetime] = None, interval: Optional[int] = None) -> datetime:
+        """
+        End for a range without one: the close of the current bucket rather
+        than now, so every request within a bucket shares one cache key.
+        New points only arrive with an ETL run, which invalidates the cache.
+        """
+        now = int(time.time())
+        span = now - to_epoch(start) if start else settings.history_default_days * 86400
+        interval = interval or HistoryService.pick_interval(max(1, span))
+        return datetime.fromtimestamp(now - now % interval + interval, tz=timezone.utc)
+
+    @staticmethod
+    @cached(history_cache)
+    async def get_history(
+        session: AsyncSession,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        interval: Optional[int] = None
+    ) -> PriceHistory | None:
+        """
+        OHLC buckets for the coin currently holding `symbol`, computed in SQL.
+
+        Buckets are aligned to multiples of `interval` since the epoch, so
+        repeated queries over a moving window return stable buckets.
+
+        Returns:
+            None when no coin has this symbol
+
+        Raises:
+            ValueError: empty range, or more than settings.history_max_points buckets
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if end_ts <= start_ts:
+            raise ValueError("`to` must be after `from`")
+        interval = interval or HistoryService.pick_interval(end_ts - start_ts)
+        if (end_ts - start_ts) / interval > settings.history_max_points:
+            raise ValueError(
+                f"{interval}s buckets over this range exceed {settings.history_max_points} points; "
+                "use a larger interval"
+            )
+
+        coin = (await session.execute(
+            select(CoinNormalized.coin_id, CoinNormalized.symbol).where(CoinNormalized.symbol == symbol.upper()).limit(1)
+        )).first()
+        if coin is None:
+            return None
+
+        h = CoinPriceHistory
+        bucket = h.ts - h.ts % interval
+        whole_bucket = (None, None)
+        points = select(
+            bucket.label("bucket"),
+            h.price_usd.label("price"),
+            func.first_value(h.price_usd).over(partition_by=bucket, order_by=h.ts).label("open"),
+            func.last_value(h.price_usd).over(partition_by=bucket, order_by=h.ts, range_=whole_bucket).label("close"),
+            func.last_value(h.volume_24h_usd).over(partition_by=bucket, order_by=h.ts, range_=whole_bucket).label("volume"),
+            func.last_value(h.market_cap_usd).over(
+                partition_by=bucket, order_by=h.ts, range_=whole_bucket
+            ).label("market_cap"),
+        ).where(h.coin_id == coin.coin_id, h.ts >= start_ts, h.ts < end_ts).subquery()
+
+        # open/close/volume/market_cap are constant within a bucket; min() just picks them
+        rows = (await session.execute(
+            select(
+                points.c.bucket,
+                func.min(points.c.open),
+                func.max(points.c.price),
+                func.min(points.c.price),
+                func.min(points.c.close),
+                func.min(points.c.volume),
+                func.min(points.c.market_cap),
+                func.count(),
+            ).group_by(points.c.bucket).order_by(points.c.bucket)
+        )).all()
+
+        return PriceHistory(
+            coin_id=coin.coin_id,
+            symbol=coin.symbol,
+            interval_seconds=interval,
+            start=datetime.fromtimestamp(start_ts, tz=timezone.utc),
+            end=datetime.fromtimestamp(end_ts, tz=timezone.utc),
+            buckets=[
+                OHLCBucket(
+                    ts=datetime.fromtimestamp(ts, tz=timezone.utc),
+                    open=open_, high=high, low=low, close=close,
+                    volume_24h_usd=volume, market_cap_usd=market_cap, samples=samples,
+                )
+                for ts, open_, high, low, close, volume, market_cap, samples in rows
+            ],
+        )
@@ -0,0 +1,336 @@
+"""Coin search: prefix, fuzzy and typo-tolerant matching over symbol, name and coin_id."""
+import asyncio
+import bisect
+import heapq
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, Set, Tuple
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import data_version
+from app.core.config import settings
+from app.models import CoinNormalized
+from app.schemas.coin_search import CoinSearchHit
+
+logger = logging.getLogger(__name__)
+
+# (coin_id, symbol, name, market_cap_usd)
+Entry = Tuple[str, str, str, Optional[float]]
+
+Match = Literal["exact", "prefix", "fuzzy"]
+MATCH_ORDER: Dict[Match, int] = {"exact": 0, "prefix": 1, "fuzzy": 2}
+
+
+def as_entry(row: Sequence[Any]) -> Entry:
+    """A plain Entry tuple from the first four fields of a row."""
+    coin_id, symbol, name, market_cap = row[:4]
+    return coin_id, symbol, name, market_cap
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: two spaces of padding in front, one behind."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def deletes(text: str) -> Set[str]:
+    """The text with each single character removed (SymSpell neighbourhood, distance 1)."""
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def terms_for(coin_id: str, symbol: str, name: str) -> Set[str]:
+    """Searchable terms: symbol, id, the full name and each word of it, lowercased."""
+    name = name.lower()
+    return {term for term in (symbol.lower(), coin_id.lower(), name, *name.split()) if term}
+
+
+class SearchIndex:
+    """
+    In-memory index over every coin's symbol, name words and coin_id.
+
+    - exact: symbol / coin_id -> coins
+    - top: each 1-3 character prefix -> its largest coins by market cap, so
+      the short queries autocomplete sends first never scan thousands of terms
+    - terms: sorted (term, coin_id) for longer prefixes, found by bisection
+    - trigram postings plus single-deletion variants of symbols for fuzzy,
+      typo-tolerant matches
+
+    `refresh` brings it up to date with the table incrementally: rows
+    updated since the last refresh are re-indexed, vanished ids removed.
+    """
+
+    TOP_PREFIX_LEN = 3
+
+    def __init__(self):
+        self._entries: Dict[str, Entry] = {}
+        self._reset()
+        self._version: Optional[int] = None
+        self._watermark = None
+        self._lock = asyncio.Lock()
+
+    def _reset(self) -> None:
+        self._exact: Dict[str, Set[str]] = defaultdict(set)
+        self._top: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+        self._terms: List[Tuple[str, str]] = []
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        self._symbol_deletes: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, entry: Entry):
+        """(exact keys, terms, short prefixes, symbol deletion variants) of an entry."""
+        coin_id, symbol, name, _ = entry
+        exact = {symbol.lower(), coin_id.lower()}
+        terms = terms_for(coin_id, symbol, name)
+        prefixes = {term[:n] for term in terms for n in range(1, self.TOP_PREFIX_LEN + 1)}
+        return exact, terms, prefixes, deletes(symbol.lower()) | {symbol.lower()}
+
+    def _index(self, entry: Entry, incremental: bool) -> None:
+        coin_id, _, _, market_cap = entry
+        exact, terms, prefixes, variants = self._keys(entry)
+        for key in exact:
+            self._exact[key].add(coin_id)
+        rank = (-(market_cap or 0.0), coin_id)
+        for prefix in prefixes:
+            if incremental:
+                top = self._top[prefix]
+                bisect.insort(top, rank)
+                del top[settings.search_max_results:]
+            else:
+                self._top[prefix].append(rank)
+        for term in terms:
+            if incremental:
+                bisect.insort(self._terms, (term, coin_id))
+            else:
+                self._terms.append((term, coin_id))
+            for gram in trigrams(term):
+                self._grams[gram].add(coin_id)
+        for variant in variants:
+            self._symbol_deletes[variant].add(coin_id)
+
+    def _unindex(self, entry: Entry) -> None:
+        coin_id, _, _, market_cap = entry
+        exact, terms, prefixes, variants = self._keys(entry)
+        for key in exact:
+            self._exact[key].discard(coin_id)
+        rank = (-(market_cap or 0.0), coin_id)
+        for prefix in prefixes:
+            top = self._top[prefix]
+            i = bisect.bisect_left(top, rank)
+            if i < len(top) and top[i] == rank:
+                # Leaves the list one short until the next rebuild refills it
+                del top[i]
+        for term in terms:
+            i = bisect.bisect_left(self._terms, (term, coin_id))
+            if i < len(self._terms) and self._terms[i] == (term, coin_id):
+                del self._terms[i]
+            for gram in trigrams(term):
+                self._grams[gram].discard(coin_id)
+        for variant in variants:
+            self._symbol_deletes[variant].discard(coin_id)
+
+    def rebuild(self, entries: Iterable[Sequence[Any]]) -> None:
+        self._entries = {entry[0]: entry for entry in map(as_entry, entries)}
+        self._reset()
+        for entry in self._entries.values():
+            self._index(entry, incremental=False)
+        self._terms.sort()
+        for top in self._top.values():
+            top.sort()
+            del top[settings.search_max_results:]
+
+    def upsert(self, entries: Iterable[Sequence[Any]]) -> None:
+        for entry in map(as_entry, entries):
+            previous = self._entries.get(entry[0])
+            if previous is not None:
+                self._unindex(previous)
+            self._entries[entry[0]] = entry
+            self._index(entry, incremental=True)
+
+    def remove(self, coin_ids: Iterable[str]) -> None:
+        for coin_id in list(coin_ids):
+            entry = self._entries.pop(coin_id, None)
+            if entry is not None:
+                self._unindex(entry)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Catch up with the table once per data version (i.e. after each ETL run)."""
+        if self._version == data_version():
+            return
+        async with self._lock:
+            version = data_version()
+            if self._version == version:
+                return
+            c = CoinNormalized
+            columns = select(c.coin_id, c.symbol, c.name, c.market_cap_usd, c.updated_at)
+            ids = set((await session.execute(select(c.coin_id))).scalars())
+            changed: Sequence[Any] = []
+            if self._watermark is not None:
+                # The single writer stamps each batch before committing it, so
+                # rows committed after the last refresh are never older than it
+                changed = (await session.execute(columns.where(c.updated_at >= self._watermark))).all()
+            gone = self._entries.keys() - ids
+            unseen = ids - self._entries.keys() - {row[0] for row in changed}
+            # Rebuild from scratch when incremental upkeep would cost more (or cannot catch up)
+            if self._watermark is None or unseen or len(changed) + len(gone) > len(self._entries) // 5:
+                rows = (await session.execute(columns)).all()
+                self.rebuild(rows)
+                logger.info(f"🔎 Search index built: {len(self)} coins")
+            else:
+                rows = changed
+                self.remove(gone)
+                self.upsert(rows)
+            timestamps = [row[4] for row in rows if row[4] is not None]
+            if self._watermark is not None:
+                timestamps.append(self._watermark)
+            self._watermark = max(timestamps) if timestamps else None
+            self._version = version
+
+    def search(self, query: str, limit: int = 10) -> List[CoinSearchHit]:
+        """Exact and prefix matches first, then fuzzy ones; ties go to the larger market cap."""
+        q = " ".join(query.lower().split())
+        if not q:
+            return []
+        best: Dict[str, Tuple[Match, float]] = {}
+
+        def offer(coin_id: str, match: Match, score: float) -> None:
+            current = best.get(coin_id)
+            if current is None or (MATCH_ORDER[match], -score) < (MATCH_ORDER[current[0]], -current[1]):
+                best[coin_id] = (match, score)
+
+        for coin_id in self._exact.get(q, ()):
+            offer(coin_id, "exact", 1.0)
+        if len(q) <= self.TOP_PREFIX_LEN:
+            for _, coin_id in self._top.get(q, ())[:limit + len(best)]:
+                if coin_id not in best:
+                    _, symbol, name, _ = self._entries[coin_id]
+                    shortest = min(len(term) for term in terms_for(coin_id, symbol, name) if term.startswith(q))
+                    offer(coin_id, "prefix", len(q) / shortest)
+        else:
+            i = bisect.bisect_left(self._terms, (q,))
+            for term, coin_id in self._terms[i:i + settings.search_prefix_scan]:
+                if not term.startswith(q):
+                    break
+                offer(coin_id, "prefix", len(q) / len(term))
+
+        if len(best) < limit and len(q) >= 3:
+            self._fuzzy(q, offer)
+
+        ranked = heapq.nsmallest(
+            limit, best.items(),
+            key=lambda item: (MATCH_ORDER[item[1][0]], -(self._entries[item[0]][3] or 0.0), -item[1][1]),
+        )
+        hits = []
+        for coin_id, (match, score) in ranked:
+            _, symbol, name, market_cap = self._entries[coin_id]
+            hits.append(CoinSearchHit(
+                coin_id=coin_id, symbol=symbol, name=name, market_cap_usd=market_cap,
+                match=match, score=round(score, 3),
+            ))
+        return hits
+
+    def _fuzzy(self, q: str, offer) -> None:
+        """
+        Candidates share trigrams with the query (or are a symbol one edit
+        away); they match when a term, or its first len(q) characters, is
+        within 1 edit (2 for queries over 5 characters) and starts with the
+        same character as the query.
+        """
+        max_distance = 1 if len(q) <= 5 else 2
+        # Trigrams that most coins share cost the most to count and tell the least
+        common = max(500, len(self._entries) // 20)
+        candidates: Counter[str] = Counter()
+        for gram in trigrams(q):
+            postings = self._grams.get(gram, ())
+            if len(postings) <= common:
+                candidates.update(postings)
+        for variant in deletes(q) | {q}:
+            for coin_id in self._symbol_deletes.get(variant, ()):
+                candidates[coin_id] += len(q)
+
+        # Ties in shared grams go to the larger coin, the likelier target of a typo
+        shortlist = heapq.nlargest(
+            settings.search_fuzzy_candidates, candidates,
+            key=lambda coin_id: (candidates[coin_id], self._entries[coin_id][3] or 0.0),
+        )
+        for coin_id in shortlist:
+            _, symbol, name, _ = self._entries[coin_id]
+            distance = max_distance + 1
+            for term in terms_for(coin_id, symbol, name):
+                if term[0] != q[0]:
+                    continue
+                distance = min(
+                    distance,
+                    edit_distance(q, term, max_distance),
+                    edit_distance(q, term[:len(q)], max_distance) if len(term) > len(q) else distance,
+                )
+            if distance <= max_distance:
+                offer(coin_id, "fuzzy", 1 - distance / (len(q) + 1))
+
+
+search_index = SearchIndex()
+
+
+class SearchService:
+    @staticmethod
+    async def search(session: AsyncSession, query: str, limit: int = 10) -> List[CoinSearchHit]:
+        """
+        Search the in-memory index, refreshing it first if an ETL run has
+        committed since. With settings.search_index_enabled off, query SQL.
+        """
+        limit = max(1, min(limit, settings.search_max_results))
+        if settings.search_index_enabled:
+            await search_index.refresh(session)
+            return search_index.search(query, limit)
+        return await SearchService.search_db(session, query, limit)
+
+    @staticmethod
+    async def search_db(session: AsyncSession, query: str, limit: int = 10) -> List[CoinSearchHit]:
+        """
+        SQL fallback: case-insensitive prefix on symbol, name and coin_id, plus
+        pg_trgm similarity on the name when settings.search_db_trigram is on
+        (needs `CREATE EXTENSION pg_trgm` and a trigram index on name).
+        """
+        q = " ".join(query.lower().split())
+        if not q:
+            return []
+        c = CoinNormalized
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        prefix = or_(
+            func.lower(c.symbol).like(pattern, escape="\\"),
+            func.lower(c.name).like(pattern, escape="\\"),
+            func.lower(c.coin_id).like(pattern, escape="\\"),
+        )
+        condition = prefix
+        if settings.search_db_trigram and session.bind.dialect.name == "postgresql":
+            condition = or_(prefix, c.name.op("%")(q))
+        rows = (await session.execute(
+            select(c.coin_id, c.symbol, c.name, c.market_cap_usd, prefix.label("is_prefix"))
+            .where(condition)
+            .order_by(prefix.desc(), c.market_cap_usd.desc().nulls_last())
+            .limit(limit)
+        )).all()
+        return [
+            CoinSearchHit(
+                coin_id=coin_id, symbol=symbol, name=name, market_cap_usd=market_cap,
+                match="exact" if q in (symbol.lower(), coin_id.lower()) else ("prefix" if is_prefix else "fuzzy"),
+                score=1.0 if is_prefix else 0.5,
+            )
+            for coin_id, symbol, name, market_cap, is_prefix in rows
+        ]
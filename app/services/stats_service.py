@@ -1,17 +1,226 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func
-from app.models import CoinNormalized, ETLRun
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+from app.core.cache import TTLCache, cached
+from app.core.config import settings
+from app.models import ETLRun, StatsSnapshot
+
+stats_cache = TTLCache("stats", maxsize=16)
+
+SNAPSHOT_ID = 1
+
+# coin_id -> (symbol, name, source, market_cap_usd, volume_24h_usd)
+CoinFacts = Tuple[Optional[str], Optional[str], Optional[str], Optional[float], Optional[float]]
+
+
+class TopN:
+    """
+    Leaderboard over a changing set of values, kept without rescanning.
+
+    Holds the best `n + buffer` candidates plus `ceiling`, an upper bound on
+    every value outside the candidate set. The candidates are exact while
+    the n-th best of them is still >= ceiling; only when deletions or
+    decreases break that does `rebuild` recompute from the full value map.
+    """
+
+    def __init__(self, n: int, buffer: int):
+        self.n = n
+        self.capacity = n + max(0, buffer)
+        self.values: Dict[str, float] = {}
+        self.ceiling = float("-inf")
+        self._floor: Optional[float] = None
+
+    def floor(self) -> float:
+        if self._floor is None:
+            self._floor = min(self.values.values()) if self.values else float("-inf")
+        return self._floor
+
+    def update(self, coin_id: str, value: Optional[float]) -> None:
+        if value is None:
+            self.discard(coin_id)
+            return
+        if coin_id not in self.values and len(self.values) >= self.capacity and value <= self.floor():
+            self.ceiling = max(self.ceiling, value)
+            return
+        self.values[coin_id] = value
+        self._floor = None
+        if len(self.values) > self.capacity:
+            evicted = min(self.values, key=self.values.__getitem__)
+            self.ceiling = max(self.ceiling, self.values.pop(evicted))
+
+    def discard(self, coin_id: str) -> None:
+        if self.values.pop(coin_id, None) is not None:
+            self._floor = None
+
+    def valid(self) -> bool:
+        if self.ceiling == float("-inf"):
+            return True
+        if len(self.values) < self.n:
+            return False
+        return heapq.nlargest(self.n, self.values.values())[-1] >= self.ceiling
+
+    def rebuild(self, all_values: Iterable[Tuple[str, float]]) -> None:
+        best = heapq.nlargest(self.capacity + 1, all_values, key=lambda item: item[1])
+        self.values = dict(best[:self.capacity])
+        self.ceiling = best[self.capacity][1] if len(best) > self.capacity else float("-inf")
+        self._floor = None
+
+    def top(self) -> List[str]:
+        return heapq.nlargest(self.n, self.values, key=self.values.__getitem__)
+
+
+class StatsAccumulator:
+    """
+    Running aggregates over coin_normalized, maintained from the pipeline's
+    per-batch deltas: counts per source, market cap / volume totals and the
+    top-N leaderboards. Seeded once from the rows already stored.
+    """
+
+    def __init__(self, top_n: Optional[int] = None, buffer: Optional[int] = None):
+        top_n = settings.stats_top_n if top_n is None else top_n
+        buffer = settings.stats_top_buffer if buffer is None else buffer
+        self.coins: Dict[str, CoinFacts] = {}
+        self.by_source: Counter = Counter()
+        self.total_market_cap = 0.0
+        self.total_volume = 0.0
+        self.top_market_cap = TopN(top_n, buffer)
+        self.top_volume = TopN(top_n, buffer)
+
+    def seed(self, existing: Iterable[Tuple[str, Optional[str], Optional[str], Optional[str], Any, Any]]) -> None:
+        """Load (coin_id, symbol, name, source, market_cap_usd, volume_24h_usd) rows."""
+        for coin_id, symbol, name, source, market_cap, volume in existing:
+            self._put(coin_id, (symbol, name, source, market_cap, volume))
+        # Seeding admits rows in table order; settle the leaderboards once
+        self._settle()
+
+    def apply(self, upserts: Sequence[Tuple], superseded: Sequence[str]) -> None:
+        """Fold one committed batch: writer-ordered rows plus the coin_ids it deleted."""
+        for coin_id in superseded:
+            self._drop(coin_id)
+        for coin_id, symbol, name, _price, market_cap, volume, _platform, source in upserts:
+            self._put(coin_id, (symbol, name, source, market_cap, volume))
+
+    def _put(self, coin_id: str, facts: CoinFacts) -> None:
+        self._drop(coin_id)
+        self.coins[coin_id] = facts
+        _symbol, _name, source, market_cap, volume = facts
+        self.by_source[source or "unknown"] += 1
+        self.total_market_cap += market_cap or 0.0
+        self.total_volume += volume or 0.0
+        self.top_market_cap.update(coin_id, market_cap)
+        self.top_volume.update(coin_id, volume)
+
+    def _drop(self, coin_id: str) -> None:
+        facts = self.coins.pop(coin_id, None)
+        if facts is None:
+            return
+        _symbol, _name, source, market_cap, volume = facts
+        key = source or "unknown"
+        self.by_source[key] -= 1
+        if self.by_source[key] <= 0:
+            del self.by_source[key]
+        self.total_market_cap -= market_cap or 0.0
+        self.total_volume -= volume or 0.0
+        self.top_market_cap.discard(coin_id)
+        self.top_volume.discard(coin_id)
+
+    def _settle(self) -> None:
+        for board, index in ((self.top_market_cap, 3), (self.top_volume, 4)):
+            if not board.valid():
+                board.rebuild(
+                    (coin_id, facts[index]) for coin_id, facts in self.coins.items() if facts[index] is not None
+                )
+
+    def _leaderboard(self, board: TopN) -> List[Dict[str, Any]]:
+        entries = []
+        for coin_id in board.top():
+            symbol, name, source, market_cap, volume = self.coins[coin_id]
+            entries.append({
+                "coin_id": coin_id,
+                "symbol": symbol,
+                "name": name,
+                "source": source,
+                "market_cap_usd": market_cap,
+                "volume_24h_usd": volume,
+            })
+        return entries
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._settle()
+        return {
+            "total_coins": len(self.coins),
+            "coins_by_source": dict(sorted(self.by_source.items())),
+            "total_market_cap_usd": round(self.total_market_cap, 2),
+            "total_volume_24h_usd": round(self.total_volume, 2),
+            "top_by_market_cap": self._leaderboard(self.top_market_cap),
+            "top_by_volume": self._leaderboard(self.top_volume),
+        }
+
 
 class StatsService:
-    @classmethod
-    async def get_stats(cls, session: AsyncSession):
-        total_coins = await session.execute(select(func.count()).select_from(CoinNormalized))
-        recent_etl = await session.execute(
-            select(ETLRun).order_by(ETLRun.started_at.desc()).limit(5)
-        )
-        
+    @staticmethod
+    def run_summary(run: ETLRun, duration_seconds: Optional[float] = None) -> Dict[str, Any]:
+        if duration_seconds is None:
+            duration_seconds = run.duration_seconds
+        return {
+            "id": run.id,
+            "status": run.status.value if run.status else None,
+            "started_at": run.started_at.isoformat() if run.started_at else None,
+            "completed_at": run.completed_at.isoformat() if run.completed_at else None,
+            "duration_seconds": round(duration_seconds, 3) if duration_seconds is not None else None,
+            "total_records": run.total_records,
+            "processed_records": run.processed_records,
+            "delta_count": run.delta_count,
+            "error_message": run.error_message,
+            "sources": run.source_stats or {},
+            "stage_timings": run.stage_timings,
+        }
+
+    @staticmethod
+    async def save_snapshot(
+        session: AsyncSession,
+        stats: StatsAccumulator,
+        run: Optional[ETLRun] = None,
+        duration_seconds: Optional[float] = None
+    ) -> None:
+        """Overwrite the single snapshot row; the caller commits."""
+        snapshot = await session.get(StatsSnapshot, SNAPSHOT_ID)
+        if snapshot is None:
+            snapshot = StatsSnapshot(id=SNAPSHOT_ID)
+            session.add(snapshot)
+        for key, value in stats.snapshot().items():
+            setattr(snapshot, key, value)
+        snapshot.version = (snapshot.version or 0) + 1
+        if run is not None:
+            snapshot.last_run = StatsService.run_summary(run, duration_seconds)
+
+    @staticmethod
+    @cached(stats_cache)
+    async def get_stats(session: AsyncSession):
+        """Precomputed aggregates from the snapshot row; a single primary-key read."""
+        snapshot = await session.get(StatsSnapshot, SNAPSHOT_ID)
+        if snapshot is None:
+            return {
+                "total_coins": 0,
+                "coins_by_source": {},
+                "total_market_cap_usd": 0.0,
+                "total_volume_24h_usd": 0.0,
+                "top_by_market_cap": [],
+                "top_by_volume": [],
+                "last_run": None,
+                "ingestion_status": "healthy",
+            }
+
+        last_run = snapshot.last_run
         return {
-            "total_coins": total_coins.scalar(),
-            "recent_runs": [run.__dict__ for run in recent_etl.scalars().all()],
-            "ingestion_status": "healthy"
+            "total_coins": snapshot.total_coins,
+            "coins_by_source": snapshot.coins_by_source or {},
+            "total_market_cap_usd": snapshot.total_market_cap_usd,
+            "total_volume_24h_usd": snapshot.total_volume_24h_usd,
+            "top_by_market_cap": snapshot.top_by_market_cap or [],
+            "top_by_volume": snapshot.top_by_volume or [],
+            "last_run": last_run,
+            "updated_at": snapshot.updated_at.isoformat() if snapshot.updated_at else None,
+            "ingestion_status": "degraded" if last_run and last_run.get("status") == "failed" else "healthy",
         }
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.core.cache import bump_version
+from app.core.config import settings
+from app.core.db import Base, get_read_session, get_read_session_factory, get_session
+import app.models  # noqa: F401  (registers tables on Base.metadata)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """Session factory over a fresh in-memory SQLite database per test."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    """API client whose requests use the test database."""
+    from app.main import app
+
+    async def override():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override
+    app.dependency_overrides[get_read_session] = override
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    """Keep flock files for pipeline locks out of the working tree."""
+    monkeypatch.setattr(settings, "lock_dir", str(tmp_path / "locks"))
+    return tmp_path / "locks"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """Each test gets its own database, so cached reads must not leak between tests."""
+    bump_version()
+    yield
@@ -1,17 +1,16 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
 
-def test_health_endpoint():
+@pytest.mark.asyncio
+async def test_health_endpoint(client):
     """Test health check endpoint."""
-    response = client.get("/health/")
+    response = await client.get("/health/")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
-def test_root_endpoint():
+@pytest.mark.asyncio
+async def test_root_endpoint(client):
     """Test root endpoint."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     assert "Kasparro" in response.json()["message"]
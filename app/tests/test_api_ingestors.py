@@ -0,0 +1,136 @@
+import asyncio
+import httpx
+import pytest
+from app.core.http import HttpClient
+from app.ingestion.coingecko_ingestor import CoinGeckoIngestor
+from app.ingestion.coinpaprika_ingestor import CoinPaprikaIngestor
+
+UNIVERSE = 10_321
+
+
+class FakeGecko:
+    """In-process CoinGecko serving /coins/markets pages over a fixed universe."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pages = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        per_page = int(request.url.params["per_page"])
+        self.pages.append(page)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        start = (page - 1) * per_page
+        return httpx.Response(200, json=[
+            {"id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}",
+             "current_price": i + 0.5, "market_cap": i * 1000, "total_volume": None}
+            for i in range(start, min(start + per_page, UNIVERSE))
+        ])
+
+
+def client_for(handler) -> HttpClient:
+    return HttpClient(transport=httpx.MockTransport(handler), rate_limits={}, default_rate=0, backoff_base=0)
+
+
+@pytest.mark.asyncio
+async def test_coingecko_fetches_whole_universe_with_bounded_concurrency():
+    upstream = FakeGecko()
+    client = client_for(upstream)
+    ingestor = CoinGeckoIngestor(client=client, max_in_flight=4)
+
+    batches = [batch async for batch in ingestor.stream(limit=50_000)]
+    await client.close()
+
+    coins = [coin for batch in batches for coin in batch]
+    assert len(coins) == UNIVERSE
+    assert len({coin.id for coin in coins}) == UNIVERSE
+    assert len(batches) == 42  # 41 full pages of 250 + one short page
+    assert upstream.max_in_flight == 4
+    assert max(upstream.pages) <= 42 + 4  # stops shortly after the short page
+    assert coins[0].symbol.isupper() and coins[0].volume_24h_usd is None
+
+
+@pytest.mark.asyncio
+async def test_coingecko_respects_limit():
+    client = client_for(FakeGecko(delay=0))
+    coins = await CoinGeckoIngestor(client=client).ingest(limit=600)
+    await client.close()
+
+    assert len(coins) == 600
+
+
+@pytest.mark.asyncio
+async def test_coinpaprika_parses_tickers():
+    def handler(request):
+        assert request.url.path.endswith("/tickers")
+        return httpx.Response(200, json=[
+            {"id": "btc-bitcoin", "symbol": "BTC", "name": "Bitcoin",
+             "quotes": {"USD": {"price": 95000.1, "market_cap": 1.9e12, "volume_24h": 4e10}}},
+            {"id": "eth-ethereum", "symbol": "ETH", "name": "Ethereum", "quotes": {}},
+            {"symbol": "BAD"},
+        ])
+
+    client = client_for(handler)
+    coins = await CoinPaprikaIngestor(client=client).ingest(limit=10)
+    await client.close()
+
+    assert [coin.id for coin in coins] == ["btc-bitcoin", "eth-ethereum"]
+    assert coins[0].price_usd == 95000.1 and coins[1].price_usd is None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_skipped_and_crashes_resume_after_high_water_mark():
+    upstream = FakeGecko(delay=0)
+    client = client_for(upstream)
+
+    first = CoinGeckoIngestor(client=client)
+    assert len(await first.ingest(limit=1000)) == 1000
+    state = {**first.checkpoint(), "completed": True}
+    assert state["high_water_page"] == 4
+
+    unchanged = CoinGeckoIngestor(client=client)
+    unchanged.restore(state)
+    assert await unchanged.ingest(limit=1000) == []
+
+    upstream.pages.clear()
+    crashed = CoinGeckoIngestor(client=client)
+    crashed.restore({**state, "high_water_page": 2, "page_hashes": {}, "completed": False})
+    resumed = await crashed.ingest(limit=1000)
+    await client.close()
+
+    assert sorted(upstream.pages) == [3, 4]
+    assert len(resumed) == 500
+
+
+@pytest.mark.asyncio
+async def test_unconditional_fetch_returns_every_page():
+    upstream = FakeGecko(delay=0)
+
+    async def handler(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        response = await upstream(request)
+        response.headers["ETag"] = '"v1"'
+        return response
+
+    client = client_for(handler)
+    first = CoinGeckoIngestor(client=client)
+    await first.ingest(limit=500)
+    state = {**first.checkpoint(), "completed": True}
+
+    revalidated = CoinGeckoIngestor(client=client)
+    revalidated.restore(state)
+    assert await revalidated.ingest(limit=500) == []
+
+    reload = CoinGeckoIngestor(client=client)
+    reload.restore(state)
+    reload.conditional = False
+    coins = await reload.ingest(limit=500)
+    await client.close()
+
+    assert len(coins) == 500
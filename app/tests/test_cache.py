@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from app.core.cache import TTLCache, bump_version, cached
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.base import BaseIngestor
+from app.schemas.coin_raw import CoinRaw
+from app.services.coin_service import CoinService
+from app.services.stats_service import StatsService
+
+
+class OneCoinIngestor(BaseIngestor):
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def get_source_name(self) -> str:
+        return "csv"
+
+    async def ingest(self, limit: int = 100):
+        return [CoinRaw(id=self.symbol.lower(), symbol=self.symbol, name=self.symbol, price_usd=1.0)]
+
+
+def test_lru_eviction_and_stats():
+    cache = TTLCache("test-lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b", None) is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_ttl_expiry_and_version_bump():
+    cache = TTLCache("test-ttl", maxsize=8, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a", None) is None
+
+    cache = TTLCache("test-version", maxsize=8, ttl=60)
+    cache.set("a", 1)
+    bump_version()
+    assert cache.get("a", None) is None
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = TTLCache("test-single-flight", maxsize=8, ttl=60)
+    calls = 0
+
+    @cached(cache)
+    async def load(session, key):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return key * 2
+
+    results = await asyncio.gather(*(load(None, 21) for _ in range(10)))
+    assert results == [42] * 10
+    assert calls == 1
+    assert await load(None, 21) == 42
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_reload_when_the_loading_request_is_cancelled():
+    cache = TTLCache("test-cancelled-load", maxsize=8, ttl=60)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "loaded"
+
+    owner = asyncio.create_task(cache.get_or_load("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_load("k", fast))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == "loaded"
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    assert cache.get("k") == "loaded"
+
+
+@pytest.mark.asyncio
+async def test_reads_are_cached_until_a_run_completes(session, tmp_path):
+    registry = IngestorRegistry()
+    registry.register("csv", lambda: OneCoinIngestor("BTC"))
+    checkpoints = CheckpointManager(str(tmp_path / "checkpoints.json"))
+    await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+
+    stats = await StatsService.get_stats(session)
+    assert stats["total_coins"] == 1
+    assert await CoinService.get_coin_by_symbol(session, "ETH") is None
+
+    registry.register("csv", lambda: OneCoinIngestor("ETH"))
+    await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=CheckpointManager(str(tmp_path / "other.json")))
+
+    # The run bumped the version, so both reads see the new row
+    assert (await StatsService.get_stats(session))["total_coins"] == 2
+    coin = await CoinService.get_coin_by_symbol(session, "ETH")
+    assert coin is not None and coin.coin_id == "eth"
@@ -0,0 +1,83 @@
+import pytest
+from app.core.serialization import loads
+from app.ingestion.writer import bulk_upsert_coins
+from app.services.coin_service import CoinService
+
+
+async def seed(session, count: int) -> None:
+    # A single batch shares one updated_at, so paging must fall back to the id tiebreak
+    rows = [(f"coin-{i}", f"C{i}", f"Coin {i}", float(i), None, None, None, "csv" if i % 2 else "coingecko")
+            for i in range(count)]
+    await bulk_upsert_coins(session, rows)
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_walks_every_row_once(session):
+    await seed(session, 25)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = await CoinService.get_normalized_coins(session, limit=10, cursor=cursor)
+        seen += [coin.coin_id for coin in page.items]
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 25
+    assert seen[0] == "coin-24"  # newest insert (highest id) first
+
+
+@pytest.mark.asyncio
+async def test_totals_are_approximate_unless_requested(session):
+    await seed(session, 6)
+
+    page = await CoinService.get_normalized_coins(session, limit=2, source="csv")
+    exact = await CoinService.get_normalized_coins(session, limit=2, source="csv", include_total=True)
+
+    assert (page.total, page.total_is_exact) == (3, False)
+    assert (exact.total, exact.total_is_exact) == (3, True)
+    assert [coin.symbol for coin in exact.items] == ["C5", "C3"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(session):
+    with pytest.raises(ValueError):
+        await CoinService.get_normalized_coins(session, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_listing_endpoint_encodes_rows_directly(client, session):
+    await seed(session, 30)
+
+    response = await client.get("/stats/coins", params={"limit": 25}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    coins = response.json()
+    assert len(coins) == 25
+    assert coins[0]["coin_id"] == "coin-29" and coins[0]["price_usd"] == 29.0
+    assert set(coins[0]) == {"coin_id", "symbol", "name", "price_usd", "market_cap_usd",
+                             "volume_24h_usd", "platform_id", "updated_at"}
+    assert response.headers["x-total-count"] == "30" and "x-next-cursor" in response.headers
+
+    small = await client.get("/stats/coins", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers  # below the compression threshold
+    assert (await client.get("/stats/coins", params={"limit": 5000})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_listing_streams_ndjson(client, session, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "coin_stream_chunk_rows", 4)
+    await seed(session, 30)
+
+    response = await client.get("/stats/coins", params={"limit": 5000, "format": "ndjson", "source": "csv"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 15
+    assert loads(lines[0])["coin_id"] == "coin-29"
+
+    streamed = await client.get("/stats/coins", params={"limit": 3}, headers={"Accept": "application/x-ndjson"})
+    assert len(streamed.text.splitlines()) == 3
+    assert (await client.get("/stats/coins", params={"format": "ndjson", "cursor": "bad"})).status_code == 400
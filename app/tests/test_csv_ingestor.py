@@ -0,0 +1,36 @@
+import pytest
+from app.core.config import settings
+from app.ingestion.csv_ingestor import CSVIngestor
+
+
+def write_csv(tmp_path, rows: int):
+    path = tmp_path / "coins.csv"
+    lines = ["id,symbol,name,price_usd,market_cap_usd,volume_24h_usd,extra"]
+    lines += [f"coin-{i},c{i},Coin {i},{i}.5,{i * 100},,ignored" for i in range(rows)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_bounded_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "max_ingestion_batch", 40)
+    monkeypatch.setattr(settings, "max_csv_rows", 100)
+    ingestor = CSVIngestor(str(write_csv(tmp_path, 250)))
+
+    sizes = [len(batch) async for batch in ingestor.stream(limit=1000)]
+
+    assert sizes == [40, 40, 20]
+
+
+@pytest.mark.asyncio
+async def test_stream_converts_columns(tmp_path):
+    path = tmp_path / "coins.csv"
+    path.write_text("symbol,name,price_usd,market_cap_usd\nbtc,Bitcoin,not-a-number,12\neth,,2.5,\n")
+
+    coins = await CSVIngestor(str(path)).ingest(limit=10)
+
+    assert [c.id for c in coins] == ["btc", "eth"]
+    assert [c.symbol for c in coins] == ["BTC", "ETH"]
+    assert coins[1].name == "Unknown"
+    assert coins[0].price_usd is None and coins[0].market_cap_usd == 12.0
+    assert coins[1].price_usd == 2.5 and coins[1].market_cap_usd is None
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.db import Database, engine_options, normalize_database_url
+
+
+def test_urls_are_normalized_to_async_drivers():
+    assert normalize_database_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert normalize_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert normalize_database_url("postgresql+asyncpg://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert normalize_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+
+def test_engine_options_per_backend():
+    postgres = engine_options("postgresql+asyncpg://u:p@h/db")
+    assert postgres["pool_pre_ping"] and postgres["pool_size"] > 1
+    assert postgres["connect_args"]["prepared_statement_cache_size"] > 0
+    # In-memory SQLite must share a single connection
+    assert "pool_size" not in engine_options("sqlite+aiosqlite:///:memory:")
+
+
+@pytest.mark.asyncio
+async def test_database_from_default_settings():
+    database = Database()
+    try:
+        assert database.url == normalize_database_url(settings.database_url)
+        assert database.pool_status()["write"]["pool"] == "AsyncAdaptedQueuePool"
+    finally:
+        await database.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_database_lifecycle(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'app.db'}")
+    await database.init_db()
+    try:
+        async with database.session_factory() as session:
+            assert (await session.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await session.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            assert (await session.execute(text("SELECT count(*) FROM coin_normalized"))).scalar() == 0
+
+        # WAL: a reader is not blocked by an open write transaction
+        async with database.session_factory() as writer, database.session_factory() as reader:
+            await writer.execute(text("INSERT INTO etl_runs (source, total_records) VALUES ('x', 0)"))
+            assert (await asyncio.wait_for(reader.execute(text("SELECT count(*) FROM etl_runs")), 1)).scalar() == 0
+            assert database.pool_status()["write"]["checked_out"] == 2
+            await writer.rollback()
+    finally:
+        await database.close()
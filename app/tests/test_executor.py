@@ -0,0 +1,59 @@
+import os
+import threading
+import pytest
+from app.core import executor
+from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu, shutdown_executors
+from app.ingestion.normalizer import SymbolClaims, normalize_batch, normalize_columns, raw_columns
+from app.schemas.coin_raw import CoinRaw
+
+COINS = [
+    CoinRaw(id="Bitcoin", symbol=" btc ", name="Bitcoin", price_usd=90000.0),
+    CoinRaw(id="bitcoin-wrapped", symbol="BTC", name="Wrapped", price_usd=None),
+    CoinRaw(id="ethereum", symbol="eth", name="Ethereum", price_usd=3700.0, market_cap_usd=4e11),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_executors():
+    yield
+    shutdown_executors()
+
+
+@pytest.mark.asyncio
+async def test_small_jobs_stay_inline_and_thread_mode_offloads(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_executor", "thread")
+    monkeypatch.setattr(settings, "cpu_offload_min_rows", 100)
+    here = threading.get_ident()
+
+    assert await run_cpu(threading.get_ident, rows=99) == here
+    assert await run_cpu(threading.get_ident, rows=100) != here
+    assert await run_blocking(threading.get_ident) != here
+
+    monkeypatch.setattr(settings, "cpu_executor", "inline")
+    assert await run_cpu(threading.get_ident) == here
+    assert await run_blocking(threading.get_ident) == here
+
+    monkeypatch.setattr(settings, "cpu_executor", "gpu")
+    with pytest.raises(ValueError):
+        await run_cpu(threading.get_ident)
+
+
+@pytest.mark.asyncio
+async def test_process_pool_normalizes_to_the_same_rows(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_executor", "process")
+    monkeypatch.setattr(settings, "cpu_workers", 1)
+    monkeypatch.setattr(settings, "cpu_offload_min_rows", 0)
+
+    assert await run_cpu(os.getpid) != os.getpid()
+    assert isinstance(executor.cpu_pool(), executor.ProcessPoolExecutor)
+
+    batch = await normalize_batch("csv", COINS, ["csv"])
+    assert batch == normalize_columns(raw_columns(COINS), "csv", ["csv"])
+    assert batch.raw_rows == 3
+    assert [row[:2] for row in batch.rows] == [("bitcoin", "BTC"), ("ethereum", "ETH")]
+
+    # Resolving the offloaded batch matches normalizing it inline
+    offloaded, inline = SymbolClaims(["csv"]), SymbolClaims(["csv"])
+    assert offloaded.resolve(batch) == inline.resolve(normalize_columns(raw_columns(COINS), "csv", ["csv"]))
+    assert offloaded.raw_count == inline.raw_count == 3
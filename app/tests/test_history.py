@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from app.ingestion.base import BaseIngestor
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.ingestion.writer import append_history, bulk_upsert_coins
+from app.models import CoinPriceHistory
+from app.schemas.coin_raw import CoinRaw
+from app.services.coin_service import coin_cache
+from app.services.history_service import HistoryService, history_cache, parse_interval
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600  # an hour boundary
+
+
+def at(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+async def seed(session):
+    await bulk_upsert_coins(session, [("bitcoin", "BTC", "Bitcoin", 1.0, None, None, None, "csv")])
+    # Two hours of points: 10, 30, 5, 20 in the first hour; 40 in the second
+    for offset, price in ((0, 10.0), (600, 30.0), (1200, 5.0), (3000, 20.0), (3600 + 60, 40.0)):
+        await append_history(session, [("bitcoin", "BTC", "Bitcoin", price, None, price * 2, None, "csv")], T0 + offset)
+    await session.commit()
+
+
+def test_parse_interval():
+    assert parse_interval("300") == 300
+    assert parse_interval("5m") == 300
+    assert parse_interval("1d") == 86400
+    for bad in ("", "0", "5x", "-1h"):
+        with pytest.raises(ValueError):
+            parse_interval(bad)
+
+
+@pytest.mark.asyncio
+async def test_ohlc_buckets(session):
+    await seed(session)
+    listings = len(coin_cache)
+
+    history = await HistoryService.get_history(session, "btc", at(T0), at(T0 + 7200), 3600)
+    assert history.coin_id == "bitcoin"
+    first, second = history.buckets
+    assert (first.open, first.high, first.low, first.close, first.samples) == (10.0, 30.0, 5.0, 20.0, 4)
+    assert first.volume_24h_usd == 40.0  # last point's volume
+    assert first.ts == at(T0)
+    assert (second.open, second.close, second.samples) == (40.0, 40.0, 1)
+
+    # A range too fine for the point budget is refused; omitting the interval picks one
+    with pytest.raises(ValueError):
+        await HistoryService.get_history(session, "btc", at(T0), at(T0 + 86400 * 365), 60)
+    auto = await HistoryService.get_history(session, "btc", at(T0), at(T0 + 86400 * 365))
+    assert auto.interval_seconds == 86400
+    assert len(auto.buckets) == 1
+    assert await HistoryService.get_history(session, "nope", at(T0), at(T0 + 60)) is None
+    # History has its own cache, so one-off ranges never evict coin listings
+    assert len(history_cache) > 0 and len(coin_cache) == listings
+
+
+@pytest.mark.asyncio
+async def test_pipeline_appends_history_per_batch(session, tmp_path):
+    class OneCoin(BaseIngestor):
+        def get_source_name(self):
+            return "csv"
+
+        async def ingest(self, limit=100):
+            return [CoinRaw(id="bitcoin", symbol="BTC", name="Bitcoin", price_usd=1.0),
+                    CoinRaw(id="nothing", symbol="NIL", name="No price")]
+
+    registry = IngestorRegistry()
+    registry.register("csv", OneCoin)
+    await IngestionPipeline.run_all_ingestors(
+        session, registry=registry, checkpoints=CheckpointManager(str(tmp_path / "c.json"))
+    )
+
+    # Unpriced rows are not history
+    count = (await session.execute(select(func.count()).select_from(CoinPriceHistory))).scalar()
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint(client, session):
+    await seed(session)
+
+    response = await client.get("/coins/BTC/history", params={"from": T0, "to": T0 + 7200, "interval": "1h"})
+    assert response.status_code == 200
+    assert [b["close"] for b in response.json()["buckets"]] == [20.0, 40.0]
+    assert (await client.get("/coins/BTC/history", params={"interval": "soon"})).status_code == 422
+    assert (await client.get("/coins/NOPE/history")).status_code == 404
+
+    # Open-ended ranges end on a bucket boundary, so repeats hit the cache
+    hits = history_cache.hits
+    first = (await client.get("/coins/BTC/history", params={"interval": "1h"})).json()
+    again = (await client.get("/coins/BTC/history", params={"interval": "1h"})).json()
+    assert first == again and history_cache.hits == hits + 1
+    assert datetime.fromisoformat(first["end"]).timestamp() % 3600 == 0
@@ -0,0 +1,90 @@
+import json
+import time
+import httpx
+import pytest
+from app.core.http import HttpClient
+
+
+def make_client(handler, **kwargs) -> HttpClient:
+    kwargs.setdefault("backoff_base", 0)
+    kwargs.setdefault("rate_limits", {})
+    kwargs.setdefault("default_rate", 0)
+    return HttpClient(transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("reset", request=request)
+        if len(calls) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[1, 2])
+
+    client = make_client(handler, max_retries=3)
+    result = await client.get("https://upstream.test/coins")
+    await client.close()
+
+    assert result.status_code == 200 and json.loads(result.content) == [1, 2]
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    client = make_client(lambda request: httpx.Response(500), max_retries=2)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.get("https://upstream.test/coins")
+    await client.close()
+
+
+def test_retry_after_is_capped():
+    client = make_client(lambda request: httpx.Response(200), timeout=2)
+    request = httpx.Request("GET", "https://upstream.test/coins")
+
+    assert client._backoff(0, httpx.Response(429, headers={"Retry-After": "1"}, request=request)) == 1
+    assert client._backoff(0, httpx.Response(429, headers={"Retry-After": "86400"}, request=request)) == 6
+    assert client._backoff(0, httpx.Response(429, headers={"Retry-After": "soon"}, request=request)) == 0
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation_skips_unchanged_payload():
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"coins": []}, headers={"ETag": '"v1"'})
+
+    client = make_client(handler)
+    first = await client.get("https://upstream.test/coins", params={"page": 1})
+    second = await client.get("https://upstream.test/coins", params={"page": 1})
+    other_page = await client.get("https://upstream.test/coins", params={"page": 2})
+    await client.close()
+
+    assert not first.not_modified
+    assert second.not_modified and second.content == b""
+    assert not other_page.not_modified
+    assert seen_headers == [None, '"v1"', None]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_per_host():
+    client = make_client(lambda request: httpx.Response(200), rate_limits={"slow.test": 20})
+
+    started = time.perf_counter()
+    for _ in range(25):  # burst of 20, then 1/20s per request
+        await client.get("https://slow.test/x")
+    slow_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(25):
+        await client.get("https://fast.test/x")
+    fast_elapsed = time.perf_counter() - started
+    await client.close()
+
+    assert slow_elapsed >= 0.2
+    assert fast_elapsed < 0.2
@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.db import Base
+from app.core.locks import FileLock
+from app.ingestion import jobs
+from app.ingestion.jobs import JobRunner
+from app.models import ETLRun, ETLStatus
+
+
+async def status_of(session_factory, run_id):
+    async with session_factory() as session:
+        return (await session.get(ETLRun, run_id)).status
+
+
+@pytest_asyncio.fixture
+async def file_factory(tmp_path):
+    """On-disk database: jobs and pollers use separate connections, as in production."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def runner(file_factory, monkeypatch):
+    release = asyncio.Event()
+
+    async def blocking(session, run, **params):
+        run.status = ETLStatus.RUNNING
+        await session.commit()
+        await release.wait()
+        run.status = ETLStatus.COMPLETED
+        await session.commit()
+        return 0
+
+    monkeypatch.setitem(jobs.JOB_KINDS, "blocking", blocking)
+    runner = JobRunner(file_factory, max_concurrent=1)
+    runner.release = release
+    runner.start()
+    yield runner
+    await runner.stop()
+
+
+@pytest.mark.asyncio
+async def test_identical_submissions_share_one_run(runner, file_factory):
+    first, deduplicated = await runner.submit("blocking")
+    assert not deduplicated
+    assert await status_of(file_factory, first) == ETLStatus.PENDING
+
+    second, deduplicated = await runner.submit("blocking")
+    assert (second, deduplicated) == (first, True)
+    other, deduplicated = await runner.submit("blocking", limit=5)
+    assert other != first and not deduplicated
+
+    runner.release.set()
+    await runner.join()
+    assert await status_of(file_factory, first) == ETLStatus.COMPLETED
+    assert await status_of(file_factory, other) == ETLStatus.COMPLETED
+    # Finished jobs no longer de-duplicate new submissions
+    third, deduplicated = await runner.submit("blocking")
+    assert third != first and not deduplicated
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_and_queued_runs(runner, file_factory):
+    running, _ = await runner.submit("blocking")
+    queued, _ = await runner.submit("blocking", limit=1)
+    while await status_of(file_factory, running) != ETLStatus.RUNNING:
+        await asyncio.sleep(0.01)
+
+    assert await runner.cancel(queued)
+    assert await status_of(file_factory, queued) == ETLStatus.CANCELLED
+    assert await runner.cancel(running)
+    await runner.join()
+    assert await status_of(file_factory, running) == ETLStatus.CANCELLED
+    assert not await runner.cancel(running)
+
+
+@pytest.mark.asyncio
+async def test_unknown_kind_is_rejected(runner):
+    with pytest.raises(ValueError):
+        await runner.submit("nope")
+
+
+@pytest.mark.asyncio
+async def test_run_endpoints(client, session_factory, monkeypatch):
+    runner = JobRunner(session_factory)
+    monkeypatch.setattr("app.api.routes_etl.job_runner", runner)
+
+    response = await client.post("/etl/runs", params={"kind": "incremental"})
+    assert response.status_code == 202
+    run_id = response.json()["run_id"]
+
+    response = await client.get(f"/etl/runs/{run_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+
+    assert (await client.delete(f"/etl/runs/{run_id}")).status_code == 202
+    assert (await client.get(f"/etl/runs/{run_id}")).json()["status"] == "cancelled"
+    assert (await client.get("/etl/runs/999")).status_code == 404
+    assert (await client.post("/etl/runs", params={"kind": "nope"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_lock_backend_errors_fail_the_run(file_factory):
+    class BrokenLock(FileLock):
+        async def try_acquire(self):
+            raise ConnectionError("advisory lock connection refused")
+
+    runner = JobRunner(file_factory, lock_factory=BrokenLock)
+    runner.start()
+    try:
+        run_id, _ = await runner.submit("incremental")
+        await runner.join()
+    finally:
+        await runner.stop()
+
+    async with file_factory() as session:
+        run = await session.get(ETLRun, run_id)
+    assert run.status == ETLStatus.FAILED
+    assert run.error_message == "advisory lock connection refused"
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.db import Base
+from app.core.locks import FileLock, LockTimeout, lock_key, named_lock
+from app.ingestion import jobs
+from app.ingestion.jobs import JobRunner
+from app.models import ETLRun, ETLStatus
+
+
+@pytest.mark.asyncio
+async def test_file_lock_is_exclusive_until_released(lock_dir):
+    first = FileLock("etl", directory=str(lock_dir))
+    second = FileLock("etl", directory=str(lock_dir), poll_interval=0.01)
+
+    assert await first.try_acquire()
+    assert not await second.try_acquire()
+    assert not await second.acquire(timeout=0.05)
+    with pytest.raises(LockTimeout):
+        second.timeout = 0.05
+        async with second:
+            pass
+
+    await first.release()
+    await first.release()  # a release without a matching acquire is a no-op
+    async with second:
+        assert second.held
+    assert not second.held
+
+
+def test_lock_key_is_stable_and_signed_64_bit():
+    assert lock_key("kasparro-etl-pipeline") == lock_key("kasparro-etl-pipeline")
+    assert lock_key("a") != lock_key("b")
+    assert -2 ** 63 <= lock_key("a") < 2 ** 63
+
+
+@pytest.mark.asyncio
+async def test_named_lock_falls_back_to_file_lock_on_sqlite():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    assert isinstance(named_lock("etl", engine), FileLock)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def shared_db(tmp_path):
+    """One on-disk database shared by several simulated workers."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'shared.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_workers_take_turns_and_elect_one_leader(shared_db, lock_dir, monkeypatch):
+    release = asyncio.Event()
+    running = []
+
+    async def blocking(session, run, **params):
+        running.append(run.id)
+        await release.wait()
+        run.status = ETLStatus.COMPLETED
+        await session.commit()
+        running.remove(run.id)
+        return 0
+
+    monkeypatch.setitem(jobs.JOB_KINDS, "blocking", blocking)
+    workers = [
+        JobRunner(shared_db, lock_factory=lambda name: FileLock(name, directory=str(lock_dir), poll_interval=0.01))
+        for _ in range(2)
+    ]
+    elected = []
+    for worker in workers:
+        worker.start()
+        worker.lead(lambda worker=worker: asyncio.sleep(0, elected.append(worker)))
+
+    try:
+        first, _ = await workers[0].submit("blocking")
+        second, _ = await workers[1].submit("blocking")
+        await asyncio.sleep(0.1)
+        # Both workers have a job, but only one holds the pipeline lock
+        assert len(running) == 1
+
+        release.set()
+        await asyncio.gather(workers[0].join(), workers[1].join())
+        async with shared_db() as session:
+            for run_id in (first, second):
+                assert (await session.get(ETLRun, run_id)).status == ETLStatus.COMPLETED
+        assert len(elected) == 1 and elected[0].is_leader
+    finally:
+        for worker in workers:
+            await worker.stop()
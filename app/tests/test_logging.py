@@ -0,0 +1,75 @@
+import logging
+from loguru import logger
+from app.core import logging_config
+from app.core.config import settings
+from app.core.logging_config import InterceptHandler, SamplingFilter, setup_logging
+
+
+def test_sampling_keeps_one_in_n_hot_records_per_call_site():
+    records = []
+    handler_id = logger.add(records.append, filter=SamplingFilter({"DEBUG": 10}), level="DEBUG")
+    try:
+        for i in range(25):
+            logger.bind(hot=True).debug(f"hot {i}")
+            logger.debug(f"cold {i}")
+        for _ in range(3):
+            logger.bind(hot=True).warning("never sampled")
+    finally:
+        logger.remove(handler_id)
+
+    messages = [record.record["message"] for record in records]
+    assert [m for m in messages if m.startswith("hot")] == ["hot 0", "hot 10", "hot 20"]
+    assert len([m for m in messages if m.startswith("cold")]) == 25
+    assert messages.count("never sampled") == 3
+
+
+def test_intercepted_records_keep_logger_name_and_location():
+    records = []
+    handler_id = logger.add(records.append, level="DEBUG")
+    stdlib = logging.getLogger("app.tests.intercept")
+    stdlib.addHandler(InterceptHandler(hot_loggers=["app.tests.intercept"]))
+    stdlib.propagate = False
+    stdlib.setLevel(logging.DEBUG)
+    try:
+        stdlib.info("through stdlib")
+    finally:
+        stdlib.handlers.clear()
+        logger.remove(handler_id)
+
+    (record,) = [r.record for r in records]
+    assert record["function"] == "test_intercepted_records_keep_logger_name_and_location"
+    assert record["name"] == __name__
+    assert record["extra"] == {"logger_name": "app.tests.intercept", "hot": True}
+
+
+def test_setup_is_idempotent(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "log_dir", str(tmp_path))
+    setup_logging(force=True)
+    sinks = dict(logger._core.handlers)
+    setup_logging()
+    assert dict(logger._core.handlers) == sinks
+    assert len(logging.getLogger().handlers) == 1
+    assert logging_config._configured
+
+
+def test_each_sink_samples_on_its_own(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "log_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "log_json", False)
+    monkeypatch.setattr(settings, "log_sample_every", {"INFO": 10})
+    setup_logging(force=True)
+    for i in range(100):
+        logger.bind(hot=True).info(f"hot {i}")
+    logger.complete()
+
+    stdout = [line for line in capsys.readouterr().out.splitlines() if " - hot " in line]
+    logged = [line for line in (tmp_path / "app.log").read_text().splitlines() if '"hot ' in line]
+    assert len(stdout) == len(logged) == 10
+    assert stdout[0].endswith(" - hot 0")
+
+
+def test_only_app_loggers_go_below_info(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "log_dir", str(tmp_path))
+    setup_logging(force=True)
+    assert logging.getLogger().level == logging.INFO
+    assert not logging.getLogger("aiosqlite").isEnabledFor(logging.DEBUG)
+    assert logging.getLogger("app.ingestion").isEnabledFor(logging.DEBUG)
@@ -0,0 +1,80 @@
+import pytest
+from app.core.metrics import Counter, Histogram, RunTimings, current_run, stage, STAGE_SECONDS
+from app.ingestion.base import BaseIngestor
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.models import ETLRun
+from app.schemas.coin_raw import CoinRaw
+
+
+def test_exposition_format():
+    requests = Counter("requests_total", "Requests", ("route",))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    assert list(requests.samples()) == ['requests_total{route="/a"} 3']
+
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    lines = latency.render()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    # Buckets are cumulative, +Inf equals the count
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_stage_accumulates_into_current_run():
+    timings = RunTimings()
+    before = STAGE_SECONDS.count(stage="parse", source="unit")
+    token = current_run.set(timings)
+    try:
+        with stage("parse", source="unit", rows=3):
+            pass
+        with stage("parse", source="unit") as timed:
+            timed["rows"] = 2
+    finally:
+        current_run.reset(token)
+
+    parse = timings.as_dict()["stages"]["parse"]
+    assert (parse["calls"], parse["rows"]) == (2, 5)
+    assert timings.as_dict()["bottleneck"] == "parse"
+    assert STAGE_SECONDS.count(stage="parse", source="unit") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_run_records_stage_breakdown(session, tmp_path):
+    class TwoCoins(BaseIngestor):
+        def get_source_name(self):
+            return "csv"
+
+        async def ingest(self, limit=100):
+            return [CoinRaw(id="bitcoin", symbol="BTC", name="Bitcoin", price_usd=1.0),
+                    CoinRaw(id="ethereum", symbol="ETH", name="Ethereum", price_usd=2.0)]
+
+    registry = IngestorRegistry()
+    registry.register("csv", TwoCoins)
+    await IngestionPipeline.run_all_ingestors(
+        session, registry=registry, checkpoints=CheckpointManager(str(tmp_path / "c.json"))
+    )
+
+    run = await session.get(ETLRun, 1)
+    assert run.duration_seconds > 0
+    stages = run.stage_timings["stages"]
+    for name in ("fetch", "normalize", "dedup", "write", "commit"):
+        assert name in stages
+    assert stages["fetch"]["rows"] == 2
+    assert run.stage_timings["bottleneck"] in stages
+    assert "rows_per_second" in run.source_stats["csv"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    await client.get("/health/")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE etl_stage_seconds histogram" in response.text
+    assert 'cache_hit_ratio{cache="stats"}' in response.text
@@ -0,0 +1,288 @@
+import asyncio
+import time
+import httpx
+import pytest
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.core.http import HttpClient
+from app.ingestion import pipeline as pipeline_module
+from app.ingestion.base import BaseIngestor
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.coingecko_ingestor import CoinGeckoIngestor
+from app.ingestion.csv_ingestor import CSVIngestor
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.models import CoinNormalized, ETLRun, ETLStatus
+from app.schemas.coin_raw import CoinRaw
+from app.services.stats_service import StatsService
+
+
+class FakeIngestor(BaseIngestor):
+    def __init__(self, name: str, delay: float = 0.0, coins=None, error: Exception | None = None):
+        self.name = name
+        self.delay = delay
+        self.coins = coins or []
+        self.error = error
+
+    async def ingest(self, limit: int = 100):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.coins[:limit]
+
+    def get_source_name(self) -> str:
+        return self.name
+
+
+def coin(symbol: str, price: float | None = 1.0) -> CoinRaw:
+    return CoinRaw(id=symbol.lower(), symbol=symbol, name=symbol.title(), price_usd=price)
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_runs_sources_concurrently():
+    registry = IngestorRegistry()
+    for name in ("a", "b", "c"):
+        registry.register(name, lambda name=name: FakeIngestor(name, delay=0.2, coins=[coin(name)]))
+
+    received = []
+
+    async def on_batch(source, batch, checkpoint):
+        received.append(source)
+
+    started = time.perf_counter()
+    results = await IngestionPipeline.fetch_all(registry, 10, on_batch)
+    elapsed = time.perf_counter() - started
+
+    assert [r.status for r in results] == ["completed"] * 3
+    assert sorted(received) == ["a", "b", "c"]
+    assert elapsed < 0.5  # slowest source, not the 0.6s sum
+
+
+@pytest.fixture
+def checkpoints(tmp_path):
+    return CheckpointManager(str(tmp_path / "checkpoints.json"))
+
+
+@pytest.mark.asyncio
+async def test_run_records_per_source_failures_and_timeouts(session, checkpoints):
+    registry = IngestorRegistry()
+    registry.register("ok", lambda: FakeIngestor("ok", coins=[coin("BTC"), coin("ETH")]))
+    registry.register("broken", lambda: FakeIngestor("broken", error=RuntimeError("upstream 500")))
+    registry.register("slow", lambda: FakeIngestor("slow", delay=5, coins=[coin("SOL")]), timeout=0.05)
+
+    await IngestionPipeline.run_all_ingestors(session, limit=10, registry=registry, checkpoints=checkpoints)
+
+    run = (await session.execute(ETLRun.__table__.select())).one()
+    assert run.status == ETLStatus.COMPLETED
+    assert run.total_records == 2
+    assert run.source_stats["ok"]["records"] == 2
+    assert run.source_stats["broken"]["status"] == "failed"
+    assert run.source_stats["broken"]["error"] == "upstream 500"
+    assert run.source_stats["slow"]["status"] == "timeout"
+    assert run.source_stats["slow"]["duration_seconds"] < 1
+
+
+def csv_registry(path) -> IngestorRegistry:
+    registry = IngestorRegistry()
+    registry.register("csv", lambda: CSVIngestor(str(path)))
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_crashed_run_resumes_from_last_committed_batch(session, checkpoints, tmp_path, monkeypatch):
+    path = tmp_path / "coins.csv"
+    path.write_text("id,symbol,name,price_usd\n" + "".join(f"coin-{i},C{i},Coin {i},{i + 1}\n" for i in range(50)))
+    monkeypatch.setattr(settings, "max_ingestion_batch", 10)
+
+    real_upsert = pipeline_module.bulk_upsert_coins
+    calls = 0
+
+    async def flaky_upsert(session, rows, batch_size=None):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise RuntimeError("db connection lost")
+        return await real_upsert(session, rows, batch_size)
+
+    monkeypatch.setattr(pipeline_module, "bulk_upsert_coins", flaky_upsert)
+    with pytest.raises(RuntimeError):
+        await IngestionPipeline.run_all_ingestors(session, limit=1000, registry=csv_registry(path), checkpoints=checkpoints)
+    assert checkpoints.get("csv")["file_offset"] == 20
+    assert not checkpoints.get("csv")["completed"]
+
+    monkeypatch.setattr(pipeline_module, "bulk_upsert_coins", real_upsert)
+    resumed = await IngestionPipeline.run_all_ingestors(
+        session, limit=1000, registry=csv_registry(path), checkpoints=checkpoints
+    )
+    unchanged = await IngestionPipeline.run_all_ingestors(
+        session, limit=1000, registry=csv_registry(path), checkpoints=checkpoints
+    )
+
+    total = (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar()
+    assert resumed == 30
+    assert unchanged == 0
+    assert total == 50
+    assert checkpoints.get("csv") | {"last_updated": None} == {
+        "content_hash": checkpoints.get("csv")["content_hash"],
+        "file_offset": 50,
+        "completed": True,
+        "last_updated": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_existing_symbols_keep_their_higher_priority_owner(session, checkpoints, monkeypatch):
+    monkeypatch.setattr(settings, "source_priority", ["coingecko", "coinpaprika", "csv"])
+    first = IngestorRegistry()
+    first.register("coingecko", lambda: FakeIngestor("coingecko", coins=[coin("BTC", 95000.0)]))
+    await IngestionPipeline.run_all_ingestors(session, registry=first, checkpoints=checkpoints)
+
+    second = IngestorRegistry()
+    second.register("coinpaprika", lambda: FakeIngestor("coinpaprika", coins=[
+        CoinRaw(id="btc-bitcoin", symbol="BTC", name="Bitcoin", price_usd=94000.0),
+        CoinRaw(id="eth-ethereum", symbol="ETH", name="Ethereum", price_usd=3700.0),
+    ]))
+    written = await IngestionPipeline.run_all_ingestors(session, registry=second, checkpoints=checkpoints)
+
+    rows = (await session.execute(select(CoinNormalized.coin_id, CoinNormalized.source))).all()
+    assert written == 1
+    assert sorted(rows) == [("btc", "coingecko"), ("eth-ethereum", "coinpaprika")]
+
+
+def test_checkpoint_writes_are_atomic_and_reloadable(tmp_path):
+    path = tmp_path / "state" / "checkpoints.json"
+    manager = CheckpointManager(str(path))
+    manager.save("coingecko", {"high_water_page": 3, "page_hashes": {"1": ["ab", 250]}})
+
+    reloaded = CheckpointManager(str(path))
+
+    assert reloaded.get("coingecko")["high_water_page"] == 3
+    assert reloaded.get("coingecko")["completed"] is False
+    assert [p.name for p in path.parent.iterdir()] == ["checkpoints.json"]  # no temp files left behind
+
+
+@pytest.mark.asyncio
+async def test_full_reload_keeps_old_rows_readable_until_sweep(session, session_factory, checkpoints):
+    first = IngestorRegistry()
+    first.register("csv", lambda: FakeIngestor("csv", coins=[coin("OLD"), coin("KEEP")]))
+    await IngestionPipeline.run_all_ingestors(session, registry=first, checkpoints=checkpoints)
+
+    seen_during_reload = []
+
+    class Reloading(FakeIngestor):
+        async def ingest(self, limit=100):
+            async with session_factory() as reader:
+                seen_during_reload.extend((await reader.execute(select(CoinNormalized.symbol))).scalars())
+            return await super().ingest(limit)
+
+    reload = IngestorRegistry()
+    reload.register("csv", lambda: Reloading("csv", coins=[coin("KEEP", price=2.0), coin("NEW")]))
+    await IngestionPipeline.run_all_ingestors(session, registry=reload, checkpoints=checkpoints, clear_old_records=True)
+
+    assert sorted(seen_during_reload) == ["KEEP", "OLD"]  # nothing was emptied up front
+    symbols = (await session.execute(select(CoinNormalized.symbol))).scalars().all()
+    assert sorted(symbols) == ["KEEP", "NEW"]
+    assert (await StatsService.get_stats(session))["total_coins"] == 2
+
+    # A source failing mid-reload leaves rows it would have refreshed in place
+    failing = IngestorRegistry()
+    failing.register("csv", lambda: FakeIngestor("csv", coins=[coin("NEW")]))
+    failing.register("coingecko", lambda: FakeIngestor("coingecko", error=RuntimeError("down")))
+    await IngestionPipeline.run_all_ingestors(session, registry=failing, checkpoints=checkpoints, clear_old_records=True)
+    assert (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar() == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_coins_are_not_rewritten(session, checkpoints):
+    def registry(*coins):
+        reg = IngestorRegistry()
+        reg.register("csv", lambda: FakeIngestor("csv", coins=list(coins)))
+        return reg
+
+    async def last_run():
+        return (await session.execute(select(ETLRun).order_by(ETLRun.id.desc()).limit(1))).scalar_one()
+
+    async def stored():
+        return dict((await session.execute(select(CoinNormalized.coin_id, CoinNormalized.updated_at))).all())
+
+    assert await IngestionPipeline.run_all_ingestors(
+        session, registry=registry(coin("BTC"), coin("ETH")), checkpoints=checkpoints
+    ) == 2
+    assert (await last_run()).delta_count == 2
+    before = await stored()
+
+    # Steady state: nothing written, nothing touched
+    assert await IngestionPipeline.run_all_ingestors(
+        session, registry=registry(coin("BTC"), coin("ETH")), checkpoints=checkpoints
+    ) == 0
+    run = await last_run()
+    assert (run.delta_count, run.processed_records) == (0, 2)
+    assert await stored() == before
+
+    # Only the moved price is written; a full reload deletes what no source returned
+    assert await IngestionPipeline.run_all_ingestors(
+        session, registry=registry(coin("BTC", price=2.0)), checkpoints=checkpoints, clear_old_records=True
+    ) == 1
+    assert (await last_run()).delta_count == 2
+    after = await stored()
+    assert list(after) == ["btc"] and after["btc"] > before["btc"]
+    assert (await StatsService.get_stats(session))["total_coins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_reload_refetches_pages_the_upstream_reports_unchanged(session, checkpoints):
+    def handler(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json=[
+            {"id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}", "current_price": i + 0.5}
+            for i in range(3)
+        ])
+
+    client = HttpClient(transport=httpx.MockTransport(handler), rate_limits={}, default_rate=0, backoff_base=0)
+    registry = IngestorRegistry()
+    registry.register("coingecko", lambda: CoinGeckoIngestor(client=client))
+
+    async def count():
+        return (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar()
+
+    await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+    assert await count() == 3
+    await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+    assert await count() == 3
+    await IngestionPipeline.run_all_ingestors(
+        session, registry=registry, checkpoints=checkpoints, clear_old_records=True
+    )
+    await client.close()
+    assert await count() == 3
+
+
+@pytest.mark.asyncio
+async def test_page_sized_batches_are_offloaded_by_default(session, checkpoints, tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core import executor
+
+    offloaded = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            offloaded.append((fn.func.__name__, len(fn.args[0][0])))
+            return super().submit(fn, *args, **kwargs)
+
+    pool = RecordingPool(max_workers=1)
+    monkeypatch.setattr(executor, "cpu_pool", lambda: pool)
+    rows = settings.coingecko_page_size
+    path = tmp_path / "coins.csv"
+    path.write_text("id,symbol,name,price_usd\n" + "".join(f"coin-{i},C{i},Coin {i},{i + 1}\n" for i in range(rows)))
+    monkeypatch.setattr(settings, "max_ingestion_batch", rows)
+
+    try:
+        written = await IngestionPipeline.run_all_ingestors(
+            session, limit=1000, registry=csv_registry(path), checkpoints=checkpoints
+        )
+    finally:
+        pool.shutdown()
+
+    # Default cpu_offload_min_rows: the smallest real batch, a coingecko page, leaves the event loop
+    assert written == rows
+    assert offloaded == [("normalize_columns", rows)]
@@ -0,0 +1,40 @@
+import pickle
+import pytest
+from app.ingestion.normalizer import SymbolClaims, normalize_columns, raw_columns
+from app.ingestion.records import RAW_COLUMNS, RawBatch, RawRecord
+from app.schemas.coin_raw import CoinRaw
+
+BTC = RawRecord("bitcoin", "BTC", "Bitcoin", price_usd=95000.0)
+ETH = RawRecord("ethereum", "ETH", "Ethereum", price_usd=3700.0, market_cap_usd=4.4e11)
+
+
+def test_batch_is_columns_with_row_views():
+    batch = RawBatch()
+    batch.append(BTC)
+    batch.extend(RawBatch.from_records([ETH]))
+
+    assert len(batch) == 2
+    assert batch.column("symbol") == ["BTC", "ETH"]
+    assert batch.column("market_cap_usd") == [None, 4.4e11]
+    assert batch[1] == ETH and list(batch) == [BTC, ETH]
+    assert isinstance(batch[:1], RawBatch) and batch[:1] == [BTC]
+    assert RawBatch() == [] and not RawBatch()
+
+    # Only the column lists are pickled, never per-row objects
+    assert pickle.loads(pickle.dumps(batch)).columns == batch.columns
+    with pytest.raises(AttributeError):
+        BTC.extra = 1
+    with pytest.raises(ValueError):
+        RawBatch([["bitcoin"]])
+
+
+def test_legacy_records_normalize_like_a_batch():
+    coins = [CoinRaw(id="Bitcoin", symbol=" btc ", name="Bitcoin", price_usd=90000.0),
+             CoinRaw(id="bitcoin-wrapped", symbol="BTC", name="Wrapped")]
+    batch = RawBatch.of(coins)
+    assert RawBatch.of(batch) is batch
+    assert [getattr(batch[0], column) for column in RAW_COLUMNS] == [getattr(coins[0], column) for column in RAW_COLUMNS]
+
+    normalized = normalize_columns(raw_columns(batch), "csv", ["csv"])
+    assert normalized == normalize_columns(raw_columns(coins), "csv", ["csv"])
+    assert SymbolClaims(["csv"]).resolve(normalized).upserts == [("bitcoin", "BTC", "Bitcoin", 90000.0, None, None, None, "csv")]
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import delete, update
+from app.core.cache import bump_version
+from app.core.config import settings
+from app.ingestion.writer import bulk_upsert_coins
+from app.models import CoinNormalized
+from app.services.search_service import SearchIndex, SearchService, edit_distance
+
+COINS = [
+    ("bitcoin", "BTC", "Bitcoin", 1.0, 9e11, None, None, "csv"),
+    ("bitcoin-cash", "BCH", "Bitcoin Cash", 1.0, 9e9, None, None, "csv"),
+    ("ethereum", "ETH", "Ethereum", 1.0, 4e11, None, None, "csv"),
+    ("chainlink", "LINK", "Chainlink", 1.0, 8e9, None, None, "csv"),
+]
+
+
+def symbols(hits):
+    return [(hit.symbol, hit.match) for hit in hits]
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("bitcon", "bitcoin", 1) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("abc", "xyzxyz", 1) == 2
+
+
+def test_index_ranks_exact_prefix_then_fuzzy():
+    index = SearchIndex()
+    index.rebuild(row[:3] + (row[4],) for row in COINS)
+
+    assert symbols(index.search("btc")) == [("BTC", "exact")]
+    # Prefixes of names and ids, larger market cap first
+    assert symbols(index.search("bit")) == [("BTC", "prefix"), ("BCH", "prefix")]
+    assert symbols(index.search("Cash")) == [("BCH", "prefix")]
+    # Typos
+    assert symbols(index.search("bitcon"))[0] == ("BTC", "fuzzy")
+    assert symbols(index.search("etherium")) == [("ETH", "fuzzy")]
+    assert ("BTC", "fuzzy") in symbols(index.search("bct"))
+    assert index.search("zzz") == [] and index.search("  ") == []
+    assert len(index.search("b", limit=1)) == 1
+
+
+def test_index_upsert_and_remove():
+    index = SearchIndex()
+    index.rebuild(row[:3] + (row[4],) for row in COINS)
+
+    index.upsert([("chainlink", "LINK", "Chainlink", 1e12), ("bitlayer", "BTR", "Bitlayer", 1.0)])
+    assert symbols(index.search("link")) == [("LINK", "exact")]
+    assert symbols(index.search("bit"))[0] == ("BTC", "prefix")
+    assert ("BTR", "prefix") in symbols(index.search("bitl"))
+
+    index.remove(["bitcoin"])
+    assert len(index) == 4
+    assert symbols(index.search("btc")) == [("BTR", "fuzzy")]
+    assert symbols(index.search("bit")) == [("BCH", "prefix"), ("BTR", "prefix")]
+
+
+@pytest.mark.asyncio
+async def test_refresh_follows_etl_runs(session):
+    index = SearchIndex()
+    await bulk_upsert_coins(session, COINS)
+    await session.commit()
+    bump_version()
+    await index.refresh(session)
+    assert len(index) == 4
+
+    # Without a new data version the index is not re-read
+    await session.execute(delete(CoinNormalized).where(CoinNormalized.coin_id == "ethereum"))
+    await session.commit()
+    await index.refresh(session)
+    assert symbols(index.search("eth")) == [("ETH", "exact")]
+
+    await bulk_upsert_coins(session, [("chainlink", "LINK", "Chainlink", 2.0, 1e12, None, None, "csv")])
+    await session.commit()
+    bump_version()
+    await index.refresh(session)
+    assert index.search("eth") == []
+    assert index.search("c")[0].symbol == "LINK"
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_and_sql_fallback(client, session, monkeypatch):
+    await bulk_upsert_coins(session, COINS)
+    await session.commit()
+    bump_version()
+
+    response = await client.get("/coins/search", params={"q": "bitco", "limit": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["query"] == "bitco"
+    assert [hit["coin_id"] for hit in body["results"]] == ["bitcoin", "bitcoin-cash"]
+    assert (await client.get("/coins/search", params={"q": ""})).status_code == 422
+    assert (await client.get("/coins/search", params={"q": "b", "limit": 1000})).status_code == 422
+
+    monkeypatch.setattr(settings, "search_index_enabled", False)
+    assert symbols(await SearchService.search(session, "BTC")) == [("BTC", "exact")]
+    assert symbols(await SearchService.search(session, "bit")) == [("BTC", "prefix"), ("BCH", "prefix")]
+    # LIKE wildcards in the query are literal
+    await session.execute(update(CoinNormalized).where(CoinNormalized.coin_id == "chainlink").values(name="100% Link"))
+    await session.commit()
+    assert await SearchService.search(session, "%") == []
+    assert symbols(await SearchService.search(session, "100%")) == [("LINK", "prefix")]
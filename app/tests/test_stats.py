@@ -0,0 +1,103 @@
+import random
+import pytest
+from app.ingestion.base import BaseIngestor
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.schemas.coin_raw import CoinRaw
+from app.services.stats_service import StatsAccumulator, StatsService
+
+
+class ListIngestor(BaseIngestor):
+    def __init__(self, name, coins):
+        self.name = name
+        self.coins = coins
+
+    def get_source_name(self) -> str:
+        return self.name
+
+    async def ingest(self, limit: int = 100):
+        return self.coins[:limit]
+
+
+def coin(symbol, market_cap, volume=None, price=1.0):
+    return CoinRaw(
+        id=symbol.lower(), symbol=symbol, name=symbol.title(),
+        price_usd=price, market_cap_usd=market_cap, volume_24h_usd=volume,
+    )
+
+
+def row(coin_id, market_cap, volume, source="csv"):
+    return (coin_id, coin_id.upper(), coin_id, 1.0, market_cap, volume, None, source)
+
+
+def test_accumulator_matches_full_recompute_under_churn():
+    rng = random.Random(7)
+    stats = StatsAccumulator(top_n=5, buffer=3)
+    truth = {}
+    for _ in range(300):
+        upserts, superseded = [], []
+        for _ in range(rng.randint(1, 8)):
+            coin_id = f"c{rng.randint(0, 60)}"
+            if rng.random() < 0.25 and coin_id in truth:
+                superseded.append(coin_id)
+                del truth[coin_id]
+            else:
+                value = rng.choice([None, rng.uniform(0, 1000)])
+                source = rng.choice(["csv", "coingecko"])
+                upserts.append(row(coin_id, value, value, source))
+                truth[coin_id] = (source, value)
+        # Upserts in the same batch never resurrect a superseded id
+        upserts = [r for r in upserts if r[0] in truth]
+        stats.apply(upserts, superseded)
+
+        snapshot = stats.snapshot()
+        assert snapshot["total_coins"] == len(truth)
+        expected_top = sorted((v for _, v in truth.values() if v is not None), reverse=True)[:5]
+        assert [e["market_cap_usd"] for e in snapshot["top_by_market_cap"]] == expected_top
+        assert snapshot["total_market_cap_usd"] == pytest.approx(
+            round(sum(v or 0.0 for _, v in truth.values()), 2), abs=1e-6
+        )
+        by_source = {}
+        for source, _ in truth.values():
+            by_source[source] = by_source.get(source, 0) + 1
+        assert snapshot["coins_by_source"] == dict(sorted(by_source.items()))
+
+
+@pytest.mark.asyncio
+async def test_get_stats_without_snapshot(session):
+    stats = await StatsService.get_stats(session)
+    assert stats["total_coins"] == 0
+    assert stats["last_run"] is None
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writes_snapshot_incrementally(session, tmp_path):
+    registry = IngestorRegistry()
+    registry.register("csv", lambda: ListIngestor("csv", [coin("BTC", 100.0, 5.0), coin("ETH", 50.0, 9.0)]))
+    await IngestionPipeline.run_all_ingestors(
+        session, registry=registry, checkpoints=CheckpointManager(str(tmp_path / "a.json"))
+    )
+
+    stats = await StatsService.get_stats(session)
+    assert stats["total_coins"] == 2
+    assert stats["coins_by_source"] == {"csv": 2}
+    assert stats["total_market_cap_usd"] == 150.0
+    assert [c["symbol"] for c in stats["top_by_market_cap"]] == ["BTC", "ETH"]
+    assert [c["symbol"] for c in stats["top_by_volume"]] == ["ETH", "BTC"]
+    assert stats["last_run"]["status"] == "completed"
+    assert stats["last_run"]["duration_seconds"] is not None
+
+    # A second run seeds from the table and folds in only its own delta:
+    # coingecko outranks csv, so it takes over the ETH row
+    registry = IngestorRegistry()
+    registry.register("coingecko", lambda: ListIngestor("coingecko", [coin("ETH", 300.0, 1.0), coin("SOL", 10.0)]))
+    await IngestionPipeline.run_all_ingestors(
+        session, registry=registry, checkpoints=CheckpointManager(str(tmp_path / "b.json"))
+    )
+
+    stats = await StatsService.get_stats(session)
+    assert stats["total_coins"] == 3
+    assert stats["coins_by_source"] == {"coingecko": 2, "csv": 1}
+    assert stats["total_market_cap_usd"] == 410.0
+    assert [c["symbol"] for c in stats["top_by_market_cap"]] == ["ETH", "BTC", "SOL"]
@@ -0,0 +1,119 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import routes_stream
+from app.core.broadcast import DROPPED, PriceBroadcaster, TooManySubscribers, price_broadcaster
+from app.core.config import settings
+from app.core.serialization import loads
+from app.ingestion.base import BaseIngestor
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.ingestion.writer import COIN_COLUMNS
+from app.schemas.coin_raw import CoinRaw
+
+BTC = ("bitcoin", "BTC", "Bitcoin", 95000.0, 1.9e12, 4e10, None, "coingecko")
+ETH = ("ethereum", "ETH", "Ethereum", 3700.0, 4.4e11, 2e10, None, "coingecko")
+
+
+def coins(message: bytes):
+    return [coin["symbol"] for coin in loads(message)["coins"]]
+
+
+@pytest.mark.asyncio
+async def test_publish_filters_by_symbol_and_drops_slow_consumers(monkeypatch):
+    monkeypatch.setattr(settings, "stream_queue_size", 2)
+    broadcaster = PriceBroadcaster()
+    everything = broadcaster.subscribe()
+    btc_only = broadcaster.subscribe(["btc", " "])
+    unmatched = broadcaster.subscribe(["DOGE"])
+
+    assert broadcaster.publish(COIN_COLUMNS, [BTC, ETH]) == 2
+    message = everything.queue.get_nowait()
+    assert loads(message)["type"] == "prices"
+    assert loads(message)["coins"][0] == {
+        "coin_id": "bitcoin", "symbol": "BTC", "name": "Bitcoin", "price_usd": 95000.0,
+        "market_cap_usd": 1.9e12, "volume_24h_usd": 4e10, "source": "coingecko",
+    }
+    assert coins(btc_only.queue.get_nowait()) == ["BTC"]
+    assert unmatched.queue.empty()
+
+    # btc_only stops reading: the third message overflows its queue of two
+    for _ in range(3):
+        broadcaster.publish(COIN_COLUMNS, [BTC])
+        everything.queue.get_nowait()
+    assert btc_only.dropped and len(broadcaster) == 2
+    assert [message async for message in btc_only.messages()] == [DROPPED]
+
+    monkeypatch.setattr(settings, "stream_max_subscribers", 2)
+    with pytest.raises(TooManySubscribers):
+        broadcaster.subscribe()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_publishes_changed_coins_after_commit(session, tmp_path):
+    class Prices(BaseIngestor):
+        price = 1.0
+
+        def get_source_name(self):
+            return "csv"
+
+        async def ingest(self, limit=100):
+            return [CoinRaw(id="bitcoin", symbol="BTC", name="Bitcoin", price_usd=Prices.price),
+                    CoinRaw(id="ethereum", symbol="ETH", name="Ethereum", price_usd=1.0)]
+
+    registry = IngestorRegistry()
+    registry.register("csv", Prices)
+    checkpoints = CheckpointManager(persist=False)
+    subscription = price_broadcaster.subscribe(["BTC"])
+    try:
+        await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+        assert coins(subscription.queue.get_nowait()) == ["BTC"]
+
+        # Unchanged coins are not news
+        await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+        assert subscription.queue.empty()
+
+        Prices.price = 2.0
+        await IngestionPipeline.run_all_ingestors(session, registry=registry, checkpoints=checkpoints)
+        assert loads(subscription.queue.get_nowait())["coins"][0]["price_usd"] == 2.0
+    finally:
+        price_broadcaster.unsubscribe(subscription)
+
+
+def test_websocket_receives_filtered_diffs():
+    app = FastAPI()
+    app.include_router(routes_stream.router)
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/prices?symbols=btc") as websocket:
+            client.portal.call(price_broadcaster.publish, COIN_COLUMNS, [ETH, BTC])
+            assert coins(websocket.receive_text().encode()) == ["BTC"]
+
+            websocket.send_json({"symbols": ["ETH"]})
+            websocket.send_json({"symbols": 5})
+            assert loads(websocket.receive_text())["type"] == "error"
+            client.portal.call(price_broadcaster.publish, COIN_COLUMNS, [ETH, BTC])
+            assert coins(websocket.receive_text().encode()) == ["ETH"]
+    assert len(price_broadcaster) == 0
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_and_keep_alive(monkeypatch):
+    monkeypatch.setattr(settings, "stream_heartbeat_seconds", 0.01)
+    response = await routes_stream.sse_prices(symbols="BTC,ETH")
+    assert response.media_type == "text/event-stream"
+    events = response.body_iterator
+    assert await events.__anext__() == b"retry: 3000\n\n"
+    assert await events.__anext__() == b": keep-alive\n\n"
+
+    price_broadcaster.publish(COIN_COLUMNS, [BTC])
+    event = await events.__anext__()
+    assert event.startswith(b"data: ") and event.endswith(b"\n\n")
+    assert coins(event[len(b"data: "):]) == ["BTC"]
+
+    await events.aclose()
+    assert len(price_broadcaster) == 0
+
+    with pytest.raises(Exception) as error:
+        await routes_stream.sse_prices(symbols=",".join(f"C{i}" for i in range(settings.stream_max_symbols + 1)))
+    assert error.value.status_code == 422
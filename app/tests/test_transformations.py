@@ -15,3 +15,52 @@ def test_coin_normalization(raw_coin, expected_normalized):
     assert normalized.coin_id == raw_coin.id
     assert normalized.symbol == raw_coin.symbol.upper()
     assert normalized.price_usd == raw_coin.price_usd
+
+
+def test_normalizer_dedups_by_price_then_source_priority():
+    from app.ingestion.normalizer import SymbolClaims, normalize_columns, raw_columns
+
+    priority = ["coingecko", "csv"]
+    claims = SymbolClaims(priority)
+    rows, superseded = {}, []
+    for source, coins in (
+        ("csv", [
+            CoinRaw(id="Bitcoin", symbol=" btc ", name="Bitcoin", price_usd=90000.0),
+            CoinRaw(id="ethereum", symbol="eth", name="Ethereum"),
+            CoinRaw(id="solana", symbol="sol", name="Solana", price_usd=0.0, market_cap_usd=5.0),
+        ]),
+        ("coingecko", [
+            CoinRaw(id="bitcoin", symbol="BTC", name="Bitcoin", price_usd=91000.0),
+            CoinRaw(id="eth-gecko", symbol="ETH", name="Ethereum", price_usd=3700.0),
+        ]),
+    ):
+        delta = claims.resolve(normalize_columns(raw_columns(coins), source, priority))
+        rows.update((row[1], row) for row in delta.upserts)
+        superseded.extend(delta.superseded)
+
+    assert claims.raw_count == 5
+    assert rows["BTC"] == ("bitcoin", "BTC", "Bitcoin", 91000.0, None, None, None, "coingecko")
+    assert rows["ETH"][0] == "eth-gecko" and superseded == ["ethereum"]
+    assert rows["SOL"][3] is None and rows["SOL"][4] == 5.0 and rows["SOL"][7] == "csv"
+
+
+def test_small_batches_normalize_like_the_vectorized_path(monkeypatch):
+    from app.core.config import settings
+    from app.ingestion.normalizer import normalize_columns, normalize_rows
+
+    columns = (
+        ["Bitcoin", "btc-csv", "ethereum", "", "solana", None, "tether", "usdt-2"],
+        [" btc ", "BTC", "eth", "xrp", "sol", "ada", "USDT", "usdt"],
+        ["Bitcoin", "Bitcoin", float("nan"), "XRP", "Solana", "Cardano", None, "Tether"],
+        [None, None, None, None, "solana", None, None, "eth"],
+        [None, "90000", 3700.0, 2.5, 0.0, 0.5, "n/a", 1.0],
+        [1e12, None, "4.4e11", None, 5.0, 0, float("nan"), 1e11],
+        [None, 2e10, 1.5e10, None, "bad", None, 7.0, 6.0],
+    )
+    expected = normalize_rows(columns, "csv", ["coingecko", "csv"])
+    monkeypatch.setattr(settings, "normalize_vectorize_min_rows", 0)
+
+    assert normalize_columns(columns, "csv", ["coingecko", "csv"]) == expected
+    assert expected.symbols == ["BTC", "ETH", "SOL", "ADA", "USDT"]
+    assert expected.rows[0] == ("btc-csv", "BTC", "Bitcoin", 90000.0, None, 2e10, None, "csv")
+    assert expected.rows[3][0] == "nan" and expected.rows[4][0] == "usdt-2"
@@ -0,0 +1,114 @@
+import httpx
+import pytest
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.ingestion.jobs import job_runner
+from app.ingestion.upload import CSVStreamIngestor, UploadError, UploadStream
+from app.models import CoinNormalized, ETLRun
+
+CSV = (
+    b"id,symbol,name,price_usd,market_cap_usd\n"
+    b"bitcoin,btc,Bitcoin,50000,1000\n"
+    b'ethereum,eth,"Ether, the\nsecond",3000,500\n'
+    b"solana,sol,Solana,100,50"
+)
+
+
+async def body(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(ingestor, limit=1000, batch_size=None):
+    batches = [batch async for batch in ingestor.stream(limit, batch_size)]
+    return batches, [coin for batch in batches for coin in batch]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 10_000])
+async def test_stream_parses_any_chunking(chunk_size):
+    _, coins = await collect(CSVStreamIngestor(body(CSV, chunk_size)))
+
+    assert [c.symbol for c in coins] == ["BTC", "ETH", "SOL"]
+    # The quoted newline stays inside the field instead of splitting the record
+    assert coins[1].name == "Ether, the\nsecond"
+    assert coins[2].price_usd == 100.0
+
+
+@pytest.mark.asyncio
+async def test_stream_respects_batch_size_and_limit():
+    rows = b"".join(f"c{i},S{i},Coin {i},{i}\n".encode() for i in range(25))
+    data = b"id,symbol,name,price_usd\n" + rows
+
+    batches, coins = await collect(CSVStreamIngestor(body(data, 50)), limit=20, batch_size=5)
+    assert len(coins) == 20
+    assert max(len(batch) for batch in batches) <= 10  # one batch plus one body chunk
+
+
+@pytest.mark.asyncio
+async def test_header_without_symbol_is_rejected():
+    with pytest.raises(UploadError):
+        await CSVStreamIngestor(body(b"not a csv file", 4)).read_header()
+
+
+@pytest.mark.asyncio
+async def test_multipart_body_yields_only_the_file_part():
+    request = httpx.Request(
+        "POST", "http://test/",
+        data={"note": "ignored"},
+        files={"file": ("coins.csv", CSV, "text/csv")},
+    )
+    payload = request.read()
+    upload = UploadStream(body(payload, 13), request.headers["content-type"])
+    await upload.open()
+
+    assert upload.filename == "coins.csv"
+    assert b"".join([chunk async for chunk in upload.chunks()]) == CSV
+    assert upload.bytes_received == len(payload)
+
+
+@pytest.mark.asyncio
+async def test_upload_endpoint_persists_rows(client, session):
+    response = await client.post("/data/ingest/csv", files={"file": ("coins.csv", CSV, "text/csv")})
+
+    assert response.status_code == 200
+    progress = response.json()
+    assert progress["status"] == "completed"
+    assert progress["rows_received"] == 3
+    assert progress["records_upserted"] == 3
+    assert (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar() == 3
+    run = await session.get(ETLRun, progress["run_id"])
+    assert run.source == "csv:coins.csv"
+
+
+@pytest.mark.asyncio
+async def test_upload_endpoint_accepts_raw_body(client):
+    response = await client.post(
+        "/data/ingest/csv", params={"filename": "dump.csv"},
+        content=CSV, headers={"content-type": "text/csv"},
+    )
+    assert response.status_code == 200
+    assert response.json()["records_upserted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_upload_endpoint_rejects_bad_files(client):
+    response = await client.post("/data/ingest/csv", files={"file": ("notes.txt", b"symbol\nBTC\n", "text/plain")})
+    assert response.status_code == 400
+
+    response = await client.post("/data/ingest/csv", files={"file": ("coins.csv", b"not a csv file", "text/csv")})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_upload_during_another_run_is_turned_away(client, monkeypatch):
+    monkeypatch.setattr(settings, "upload_lock_wait_seconds", 0)
+    running = job_runner.lock()
+    assert await running.try_acquire()
+    try:
+        response = await client.post("/data/ingest/csv", files={"file": ("coins.csv", CSV, "text/csv")})
+    finally:
+        await running.release()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(settings.upload_retry_after_seconds)
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import func, select
+from app.ingestion.writer import bulk_upsert_coins
+from app.models import CoinNormalized
+
+
+@pytest.mark.asyncio
+async def test_upsert_updates_existing_rows_in_place(session):
+    first = [
+        ("bitcoin", "BTC", "Bitcoin", 90000.0, 1.8e12, 4.5e10, None, "csv"),
+        {"coin_id": "ethereum", "symbol": "ETH", "name": "Ethereum", "price_usd": 3700.0},
+    ]
+    assert await bulk_upsert_coins(session, first) == 2
+
+    second = [("bitcoin", "BTC", "Bitcoin", 95000.0, 1.9e12, 4.6e10, None, "coingecko")]
+    assert await bulk_upsert_coins(session, second) == 1
+
+    total = (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar()
+    btc = (await session.execute(
+        select(CoinNormalized.price_usd, CoinNormalized.source).where(CoinNormalized.coin_id == "bitcoin")
+    )).one()
+    assert total == 2
+    assert btc == (95000.0, "coingecko")
+
+
+@pytest.mark.asyncio
+async def test_upsert_batches_and_collapses_duplicate_ids(session):
+    rows = [(f"coin-{i % 250}", f"C{i % 250}", "Coin", float(i), None, None, None, "csv") for i in range(1000)]
+
+    assert await bulk_upsert_coins(session, rows, batch_size=100) == 1000
+
+    total = (await session.execute(select(func.count()).select_from(CoinNormalized))).scalar()
+    assert total == 250
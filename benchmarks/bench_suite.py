@@ -0,0 +1,283 @@
+"""
+End-to-end benchmarks for the ingestion and API hot paths.
+
+Measures CSV ingestion, upstream fetch + parse, normalization/dedup, DB
+write rates (SQLite, and Postgres when a scratch database is given), a
+whole pipeline run, and p50/p99 latency and RPS of the read endpoints
+under concurrent load through an in-process ASGI client.
+
+Results are printed as JSON. With --baseline, each metric is compared
+against a stored run, and the exit status is 1 when any metric is worse
+than the baseline by more than --tolerance.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 1000 100000] [--output results.json]
+    python -m benchmarks.bench_suite --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_suite --postgres-url postgresql+asyncpg://.../bench_scratch
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.core.db import Base
+from app.core.http import HttpClient
+from app.ingestion.checkpoints import CheckpointManager
+from app.ingestion.coingecko_ingestor import CoinGeckoIngestor
+from app.ingestion.csv_ingestor import CSVIngestor
+from app.ingestion.normalizer import SymbolClaims, normalize_batch
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.registry import IngestorRegistry
+from app.ingestion.writer import bulk_upsert_coins
+from benchmarks.bench_normalization import make_batches
+from benchmarks.datasets import FakeUpstream, coin_rows, write_csv
+
+# metric -> True when higher is better
+DIRECTIONS = {"rows_per_second": True, "rps": True, "p50_ms": False, "p99_ms": False}
+API_PATHS = ("/health/", "/stats/coins?limit=100")
+
+Result = Dict[str, float]
+
+
+@contextmanager
+def overridden(**values: Any) -> Iterator[None]:
+    """Temporarily change settings (e.g. lift the CSV row cap for large datasets)."""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def throughput(rows: int, seconds: float) -> Result:
+    return {"rows": rows, "seconds": round(seconds, 4), "rows_per_second": round(rows / seconds, 1) if seconds else 0.0}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p * len(sorted_values)) - 1))]
+
+
+async def fresh_engine(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def bench_csv_ingest(workdir: Path, size: int) -> Result:
+    path = write_csv(workdir / f"coins_{size}.csv", size)
+    with overridden(max_csv_rows=max(settings.max_csv_rows, size)):
+        started = time.perf_counter()
+        coins = await CSVIngestor(str(path)).ingest(limit=size)
+        return throughput(len(coins), time.perf_counter() - started)
+
+
+async def bench_upstream_fetch(workdir: Path, size: int) -> Result:
+    client = HttpClient(transport=FakeUpstream(size).transport(), rate_limits={}, default_rate=0, backoff_base=0)
+    try:
+        started = time.perf_counter()
+        rows = 0
+        async for batch in CoinGeckoIngestor(client=client).stream(limit=size):
+            rows += len(batch)
+        return throughput(rows, time.perf_counter() - started)
+    finally:
+        await client.close()
+
+
+async def bench_normalize(workdir: Path, size: int) -> Result:
+    batches = make_batches(size)
+    claims = SymbolClaims()
+    started = time.perf_counter()
+    for source, batch in batches:
+        claims.resolve(await normalize_batch(source, batch, claims.source_priority))
+    return throughput(size, time.perf_counter() - started)
+
+
+async def bench_db_write(url: str, size: int) -> Result:
+    engine = await fresh_engine(url)
+    rows = coin_rows(size)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            started = time.perf_counter()
+            written = await bulk_upsert_coins(session, rows)
+            return throughput(written, time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+
+async def bench_pipeline(workdir: Path, size: int) -> Result:
+    path = write_csv(workdir / f"coins_{size}.csv", size)
+    engine = await fresh_engine(f"sqlite+aiosqlite:///{workdir / f'pipeline_{size}.db'}")
+    registry = IngestorRegistry()
+    registry.register("csv", lambda: CSVIngestor(str(path)))
+    try:
+        with overridden(max_csv_rows=max(settings.max_csv_rows, size)):
+            async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+                started = time.perf_counter()
+                await IngestionPipeline.run_all_ingestors(
+                    session, limit=size, registry=registry, checkpoints=CheckpointManager(persist=False)
+                )
+                return throughput(size, time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+
+async def bench_api(workdir: Path, rows: int, requests: int, concurrency: int) -> Dict[str, Result]:
+    from app.core.db import get_read_session, get_read_session_factory, get_session
+    # Importing the app installs its log sinks; keep per-request INFO lines out of the timings
+    with overridden(log_level="WARNING", log_file_level="WARNING"):
+        from app.main import app
+
+    engine = await fresh_engine(f"sqlite+aiosqlite:///{workdir / 'api.db'}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await bulk_upsert_coins(session, coin_rows(rows))
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    overrides = {get_session: override_session, get_read_session: override_session,
+                 get_read_session_factory: lambda: session_factory}
+    app.dependency_overrides.update(overrides)
+    results: Dict[str, Result] = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for path in API_PATHS:
+                latencies: List[float] = []
+
+                async def worker(count: int) -> None:
+                    for _ in range(count):
+                        started = time.perf_counter()
+                        response = await client.get(path)
+                        latencies.append(time.perf_counter() - started)
+                        response.raise_for_status()
+
+                per_worker = max(1, requests // concurrency)
+                started = time.perf_counter()
+                await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+                elapsed = time.perf_counter() - started
+                latencies.sort()
+                results[path] = {
+                    "requests": len(latencies),
+                    "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                    "rps": round(len(latencies) / elapsed, 1),
+                }
+    finally:
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+        await engine.dispose()
+    return results
+
+
+async def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Result] = {}
+
+    def record(name: str, result: Result) -> None:
+        results[name] = result
+        print(f"  {name}: {result}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="kasparro-bench-") as tmp:
+        workdir = Path(tmp)
+        scenarios: Dict[str, Callable[[int], Any]] = {
+            "csv_ingest": lambda size: bench_csv_ingest(workdir, size),
+            "upstream_fetch": lambda size: bench_upstream_fetch(workdir, size),
+            "normalize": lambda size: bench_normalize(workdir, size),
+            "db_write.sqlite": lambda size: bench_db_write(f"sqlite+aiosqlite:///{workdir / f'write_{size}.db'}", size),
+            "pipeline": lambda size: bench_pipeline(workdir, size),
+        }
+        if args.postgres_url:
+            scenarios["db_write.postgres"] = lambda size: bench_db_write(args.postgres_url, size)
+
+        for name, scenario in scenarios.items():
+            if args.only and name.split(".")[0] not in args.only:
+                continue
+            for size in args.sizes:
+                record(f"{name}.{size}", await scenario(size))
+
+        if not args.only or "api" in args.only:
+            api = await bench_api(workdir, args.api_rows, args.requests, args.concurrency)
+            for path, result in api.items():
+                record(f"api.{path}", result)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sizes": args.sizes,
+            "api_rows": args.api_rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions: metrics worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in DIRECTIONS.items():
+            if metric not in metrics or not base.get(metric):
+                continue
+            change = (metrics[metric] - base[metric]) / base[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {metrics[metric]} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--only", nargs="+", help="Scenarios to run: csv_ingest upstream_fetch normalize db_write pipeline api")
+    parser.add_argument("--api-rows", type=int, default=10_000, help="Coins in the database behind the API benchmark")
+    parser.add_argument("--requests", type=int, default=2_000, help="Requests per API endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"),
+                        help="Scratch database for the Postgres write benchmark (its tables are dropped)")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+    if args.baseline:
+        if not Path(args.baseline).exists():
+            print(f"No baseline at {args.baseline}; save one with --output", file=sys.stderr)
+            return
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Deterministic synthetic datasets for the benchmarks.
+
+The same `rows` and `seed` always produce the same data, so runs on one
+machine are comparable with each other and with a stored baseline.
+"""
+import csv
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import httpx
+
+CSV_COLUMNS = ("id", "symbol", "name", "price_usd", "market_cap_usd", "volume_24h_usd", "platform_id")
+
+
+def write_csv(path: Path, rows: int, seed: int = 42) -> Path:
+    """CSV in the shape CSVIngestor reads; ~1/3 of symbols repeat, ~10% lack a price."""
+    rng = random.Random(seed)
+    distinct = max(1, rows * 2 // 3)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for i in range(rows):
+            n = rng.randrange(distinct)
+            writer.writerow((
+                f"coin-{i}",
+                f"c{n}",
+                f"Coin {n}",
+                "" if rng.random() < 0.1 else f"{rng.uniform(0.001, 50000):.6f}",
+                f"{rng.uniform(1e3, 1e12):.2f}",
+                f"{rng.uniform(1e2, 1e10):.2f}",
+                "",
+            ))
+    return path
+
+
+def coin_rows(rows: int, source: str = "csv", seed: int = 42) -> List[Tuple]:
+    """Normalized rows in writer (COIN_COLUMNS) order with unique symbols."""
+    rng = random.Random(seed)
+    return [
+        (
+            f"{source}_coin-{i}",
+            f"C{i}",
+            f"Coin {i}",
+            rng.uniform(0.001, 50000),
+            rng.uniform(1e3, 1e12),
+            rng.uniform(1e2, 1e10),
+            None,
+            source,
+        )
+        for i in range(rows)
+    ]
+
+
+class FakeUpstream:
+    """CoinGecko-shaped `/coins/markets` pages over a fixed universe, served in-process."""
+
+    def __init__(self, universe: int, seed: int = 42):
+        rng = random.Random(seed)
+        self.items: List[Dict[str, Any]] = [
+            {
+                "id": f"coin-{i}",
+                "symbol": f"c{i}",
+                "name": f"Coin {i}",
+                "current_price": rng.uniform(0.001, 50000),
+                "market_cap": rng.uniform(1e3, 1e12),
+                "total_volume": rng.uniform(1e2, 1e10),
+            }
+            for i in range(universe)
+        ]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        per_page = int(request.url.params["per_page"])
+        start = (page - 1) * per_page
+        return httpx.Response(200, json=self.items[start:start + per_page])
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self)